@@ -94,3 +94,21 @@ def produce_phase_only_slm_pattern(hologram,slm_range):
     hologram_phase                            = hologram_phase.float()
     hologram_phase                           *= slm_range/255.
     return np.cos(hologram_phase)+1j*np.sin(hologram_phase)
+
+
+def wavenumber(wavelength):
+    """
+    Definition for calculating the wavenumber of a plane wave, it keeps tensors on their device so that wavelengths can be learned.
+
+    Parameters
+    ----------
+    wavelength   : float or torch.tensor
+                   Wavelength of a wave in mm.
+
+    Returns
+    ----------
+    k            : float or torch.tensor
+                   Wave number for a given wavelength.
+    """
+    k = 2*np.pi/wavelength
+    return k
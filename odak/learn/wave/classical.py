@@ -1,17 +1,18 @@
 from odak import np
-import torch, torch.fft
+import torch, torch.fft, torch.utils.checkpoint
+import inspect
 from .toolkit import fftshift, ifftshift
-from .__init__ import set_amplitude, produce_phase_only_slm_pattern
-from odak.wave import wavenumber
+from .__init__ import set_amplitude, produce_phase_only_slm_pattern, calculate_amplitude, wavenumber
+from odak.tools import get_precision,kernel_cache,to_numpy,to_torch
 
 def propagate_beam(field,k,distance,dx,wavelength,propagation_type='IR Fresnel'):
     """
-    Definitions for Fresnel impulse respone (IR), Fresnel Transfer Function (TF), Fraunhofer diffraction in accordence with "Computational Fourier Optics" by David Vuelz.
+    Definitions for Fresnel impulse respone (IR), Fresnel Transfer Function (TF), Fraunhofer diffraction in accordence with "Computational Fourier Optics" by David Vuelz. For propagating many fields with the same geometry, see odak.learn.wave.propagator.
 
     Parameters
     ==========
     field            : torch.complex128
-                       Complex field (MxN).
+                       Complex field (MxN) or a stack of complex fields (...xMxN), stacks are propagated with a single batched FFT. A numpy or cupy array is propagated without copying its memory and the result is returned in the same array library, see odak.tools.to_torch for more.
     k                : odak.wave.wavenumber
                        Wave number of a wave, see odak.wave.wavenumber for more.
     distance         : float
@@ -26,56 +27,477 @@ def propagate_beam(field,k,distance,dx,wavelength,propagation_type='IR Fresnel')
     Returns
     =======
     result           : torch.complex128
-                       Final complex field (MxN).
+                       Final complex field (MxN) or fields (...xMxN), in the complex counterpart of the field's dtype.
+    """
+    if torch.is_tensor(field) == False:
+        result = propagate_beam(to_torch(field),k,distance,dx,wavelength,propagation_type)
+        result = to_numpy(result)
+        return result
+    nv, nu = field.shape[-2], field.shape[-1]
+    H      = get_propagation_kernel(nv,nu,k,distance,dx,wavelength,propagation_type,device=field.device,dtype=field.dtype)
+    if propagation_type == 'Fraunhofer':
+       result = H*ifftshift(torch.fft.fft2(fftshift(field.to(H.dtype))))
+    else:
+       result = apply_propagation_kernel(field,H)
+    return result
+
+propagation_kernel_cache = kernel_cache()
+
+def set_kernel_cache_budget(budget):
+    """
+    Definition to set the memory budget of the propagation kernel cache. Least recently used kernels are evicted once the budget is exceeded.
+
+    Parameters
+    ==========
+    budget           : int
+                       Memory budget in bytes, set it to zero to disable caching.
+    """
+    propagation_kernel_cache.set_budget(budget)
+
+def get_kernel_cache_info():
+    """
+    Definition to inspect the propagation kernel cache.
+
+    Returns
+    =======
+    info             : dict
+                       Number of entries, memory in use, memory budget, number of hits and misses.
+    """
+    return propagation_kernel_cache.info()
+
+def clear_kernel_cache():
+    """
+    Definition to remove every kernel from the propagation kernel cache.
+    """
+    propagation_kernel_cache.clear()
+
+def get_propagation_kernel(nv,nu,k,distance,dx,wavelength,propagation_type='IR Fresnel',device=None,cache=True,dtype=None):
+    """
+    Definition to get the frequency domain kernel of a beam propagation on a given device. Kernels are built directly on that device and kept in a least recently used cache per shape, geometry, propagation type, device and dtype, see odak.learn.wave.set_kernel_cache_budget for more. Kernels that depend on a tensor requiring gradients are never cached.
+
+    Parameters
+    ==========
+    nv               : int
+                       Number of pixels along the first axis of the field.
+    nu               : int
+                       Number of pixels along the second axis of the field.
+    k                : odak.wave.wavenumber
+                       Wave number of a wave, see odak.wave.wavenumber for more. A tensor of wave numbers (Cx1x1) builds a stack of kernels.
+    distance         : float
+                       Propagation distance.
+    dx               : float
+                       Size of one single pixel in the field grid (in meters).
+    wavelength       : float
+                       Wavelength of the electric field. A tensor of wavelengths (Cx1x1) builds a stack of kernels.
+    propagation_type : str
+                       Type of the propagation (IR Fresnel, Bandlimited Angular Spectrum, TR Fresnel, Fraunhofer).
+    device           : torch.device
+                       Device of the kernel, CPU is used if None.
+    cache            : bool
+                       Set it to False to bypass the kernel cache.
+    dtype            : torch.dtype
+                       Dtype of the fields to be propagated, see odak.learn.wave.build_propagation_kernel for more.
+
+    Returns
+    =======
+    H                : torch.complex128
+                       Kernel (MxN) or kernels (CxMxN), treat it as read only as it may be shared through the cache.
+    """
+    device = torch.device('cpu') if type(device) == type(None) else torch.device(device)
+    if type(dtype) == type(None):
+        dtype = torch.complex64 if get_precision() == 'single' else torch.complex128
+    dtype  = torch.promote_types(dtype,torch.complex64)
+    key    = [propagation_type,nv,nu,dx,str(device),dtype]
+    for value in [k,distance,wavelength]:
+        if torch.is_tensor(value):
+            if value.requires_grad == True:
+                cache = False
+                break
+            value = tuple(value.detach().flatten().tolist())
+        elif isinstance(value,np.ndarray):
+            value = tuple(value.flatten().tolist())
+        key.append(value)
+    key = tuple(key)
+    if cache == True:
+        H = propagation_kernel_cache.get(key)
+        if type(H) != type(None):
+            return H
+    H = build_propagation_kernel(nv,nu,k,distance,dx,wavelength,propagation_type,device=device,dtype=dtype)
+    if cache == True:
+        propagation_kernel_cache.set(key,H)
+    return H
+
+def build_propagation_kernel(nv,nu,k,distance,dx,wavelength,propagation_type='IR Fresnel',device=None,dtype=None):
+    """
+    Definition to build the frequency domain kernel of a beam propagation. For Fraunhofer, the kernel is the chirp multiplied with the Fourier transform of the field. The kernel is always evaluated in double precision on the given device and cast to the complex counterpart of the given dtype (i.e. torch.complex64 for torch.complex64 or torch.float32 fields), so that propagation keeps the dtype of the fields. Without a dtype, it follows the selected precision, see odak.tools.set_precision.
+
+    Parameters
+    ==========
+    nv               : int
+                       Number of pixels along the first axis of the field.
+    nu               : int
+                       Number of pixels along the second axis of the field.
+    k                : odak.wave.wavenumber
+                       Wave number of a wave, see odak.wave.wavenumber for more. A tensor of wave numbers (Cx1x1) builds a stack of kernels.
+    distance         : float
+                       Propagation distance.
+    dx               : float
+                       Size of one single pixel in the field grid (in meters).
+    wavelength       : float
+                       Wavelength of the electric field. A tensor of wavelengths (Cx1x1) builds a stack of kernels.
+    propagation_type : str
+                       Type of the propagation (IR Fresnel, Bandlimited Angular Spectrum, TR Fresnel, Fraunhofer).
+    device           : torch.device
+                       Device of the kernel, CPU is used if None.
+    dtype            : torch.dtype
+                       Dtype of the fields to be propagated.
+
+    Returns
+    =======
+    H                : torch.complex128
+                       Kernel (MxN) or kernels (CxMxN).
     """
-    nv, nu = field.shape[-1], field.shape[-2]
-    x      = torch.linspace(-nv*dx/2, nv*dx/2, nv, dtype=torch.float64)
-    y      = torch.linspace(-nu*dx/2, nu*dx/2, nu, dtype=torch.float64)
-    Y, X   = torch.meshgrid(y, x)
-    Z      = torch.pow(X,2) + torch.pow(Y,2)
-    Z      = X**2+Y**2
+    k          = torch.as_tensor(k, dtype=torch.float64, device=device)
+    wavelength = torch.as_tensor(wavelength, dtype=torch.float64, device=device)
+    x      = torch.linspace(-nu*dx/2, nu*dx/2, nu, dtype=torch.float64, device=device).reshape(1,-1)
+    y      = torch.linspace(-nv*dx/2, nv*dx/2, nv, dtype=torch.float64, device=device).reshape(-1,1)
     if propagation_type == 'IR Fresnel':
-       h      = 1./(1j*wavelength*distance)*torch.exp(1j*k*0.5/distance*Z)
-       h      = torch.fft.fftn(fftshift(h))*pow(dx,2)
-       h      = h.to(field.device)
-       U1     = torch.fft.fftn(fftshift(field))
-       U2     = h*U1
-       result = ifftshift(torch.fft.ifftn(U2))
+       hx     = torch.exp(1j*k*0.5/distance*x**2)
+       hy     = torch.exp(1j*k*0.5/distance*y**2)
+       H      = 1./(1j*wavelength*distance)*torch.fft.fft(torch.fft.fftshift(hy,dim=-2),dim=-2)*torch.fft.fft(torch.fft.fftshift(hx,dim=-1),dim=-1)*pow(dx,2)
     elif propagation_type == 'Bandlimited Angular Spectrum':
-       h         = 1./(1j*wavelength*distance)*torch.exp(1j*k*(distance+Z/2/distance))  
-       h         = torch.fft.fftn(fftshift(h)) * pow(dx, 2)
-       h         = h.to(field.device)
-       flimx     = np.ceil(1/(((2*distance*(1./(nv)))**2+1)**0.5*wavelength))
-       flimy     = np.ceil(1/(((2*distance*(1./(nu)))**2+1)**0.5*wavelength))
-       mask      = torch.zeros((nu,nv), dtype=torch.cfloat)
-       mask[...] = torch.logical_and(torch.lt(torch.abs(X), flimx), torch.lt(torch.abs(Y), flimy))
-       mask      = mask.to(field.device)
-       mask      = set_amplitude(h, mask)
-       U1        = torch.fft.fftn(fftshift(field))
-       U2        = mask * U1 
-       result    = ifftshift(torch.fft.ifftn(U2))
+       h         = 1./(1j*wavelength*distance)*torch.exp(1j*k*(distance+(x**2+y**2)/2/distance))
+       h         = torch.fft.fft2(fftshift(h)) * pow(dx, 2)
+       flimx     = torch.ceil(1/(((2*distance*(1./(nu)))**2+1)**0.5*wavelength))
+       flimy     = torch.ceil(1/(((2*distance*(1./(nv)))**2+1)**0.5*wavelength))
+       mask      = torch.logical_and(torch.lt(torch.abs(x), flimx), torch.lt(torch.abs(y), flimy)).to(torch.cfloat)
+       H         = set_amplitude(h, mask)
     elif propagation_type == 'TR Fresnel':
-       h      = torch.exp(1j*k*distance)*torch.exp(-1j*np.pi*wavelength*distance*Z)
-       h      = fftshift(h)
-       h      = h.to(field.device)
-       U1     = torch.fft.fftn(fftshift(field))
-       U2     = h*U1
-       result = ifftshift(torch.fft.ifftn(U2))
+       h      = torch.exp(1j*k*distance)*torch.exp(-1j*np.pi*wavelength*distance*y**2)*torch.exp(-1j*np.pi*wavelength*distance*x**2)
+       H      = fftshift(h)
     elif propagation_type == 'Fraunhofer':
-       c      = 1./(1j*wavelength*distance)*torch.exp(1j*k*0.5/distance*Z)
-       c      = c.to(field.device)
-       result = c*ifftshift(torch.fft.fftn(fftshift(field)))*pow(dx,2)
+       H      = 1./(1j*wavelength*distance)*torch.exp(1j*k*0.5/distance*y**2)*torch.exp(1j*k*0.5/distance*x**2)*pow(dx,2)
+    else:
+       raise Exception("Unknown propagation type selected.")
+    if type(dtype) == type(None):
+       dtype  = torch.complex64 if get_precision() == 'single' else torch.complex128
+    H         = H.to(torch.promote_types(dtype,torch.complex64))
+    return H
+
+def apply_propagation_kernel(field,H):
+    """
+    Definition to propagate a field using a frequency domain kernel, see odak.learn.wave.build_propagation_kernel for more. A circular convolution commutes with circular shifts, so shifting the field before the FFT and shifting it back after the inverse FFT cancel out exactly; they are left out to save two full copies of the field in every forward and backward pass.
+
+    Parameters
+    ==========
+    field            : torch.complex128
+                       Complex field (MxN).
+    H                : torch.complex128
+                       Kernel (MxN).
+
+    Returns
+    =======
+    result           : torch.complex128
+                       Final complex field (MxN).
+    """
+    if H.requires_grad == True:
+        U1     = torch.fft.fft2(field.to(H.dtype))
+        U2     = H*U1
+        result = torch.fft.ifft2(U2)
+    else:
+        result = kernel_propagation.apply(field,H)
     return result
 
+class kernel_propagation(torch.autograd.Function):
+    """
+    An autograd function to propagate a field with a frequency domain kernel. Its backward pass is the analytic adjoint of the propagation, a propagation with the conjugate kernel, so only the kernel is kept for the backward pass and the whole propagation is a single node in the graph. Kernels requiring gradients aren't supported, see odak.learn.wave.apply_propagation_kernel.
+    """
+    @staticmethod
+    def forward(ctx,field,H):
+        """
+        Definition to propagate a field.
+
+        Parameters
+        ----------
+        field            : torch.cfloat
+                           Complex field (...xMxN).
+        H                : torch.cfloat
+                           Kernel (...xMxN).
+
+        Returns
+        ----------
+        result           : torch.cfloat
+                           Propagated complex field.
+        """
+        ctx.save_for_backward(H)
+        ctx.field_dtype = field.dtype
+        ctx.field_shape = field.shape
+        result          = torch.fft.ifft2(H*torch.fft.fft2(field.to(H.dtype)))
+        return result
 
-def gerchberg_saxton(field,n_iterations,distance,dx,wavelength,slm_range=6.28,propagation_type='IR Fresnel'):
+    @staticmethod
+    def backward(ctx,grad):
+        """
+        Definition to propagate the gradient of the output back to the input with the adjoint of the propagation. A field broadcast against a stack of kernels (i.e. one hologram and many planes) gets its gradient summed in the frequency domain, so only one inverse FFT is taken per field.
+
+        Parameters
+        ----------
+        grad             : torch.cfloat
+                           Gradient of the loss with respect to the propagated field.
+
+        Returns
+        ----------
+        grad_field       : torch.cfloat
+                           Gradient of the loss with respect to the input field.
+        grad_H           : None
+                           Kernel isn't differentiated.
+        """
+        H,         = ctx.saved_tensors
+        grad_field = torch.conj(H)*torch.fft.fft2(grad.to(H.dtype))
+        if grad_field.shape != ctx.field_shape:
+            grad_field = grad_field.sum_to_size(ctx.field_shape)
+        grad_field = torch.fft.ifft2(grad_field)
+        if not ctx.field_dtype.is_complex:
+            grad_field = grad_field.real
+        grad_field = grad_field.to(ctx.field_dtype)
+        return grad_field,None
+
+def propagate_chain(field,steps,segments=None):
     """
-    Definition to compute a hologram using an iterative method called Gerchberg-Saxton phase retrieval algorithm. For more on the method, see: Gerchberg, Ralph W. "A practical algorithm for the determination of phase from image and diffraction plane pictures." Optik 35 (1972): 237-246.
+    Definition to run a chain of propagations and modulations, i.e. a multi-plane optical system or unrolled iterations of an algorithm. With checkpointing, only the input of every segment is kept for the backward pass and the segment is recomputed during it, so the peak memory of the backward pass grows with the number of segments and the length of a segment instead of the length of the chain. Torch versions without non-reentrant checkpointing fall back to reentrant checkpointing, with an input that requires gradients so that the gradients of the steps aren't lost.
 
     Parameters
     ----------
     field            : torch.cfloat
-                       Complex field (MxN).
+                       Complex field (...xMxN).
+    steps            : list
+                       Functions applied in order, each takes a field and returns a field (i.e. odak.learn.wave.propagator.forward or lambda field: field*mask).
+    segments         : int
+                       Number of checkpointed segments, no checkpointing if None. Around the square root of the number of steps balances the memory and the recomputation.
+
+    Returns
+    ----------
+    result           : torch.cfloat
+                       Complex field at the end of the chain.
+    """
+    if type(segments) == type(None) or torch.is_grad_enabled() == False:
+        for step in steps:
+            field = step(field)
+        return field
+    if 'use_reentrant' in inspect.signature(torch.utils.checkpoint.checkpoint_sequential).parameters:
+        result = torch.utils.checkpoint.checkpoint_sequential(list(steps),segments,field,use_reentrant=False)
+    else:
+        if field.requires_grad == False:
+            field = field.detach().requires_grad_()
+        result = torch.utils.checkpoint.checkpoint_sequential(list(steps),segments,field)
+    return result
+
+def propagate_beam_spectral(field,distance,dx,wavelengths,propagation_type='IR Fresnel'):
+    """
+    Definition to propagate fields of many wavelengths (i.e. RGB) in a single call. Kernels of all wavelengths are built in one vectorized pass and all channels are propagated with a single batched FFT.
+
+    Parameters
+    ==========
+    field            : torch.cfloat
+                       Complex fields (...xCxMxN), one channel per wavelength. A single field (MxN) is propagated at every wavelength. A numpy or cupy array gives an array of the same library, see odak.tools.to_torch for more.
+    distance         : float
+                       Propagation distance.
+    dx               : float
+                       Size of one single pixel in the field grid (in meters).
+    wavelengths      : list
+                       Wavelengths of the channels (C).
+    propagation_type : str
+                       Type of the propagation (IR Fresnel, Bandlimited Angular Spectrum, TR Fresnel, Fraunhofer).
+
+    Returns
+    =======
+    result           : torch.cfloat
+                       Final complex fields (...xCxMxN).
+    """
+    if torch.is_tensor(field) == False:
+        result = propagate_beam_spectral(to_torch(field),distance,dx,wavelengths,propagation_type)
+        result = to_numpy(result)
+        return result
+    nv, nu      = field.shape[-2], field.shape[-1]
+    wavelengths = torch.as_tensor(wavelengths, dtype=torch.float64).reshape(-1,1,1)
+    k           = 2*np.pi/wavelengths
+    H           = get_propagation_kernel(nv,nu,k,distance,dx,wavelengths,propagation_type,device=field.device,dtype=field.dtype)
+    if propagation_type == 'Fraunhofer':
+       result = H*ifftshift(torch.fft.fft2(fftshift(field.to(H.dtype))))
+    else:
+       result = apply_propagation_kernel(field,H)
+    return result
+
+def broadband_intensity(field,distance,dx,wavelengths,weights=None,propagation_type='IR Fresnel',chunk_size=8):
+    """
+    Definition to calculate the intensity of a broadband (incoherent) source after propagation, by integrating the weighted intensities of spectral samples.
+
+    Parameters
+    ==========
+    field            : torch.cfloat
+                       Complex field (MxN) shared by all wavelengths, or complex fields (...xCxMxN) one per wavelength. A numpy or cupy array gives an array of the same library, see odak.tools.to_torch for more.
+    distance         : float
+                       Propagation distance.
+    dx               : float
+                       Size of one single pixel in the field grid (in meters).
+    wavelengths      : list
+                       Wavelengths of the spectral samples (C).
+    weights          : list
+                       Weights of the spectral samples (C), i.e. spectral power distribution times the sample spacing. Equal weights are used if not provided.
+    propagation_type : str
+                       Type of the propagation (IR Fresnel, Bandlimited Angular Spectrum, TR Fresnel, Fraunhofer).
+    chunk_size       : int
+                       Number of wavelengths propagated together, it bounds the memory used.
+
+    Returns
+    =======
+    intensity        : torch.float
+                       Integrated intensity (...xMxN).
+    """
+    if torch.is_tensor(field) == False:
+        intensity = broadband_intensity(to_torch(field),distance,dx,wavelengths,weights,propagation_type,chunk_size)
+        intensity = to_numpy(intensity)
+        return intensity
+    wavelengths = torch.as_tensor(wavelengths, dtype=torch.float64).flatten()
+    if type(weights) == type(None):
+       weights = torch.ones(wavelengths.shape[0], dtype=torch.float64)/wavelengths.shape[0]
+    weights     = torch.as_tensor(weights, dtype=torch.float64).flatten().to(field.device)
+    per_channel = len(field.shape) > 2 and field.shape[-3] == wavelengths.shape[0]
+    intensity   = 0.
+    for start in range(0, wavelengths.shape[0], chunk_size):
+       end = start+chunk_size
+       if per_channel == True:
+          chunk = field[...,start:end,:,:]
+       else:
+          chunk = field
+       result     = propagate_beam_spectral(chunk,distance,dx,wavelengths[start:end],propagation_type)
+       intensity  = intensity+torch.sum(weights[start:end].reshape(-1,1,1)*torch.abs(result)**2, dim=-3)
+    return intensity
+
+class propagator():
+    """
+    A class to propagate fields with a fixed geometry, the kernel is computed once and reused at every call.
+    """
+    def __init__(self,shape,dx,wavelength,distance,propagation_type='IR Fresnel'):
+        """
+        Class to represent a beam propagation operator between two planes.
+
+        Parameters
+        ----------
+        shape            : list
+                           Shape of the fields to be propagated (MxN).
+        dx               : float
+                           Size of one single pixel in the field grid (in meters).
+        wavelength       : float
+                           Wavelength of the electric field.
+        distance         : float
+                           Propagation distance.
+        propagation_type : str
+                           Type of the propagation (IR Fresnel, Bandlimited Angular Spectrum, TR Fresnel, Fraunhofer).
+        """
+        self.shape            = shape
+        self.dx               = dx
+        self.wavelength       = wavelength
+        self.distance         = distance
+        self.propagation_type = propagation_type
+        self.k                = wavenumber(wavelength)
+        self.kernel           = get_propagation_kernel(
+                                                       shape[0],
+                                                       shape[1],
+                                                       self.k,
+                                                       distance,
+                                                       dx,
+                                                       wavelength,
+                                                       propagation_type
+                                                      )
+
+    def get_kernel(self,device,dtype=None):
+        """
+        Definition to get the kernel on a given device and in a given dtype, the kernel is built on that device (or taken from the kernel cache) only once.
+
+        Parameters
+        ----------
+        device           : torch.device
+                           Device of the fields.
+        dtype            : torch.dtype
+                           Dtype of the fields, see odak.learn.wave.build_propagation_kernel for more.
+
+        Returns
+        ----------
+        kernel           : torch.complex128
+                           Kernel of the propagation.
+        """
+        if type(dtype) == type(None):
+            dtype = self.kernel.dtype
+        if self.kernel.device != device or self.kernel.dtype != torch.promote_types(dtype,torch.complex64):
+            self.kernel = get_propagation_kernel(
+                                                 self.shape[0],
+                                                 self.shape[1],
+                                                 self.k,
+                                                 self.distance,
+                                                 self.dx,
+                                                 self.wavelength,
+                                                 self.propagation_type,
+                                                 device=device,
+                                                 dtype=dtype
+                                                )
+        return self.kernel
+
+    def forward(self,field):
+        """
+        Definition to propagate a field.
+
+        Parameters
+        ----------
+        field            : torch.cfloat
+                           Complex field (MxN), a numpy or cupy array gives an array of the same library.
+
+        Returns
+        ----------
+        result           : torch.cfloat
+                           Propagated complex field (MxN).
+        """
+        if torch.is_tensor(field) == False:
+            return to_numpy(self.forward(to_torch(field)))
+        kernel = self.get_kernel(field.device,field.dtype)
+        if self.propagation_type == 'Fraunhofer':
+            result = kernel*ifftshift(torch.fft.fft2(fftshift(field.to(kernel.dtype))))
+        else:
+            result = apply_propagation_kernel(field,kernel)
+        return result
+
+    def adjoint(self,field):
+        """
+        Definition to apply the adjoint (conjugate transpose) of the propagation to a field.
+
+        Parameters
+        ----------
+        field            : torch.cfloat
+                           Complex field (MxN), a numpy or cupy array gives an array of the same library.
+
+        Returns
+        ----------
+        result           : torch.cfloat
+                           Complex field (MxN) after the adjoint propagation.
+        """
+        if torch.is_tensor(field) == False:
+            return to_numpy(self.adjoint(to_torch(field)))
+        kernel = torch.conj(self.get_kernel(field.device,field.dtype))
+        if self.propagation_type == 'Fraunhofer':
+            result = ifftshift(torch.fft.ifft2(fftshift(kernel*field)))*field.shape[-1]*field.shape[-2]
+        else:
+            result = apply_propagation_kernel(field,kernel)
+        return result
+
+
+def gerchberg_saxton(field,n_iterations,distance,dx,wavelength,slm_range=6.28,propagation_type='IR Fresnel',tolerance=None,return_errors=False):
+    """
+    Definition to compute a hologram using an iterative method called Gerchberg-Saxton phase retrieval algorithm. For more on the method, see: Gerchberg, Ralph W. "A practical algorithm for the determination of phase from image and diffraction plane pictures." Optik 35 (1972): 237-246. Kernels of both directions are built once, the reconstruction error is recorded at every iteration (see odak.learn.wave.reconstruction_error) and the last forward propagation is returned as the reconstruction.
+
+    Parameters
+    ----------
+    field            : torch.cfloat
+                       Complex field (MxN). A numpy or cupy array gives arrays of the same library, see odak.tools.to_torch for more.
     distance         : float
                        Propagation distance.
     dx               : float
@@ -86,6 +508,10 @@ def gerchberg_saxton(field,n_iterations,distance,dx,wavelength,slm_range=6.28,pr
                        Typically this is equal to two pi. See odak.wave.adjust_phase_only_slm_range() for more.
     propagation_type : str
                        Type of the propagation (IR Fresnel, TR Fresnel, Fraunhofer).
+    tolerance        : float
+                       If provided, iterations stop once the reconstruction error improves less than this value between two iterations.
+    return_errors    : bool
+                       If set True, reconstruction errors of every iteration are also returned.
 
     Result
     ---------
@@ -93,13 +519,318 @@ def gerchberg_saxton(field,n_iterations,distance,dx,wavelength,slm_range=6.28,pr
                        Calculated complex hologram.
     reconstruction   : torch.cfloat
                        Calculated reconstruction using calculated hologram. 
+    errors           : list
+                       Reconstruction error of every iteration, only returned if return_errors is True.
     """
-    k              = wavenumber(wavelength)
+    if torch.is_tensor(field) == False:
+        hologram,reconstruction,errors = gerchberg_saxton(to_torch(field),n_iterations,distance,dx,wavelength,slm_range,propagation_type,tolerance,return_errors=True)
+        hologram       = to_numpy(hologram)
+        reconstruction = to_numpy(reconstruction)
+        if return_errors == True:
+            return hologram,reconstruction,errors
+        return hologram,reconstruction
+    forward        = propagator(field.shape[-2:],dx,wavelength,distance,propagation_type)
+    backward       = propagator(field.shape[-2:],dx,wavelength,-distance,propagation_type)
+    target         = calculate_amplitude(field)
     reconstruction = field
+    errors         = []
     for i in range(n_iterations):
-        hologram       = propagate_beam(reconstruction,k,-distance,dx,wavelength,propagation_type)
-        hologram       = produce_phase_only_slm_pattern(hologram,slm_range)
-        reconstruction = propagate_beam(hologram,k,distance,dx,wavelength,propagation_type)
-        reconstruction = set_amplitude(hologram,field)
-    reconstruction = propagate_beam(hologram,k,distance,dx,wavelength,propagation_type)
-    return hologram,reconstruction
\ No newline at end of file
+        hologram       = backward.forward(reconstruction)
+        hologram       = produce_phase_only_slm_pattern(hologram,slm_range).to(hologram.dtype)
+        propagated     = forward.forward(hologram)
+        errors.append(reconstruction_error(propagated,target))
+        reconstruction = set_amplitude(propagated,target)
+        if type(tolerance) != type(None) and i > 0 and errors[-2]-errors[-1] < tolerance:
+            break
+    reconstruction = propagated
+    if return_errors == True:
+        return hologram,reconstruction,errors
+    return hologram,reconstruction
+
+def gerchberg_saxton_batch(fields,n_iterations,distance,dx,wavelength,slm_range=6.28,propagation_type='IR Fresnel',tolerance=None,return_errors=False):
+    """
+    Definition to compute holograms of many targets at once using Gerchberg-Saxton phase retrieval algorithm, see odak.learn.wave.gerchberg_saxton for more. All targets are propagated together with batched FFTs, using the same kernels. Targets that converge (see tolerance) are frozen while the rest keep iterating, so every target gets the same result as a separate odak.learn.wave.gerchberg_saxton call.
+
+    Parameters
+    ----------
+    fields           : torch.cfloat
+                       Complex fields (BxMxN). A numpy or cupy array gives arrays of the same library, see odak.tools.to_torch for more.
+    n_iterations     : int
+                       Maximum number of iterations.
+    distance         : float
+                       Propagation distance.
+    dx               : float
+                       Size of one single pixel in the field grid (in meters).
+    wavelength       : float
+                       Wavelength of the electric field.
+    slm_range        : float
+                       Typically this is equal to two pi. See odak.wave.adjust_phase_only_slm_range() for more.
+    propagation_type : str
+                       Type of the propagation (IR Fresnel, TR Fresnel, Fraunhofer).
+    tolerance        : float
+                       If provided, a target is frozen once its reconstruction error improves less than this value between two iterations.
+    return_errors    : bool
+                       If set True, reconstruction errors of every target and iteration are also returned.
+
+    Result
+    ---------
+    holograms        : torch.cfloat
+                       Calculated complex holograms (BxMxN).
+    reconstructions  : torch.cfloat
+                       Calculated reconstructions using calculated holograms (BxMxN).
+    errors           : list
+                       Reconstruction errors of every iteration, one list per target, only returned if return_errors is True.
+    """
+    if torch.is_tensor(fields) == False:
+        holograms,reconstructions,errors = gerchberg_saxton_batch(to_torch(fields),n_iterations,distance,dx,wavelength,slm_range,propagation_type,tolerance,return_errors=True)
+        holograms       = to_numpy(holograms)
+        reconstructions = to_numpy(reconstructions)
+        if return_errors == True:
+            return holograms,reconstructions,errors
+        return holograms,reconstructions
+    forward         = propagator(fields.shape[-2:],dx,wavelength,distance,propagation_type)
+    backward        = propagator(fields.shape[-2:],dx,wavelength,-distance,propagation_type)
+    target          = calculate_amplitude(fields)
+    dtype           = torch.promote_types(fields.dtype,torch.complex64)
+    holograms       = torch.zeros(fields.shape,dtype=dtype,device=fields.device)
+    reconstructions = torch.zeros(fields.shape,dtype=dtype,device=fields.device)
+    reconstruction  = fields.to(dtype,copy=True)
+    active          = torch.arange(fields.shape[0],device=fields.device)
+    errors          = [[] for m in range(fields.shape[0])]
+    for i in range(n_iterations):
+        hologram                = backward.forward(reconstruction[active])
+        hologram                = produce_phase_only_slm_pattern(hologram,slm_range).to(hologram.dtype)
+        propagated              = forward.forward(hologram)
+        holograms[active]       = hologram.to(holograms.dtype)
+        reconstructions[active] = propagated.to(reconstructions.dtype)
+        keep                    = []
+        for m,member in enumerate(active):
+            errors[int(member)].append(reconstruction_error(propagated[m],target[member]))
+            converged = type(tolerance) != type(None) and i > 0 and errors[int(member)][-2]-errors[int(member)][-1] < tolerance
+            keep.append(not converged)
+        reconstruction[active]  = set_amplitude(propagated,target[active]).to(reconstruction.dtype)
+        active                  = active[torch.tensor(keep,dtype=torch.bool,device=fields.device)]
+        if active.shape[0] == 0:
+            break
+    if return_errors == True:
+        return holograms,reconstructions,errors
+    return holograms,reconstructions
+
+def gerchberg_saxton_stream(frames,n_iterations,distance,dx,wavelength,slm_range=6.28,propagation_type='IR Fresnel',tolerance=None,warm_start=True,return_errors=False):
+    """
+    Generator to compute holograms of consecutive frames (i.e. a video) using Gerchberg-Saxton phase retrieval algorithm, see odak.learn.wave.gerchberg_saxton for more. Kernels of both directions are built once and kept for the whole stream. With warm start, each frame starts from the phase of the previous frame's reconstruction instead of a flat phase, so temporally coherent content converges in far fewer iterations when a tolerance is given. Only the previous reconstruction is kept between frames, so memory use doesn't grow with the length of the stream.
+
+    Parameters
+    ----------
+    frames           : iterable
+                       Complex fields (MxN), one per frame. Any iterable works, including generators of unknown length. Numpy or cupy arrays give arrays of the same library, see odak.tools.to_torch for more.
+    n_iterations     : int
+                       Maximum number of iterations per frame.
+    distance         : float
+                       Propagation distance.
+    dx               : float
+                       Size of one single pixel in the field grid (in meters).
+    wavelength       : float
+                       Wavelength of the electric field.
+    slm_range        : float
+                       Typically this is equal to two pi. See odak.wave.adjust_phase_only_slm_range() for more.
+    propagation_type : str
+                       Type of the propagation (IR Fresnel, TR Fresnel, Fraunhofer).
+    tolerance        : float
+                       If provided, iterations of a frame stop once the reconstruction error improves less than this value between two iterations.
+    warm_start       : bool
+                       If set True, each frame is initialized with the phase of the previous frame's reconstruction.
+    return_errors    : bool
+                       If set True, reconstruction errors of every iteration of a frame are also yielded.
+
+    Yields
+    ---------
+    hologram         : torch.cfloat
+                       Calculated complex hologram of a frame.
+    reconstruction   : torch.cfloat
+                       Calculated reconstruction using calculated hologram.
+    errors           : list
+                       Reconstruction error of every iteration of a frame, only yielded if return_errors is True.
+    """
+    forward        = None
+    previous       = None
+    for field in frames:
+        convert = torch.is_tensor(field) == False
+        field   = to_torch(field)
+        if type(forward) == type(None) or tuple(forward.shape) != tuple(field.shape[-2:]):
+            forward  = propagator(field.shape[-2:],dx,wavelength,distance,propagation_type)
+            backward = propagator(field.shape[-2:],dx,wavelength,-distance,propagation_type)
+            previous = None
+        target         = calculate_amplitude(field)
+        reconstruction = field
+        if warm_start == True and type(previous) != type(None):
+            reconstruction = set_amplitude(previous,target)
+        errors         = []
+        for i in range(n_iterations):
+            hologram       = backward.forward(reconstruction)
+            hologram       = produce_phase_only_slm_pattern(hologram,slm_range).to(hologram.dtype)
+            propagated     = forward.forward(hologram)
+            errors.append(reconstruction_error(propagated,target))
+            reconstruction = set_amplitude(propagated,target)
+            if type(tolerance) != type(None) and i > 0 and errors[-2]-errors[-1] < tolerance:
+                break
+        previous       = propagated
+        if convert == True:
+            hologram   = to_numpy(hologram)
+            propagated = to_numpy(propagated)
+        if return_errors == True:
+            yield hologram,propagated,errors
+        else:
+            yield hologram,propagated
+
+def gradient_descent(targets,distances,dx,wavelengths,n_iterations=100,learning_rate=0.1,optimizer='Adam',propagation_type='IR Fresnel',scheduler=None,tolerance=None,patience=10,n_threads=None,phase=None,return_errors=False):
+    """
+    Definition to optimize phase-only holograms with gradient descent. The phase of every hologram is a learnable tensor, the reconstructions at all planes and wavelengths are computed with the precomputed kernels of odak.learn.wave.get_propagation_kernel and the loss is the relative root mean square error of the reconstructed amplitudes after a least squares scaling (see odak.learn.wave.reconstruction_error). The Fourier transform of a hologram is shared across all of its planes, and reconstructions go through odak.learn.wave.apply_propagation_kernel so that the backward pass only keeps the kernels.
+
+    Parameters
+    ----------
+    targets          : torch.float
+                       Target amplitudes (...xCxDxMxN) for C wavelengths and D reconstruction planes. Leading dimensions are a batch of independent holograms. Complex targets are converted to amplitudes. A numpy or cupy array gives arrays of the same library, see odak.tools.to_torch for more.
+    distances        : list
+                       Distances of the reconstruction planes (D).
+    dx               : float
+                       Size of one single pixel in the field grid (in meters).
+    wavelengths      : list
+                       Wavelengths (C), each wavelength has its own hologram.
+    n_iterations     : int
+                       Maximum number of iterations.
+    learning_rate    : float
+                       Learning rate of the optimizer.
+    optimizer        : str
+                       Either `Adam` or `LBFGS`.
+    propagation_type : str
+                       Type of the propagation (IR Fresnel, Bandlimited Angular Spectrum, TR Fresnel).
+    scheduler        : function
+                       If provided, it is called with the optimizer and should return a learning rate scheduler (i.e. lambda optimizer: torch.optim.lr_scheduler.StepLR(optimizer,50)), which is stepped at every iteration.
+    tolerance        : float
+                       If provided, iterations stop once the error doesn't improve the best error by more than this value for a number of iterations (see patience).
+    patience         : int
+                       Number of iterations without an improvement larger than the tolerance before stopping.
+    n_threads        : int
+                       If provided, number of CPU threads used by torch during the optimization, see torch.set_num_threads.
+    phase            : torch.float
+                       Initial phases of the holograms (...xCxMxN), uniformly random phases are used if not provided.
+    return_errors    : bool
+                       If set True, errors of every iteration are also returned.
+
+    Returns
+    ----------
+    hologram         : torch.cfloat
+                       Optimized phase-only holograms (...xCxMxN).
+    reconstruction   : torch.cfloat
+                       Reconstructions of the optimized holograms (...xCxDxMxN).
+    errors           : list
+                       Error of every iteration, only returned if return_errors is True.
+    """
+    if torch.is_tensor(targets) == False:
+        if type(phase) != type(None):
+            phase = to_torch(phase)
+        hologram,reconstruction,errors = gradient_descent(to_torch(targets),distances,dx,wavelengths,n_iterations,learning_rate,optimizer,propagation_type,scheduler,tolerance,patience,n_threads,phase,return_errors=True)
+        hologram       = to_numpy(hologram)
+        reconstruction = to_numpy(reconstruction)
+        if return_errors == True:
+            return hologram,reconstruction,errors
+        return hologram,reconstruction
+    if propagation_type == 'Fraunhofer':
+        raise Exception("Gradient descent is only available for convolution based propagation types.")
+    if targets.ndim < 4:
+        raise ValueError("Targets should have at least four dimensions (...xCxDxMxN), one channel per wavelength and one plane per distance, got a shape of {}.".format(tuple(targets.shape)))
+    distances   = torch.as_tensor(distances, dtype=torch.float64).flatten().tolist()
+    wavelengths = torch.as_tensor(wavelengths, dtype=torch.float64).flatten().tolist()
+    device      = targets.device
+    real        = torch.float32 if get_precision() == 'single' else torch.float64
+    targets     = calculate_amplitude(targets).to(real) if torch.is_complex(targets) else targets.to(real)
+    nv, nu      = targets.shape[-2], targets.shape[-1]
+    if targets.shape[-4] != len(wavelengths) or targets.shape[-3] != len(distances):
+        raise ValueError("Targets should have one channel per wavelength and one plane per distance (...xCxDxMxN), got a shape of {} for {} wavelengths and {} distances.".format(tuple(targets.shape),len(wavelengths),len(distances)))
+    H           = torch.stack([
+                               torch.stack([
+                                            get_propagation_kernel(nv,nu,wavenumber(wavelength),distance,dx,wavelength,propagation_type,device=device,dtype=real)
+                                            for distance in distances
+                                           ])
+                               for wavelength in wavelengths
+                              ])
+    if type(phase) == type(None):
+        phase = 2*np.pi*torch.rand(targets.shape[:-3]+(nv,nu), dtype=real, device=device)
+    phase       = phase.detach().clone().to(device=device, dtype=real).requires_grad_()
+    if optimizer == 'Adam':
+        solver = torch.optim.Adam([phase], lr=learning_rate)
+    elif optimizer == 'LBFGS':
+        solver = torch.optim.LBFGS([phase], lr=learning_rate, line_search_fn='strong_wolfe')
+    else:
+        raise Exception("Unknown optimizer selected.")
+    schedule    = None
+    if type(scheduler) != type(None):
+        schedule = scheduler(solver)
+    target_norm = torch.sum(targets**2, dim=(-2,-1))
+
+    def evaluate():
+        hologram       = torch.exp(1j*phase)
+        reconstruction = apply_propagation_kernel(hologram.unsqueeze(-3),H)
+        amplitude      = torch.abs(reconstruction)
+        scale          = torch.sum(amplitude*targets, dim=(-2,-1))/torch.clamp(torch.sum(amplitude**2, dim=(-2,-1)), min=1e-30)
+        difference     = scale.unsqueeze(-1).unsqueeze(-1)*amplitude-targets
+        loss           = torch.sum(difference**2)/torch.clamp(torch.sum(target_norm), min=1e-30)
+        return loss
+
+    def closure():
+        solver.zero_grad()
+        loss = evaluate()
+        loss.backward()
+        return loss
+
+    previous_threads = torch.get_num_threads()
+    if type(n_threads) != type(None):
+        torch.set_num_threads(n_threads)
+    errors      = []
+    best        = None
+    stall       = 0
+    try:
+        for i in range(n_iterations):
+            loss = solver.step(closure)
+            errors.append(float(loss.detach())**0.5)
+            if type(schedule) != type(None):
+                schedule.step()
+            if type(tolerance) != type(None):
+                if type(best) == type(None) or best-errors[-1] > tolerance:
+                    best  = errors[-1]
+                    stall = 0
+                else:
+                    stall += 1
+                    if stall >= patience:
+                        break
+        with torch.no_grad():
+            hologram       = torch.exp(1j*phase.detach())
+            reconstruction = apply_propagation_kernel(hologram.unsqueeze(-3),H)
+    finally:
+        torch.set_num_threads(previous_threads)
+    if return_errors == True:
+        return hologram,reconstruction,errors
+    return hologram,reconstruction
+
+def reconstruction_error(reconstruction,target):
+    """
+    Definition to calculate the error between the amplitude of a reconstruction and a target amplitude, after scaling the reconstruction to the target with least squares, so that the error doesn't depend on the overall brightness.
+
+    Parameters
+    ----------
+    reconstruction   : torch.cfloat
+                       Complex field (...xMxN).
+    target           : torch.float
+                       Target amplitude (...xMxN).
+
+    Returns
+    ----------
+    error            : float
+                       Relative root mean square error, the norm of the difference divided by the norm of the target.
+    """
+    amplitude = calculate_amplitude(reconstruction)
+    target    = calculate_amplitude(target)
+    scale     = torch.sum(amplitude*target)/max(float(torch.sum(amplitude**2)),1e-30)
+    error     = float(torch.linalg.norm(scale*amplitude-target)/max(float(torch.linalg.norm(target)),1e-30))
+    return error
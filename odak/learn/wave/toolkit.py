@@ -1,25 +1,20 @@
 from odak import np
-import torch
-import math
+import torch, torch.fft
 
 ## The following functions are revised from https://github.com/computational-imaging/neural-holography
 def ifftshift(tensor):
-    """ifftshift for tensors of dimensions [height, width]
-    shifts the width and heights
+    """ifftshift for tensors of dimensions [..., height, width]
+    shifts the width and heights in a single copy using torch.fft.ifftshift
     """
-    size = tensor.size()
-    tensor_shifted = roll_torch(tensor, -math.floor(size[0] / 2.0), 0)
-    tensor_shifted = roll_torch(tensor_shifted, -math.floor(size[1] / 2.0), 1)
+    tensor_shifted = torch.fft.ifftshift(tensor, dim=(-2, -1))
     return tensor_shifted
 
 
 def fftshift(tensor):
-    """fftshift for tensors of dimensions [height, width]
-    shifts the width and heights
+    """fftshift for tensors of dimensions [..., height, width]
+    shifts the width and heights in a single copy using torch.fft.fftshift
     """
-    size = tensor.size()
-    tensor_shifted = roll_torch(tensor, math.floor(size[0] / 2.0), 0)
-    tensor_shifted = roll_torch(tensor_shifted, math.floor(size[1] / 2.0), 1)
+    tensor_shifted = torch.fft.fftshift(tensor, dim=(-2, -1))
     return tensor_shifted
 
 def roll_torch(tensor, shift, axis):
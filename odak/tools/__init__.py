@@ -11,3 +11,6 @@ from .sample import *
 from .asset import *
 from .file import *
 from .matrix import *
+from .cache import *
+from .precision import *
+from .interop import *
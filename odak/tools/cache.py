@@ -0,0 +1,175 @@
+from collections import OrderedDict
+
+def size_of(value):
+    """
+    Definition to estimate the memory footprint of a cached value in bytes.
+
+    Parameters
+    ----------
+    value       : ndarray or torch.tensor or list or tuple
+                  Value to be measured, lists and tuples are summed item by item.
+
+    Returns
+    ----------
+    size        : int
+                  Size in bytes.
+    """
+    if isinstance(value,(list,tuple)):
+        size = 0
+        for item in value:
+            size += size_of(item)
+        return size
+    if hasattr(value,'nbytes'):
+        return int(value.nbytes)
+    if hasattr(value,'element_size') and hasattr(value,'nelement'):
+        return int(value.element_size()*value.nelement())
+    return 0
+
+def cache_key(*values):
+    """
+    Definition to build a hashable cache key from values that may be arrays. Arrays of a single value (i.e. `np.array(0.05)`) give the same key as the value itself, larger arrays are keyed by their flattened values.
+
+    Parameters
+    ----------
+    values      : float or ndarray or str
+                  Values to be combined into a key.
+
+    Returns
+    ----------
+    key         : tuple
+                  Hashable key.
+    """
+    key = []
+    for value in values:
+        if hasattr(value,'shape') and hasattr(value,'tolist'):
+            if len(value.shape) == 0:
+                value = value.tolist()
+            else:
+                value = tuple(value.reshape(-1).tolist())
+        key.append(value)
+    return tuple(key)
+
+class kernel_cache():
+    """
+    A class to keep precomputed kernels in memory with a least recently used eviction policy and a memory budget.
+    """
+    def __init__(self,budget=2**29,min_uses=1):
+        """
+        Class to store kernels that are expensive to compute.
+
+        Parameters
+        ----------
+        budget      : int
+                      Memory budget of the cache in bytes. Least recently used entries are evicted once the budget is exceeded.
+        min_uses    : int
+                      Number of times a key should be set before its value is stored. With two, values used only once (i.e. a sweep over distances) don't take memory or evict values that are reused.
+        """
+        self.budget     = budget
+        self.min_uses   = min_uses
+        self.entries    = OrderedDict()
+        self.candidates = OrderedDict()
+        self.size       = 0
+        self.hits       = 0
+        self.misses     = 0
+
+    def get(self,key):
+        """
+        Definition to retrieve an entry from the cache.
+
+        Parameters
+        ----------
+        key         : tuple
+                      Key of the entry.
+
+        Returns
+        ----------
+        value       : ndarray
+                      Cached value, None if the key isn't in the cache.
+        """
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key][0]
+        self.misses += 1
+        return None
+
+    def set(self,key,value):
+        """
+        Definition to add an entry to the cache. Entries larger than the memory budget, or whose key hasn't been set min_uses times yet, are not stored.
+
+        Parameters
+        ----------
+        key         : tuple
+                      Key of the entry.
+        value       : ndarray
+                      Value to be stored.
+
+        Returns
+        ----------
+        value       : ndarray
+                      Same value, useful for chaining.
+        """
+        size = size_of(value)
+        if key in self.entries:
+            self.size -= self.entries.pop(key)[1]
+        elif self.min_uses > 1:
+            uses = self.candidates.pop(key,0)+1
+            if uses < self.min_uses:
+                self.candidates[key] = uses
+                if len(self.candidates) > 4096:
+                    self.candidates.popitem(last=False)
+                return value
+        if size > self.budget:
+            return value
+        self.entries[key] = (value,size)
+        self.size        += size
+        self.evict()
+        return value
+
+    def evict(self):
+        """
+        Definition to drop the least recently used entries until the cache fits into its memory budget.
+        """
+        while self.size > self.budget and len(self.entries) > 0:
+            _,(_,size) = self.entries.popitem(last=False)
+            self.size -= size
+
+    def set_budget(self,budget):
+        """
+        Definition to update the memory budget of the cache.
+
+        Parameters
+        ----------
+        budget      : int
+                      Memory budget in bytes.
+        """
+        self.budget = budget
+        self.evict()
+
+    def clear(self):
+        """
+        Definition to remove every entry from the cache and reset the statistics.
+        """
+        self.entries.clear()
+        self.candidates.clear()
+        self.size   = 0
+        self.hits   = 0
+        self.misses = 0
+
+    def info(self):
+        """
+        Definition to inspect the state of the cache.
+
+        Returns
+        ----------
+        info        : dict
+                      Number of entries, memory in use, memory budget, number of hits and misses.
+        """
+        info = {
+                'entries' : len(self.entries),
+                'size'    : self.size,
+                'budget'  : self.budget,
+                'hits'    : self.hits,
+                'misses'  : self.misses,
+               }
+        return info
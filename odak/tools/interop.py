@@ -0,0 +1,76 @@
+from odak import np
+from numpy import asarray as np_asarray
+
+def is_torch(value):
+    """
+    Definition to check if a value is a torch tensor, without importing torch.
+
+    Parameters
+    ----------
+    value       : any
+                  Value to be checked.
+
+    Returns
+    ----------
+    result      : bool
+                  True if the value is a torch tensor.
+    """
+    result = type(value).__module__.split('.')[0] == 'torch' and hasattr(value,'__dlpack__')
+    return result
+
+def to_numpy(value):
+    """
+    Definition to convert a torch tensor to an array of odak's array library (numpy or cupy) without copying its memory. Tensors on a GPU are shared with cupy through DLPack, tensors on the CPU are shared with numpy through the buffer protocol. A copy is only made when it can't be avoided: a tensor on a device other than odak's (i.e. a GPU tensor while odak runs on numpy) or a lazily conjugated or negated view. Gradients aren't tracked through the result.
+
+    Parameters
+    ----------
+    value       : torch.tensor or ndarray
+                  Tensor to be converted, arrays are returned as they are.
+
+    Returns
+    ----------
+    result      : ndarray
+                  Array sharing the memory of the tensor.
+    """
+    if is_torch(value) == False:
+        return value
+    value = value.detach().resolve_conj().resolve_neg()
+    if value.device.type == 'cpu':
+        result = value.numpy()
+        if np.__name__ == 'cupy':
+            result = np.asarray(result)
+    elif np.__name__ == 'cupy':
+        result = np.from_dlpack(value)
+    else:
+        result = value.cpu().numpy()
+    return result
+
+def to_torch(value,device=None):
+    """
+    Definition to convert an array (numpy or cupy) to a torch tensor without copying its memory. Numpy arrays are shared through the array interface and cupy arrays through DLPack. A copy is only made when it can't be avoided: negative strides, or a device other than the array's.
+
+    Parameters
+    ----------
+    value       : ndarray or torch.tensor
+                  Array to be converted, tensors are only moved to the device if needed.
+    device      : torch.device
+                  Device of the tensor, the device of the array is kept if None.
+
+    Returns
+    ----------
+    result      : torch.tensor
+                  Tensor sharing the memory of the array.
+    """
+    import torch
+    if torch.is_tensor(value):
+        result = value
+    elif type(value).__module__.split('.')[0] == 'cupy':
+        result = torch.from_dlpack(value)
+    else:
+        value = np_asarray(value)
+        if min(value.strides,default=0) < 0:
+            value = value.copy()
+        result = torch.as_tensor(value)
+    if type(device) != type(None) and result.device != torch.device(device):
+        result = result.to(device)
+    return result
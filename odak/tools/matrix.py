@@ -1,15 +1,122 @@
 from odak import np
 import pkg_resources
+import hashlib
 import finufft
+from .precision import real_dtype,complex_dtype,get_precision
+from .cache import kernel_cache
 
-def nufft2(field,fx,fy,size=None,sign=1,eps=10**(-12)):
+nufft_plan_cache = kernel_cache(budget=2**28)
+
+def set_nufft_plan_cache_budget(budget):
+    """
+    Definition to set the memory budget of the NUFFT plan cache. Least recently used plans are evicted once the budget is exceeded. Only the nonuniform points of a plan are counted, the memory that finufft allocates internally isn't.
+
+    Parameters
+    ----------
+    budget      : int
+                  Memory budget in bytes, set it to zero to disable caching.
+    """
+    nufft_plan_cache.set_budget(budget)
+
+def get_nufft_plan_cache_info():
+    """
+    Definition to inspect the NUFFT plan cache.
+
+    Returns
+    ----------
+    info        : dict
+                  Number of entries, memory in use, memory budget, number of hits and misses.
+    """
+    return nufft_plan_cache.info()
+
+def clear_nufft_plan_cache():
+    """
+    Definition to remove every plan from the NUFFT plan cache.
     """
-    A definition to take 2D Non-Uniform Fast Fourier Transform (NUFFT).
+    nufft_plan_cache.clear()
+
+def get_nufft_plan(nufft_type,fx,fy,size,n_trans=1,sign=1,eps=10**(-12),nthreads=None,cache=True,key=None):
+    """
+    Definition to get a finufft plan with its nonuniform points already set. Plans are cached by their geometry (type, points, size, number of transforms, sign, accuracy, threads and precision), so repeated transforms with the same points skip the plan setup and the sorting of the points. Points are identified by hashing all of their values, which costs O(N) on every call including cache hits. Callers that already know the identity of their points (e.g. a propagation with a fixed geometry) can pass their own key to skip hashing.
+
+    Parameters
+    ----------
+    nufft_type  : int
+                  Type of the NUFFT, 1 (nonuniform to uniform) or 2 (uniform to nonuniform).
+    fx          : ndarray
+                  Nonuniform points along x axis, in [-3 pi, 3 pi).
+    fy          : ndarray
+                  Nonuniform points along y axis, in [-3 pi, 3 pi).
+    size        : list
+                  Number of uniform modes along the first and the second axes.
+    n_trans     : int
+                  Number of transforms computed in a single execution (i.e. size of a stack of fields).
+    sign        : float
+                  Sign of the exponential used in NUFFT kernel.
+    eps         : float
+                  Accuracy of NUFFT.
+    nthreads    : int
+                  Number of threads used by finufft, all cores are used if None.
+    cache       : bool
+                  Set it to False to bypass the plan cache.
+    key         : hashable
+                  Key identifying the nonuniform points, the points are hashed if None. It is the caller's responsibility to use the same key only for the same points.
+
+    Returns
+    ----------
+    plan        : finufft.Plan
+                  Plan with its points set, treat it as read only as it may be shared through the cache.
+    """
+    fx  = np.ascontiguousarray(fx.astype(real_dtype(),copy=False).reshape(-1))
+    fy  = np.ascontiguousarray(fy.astype(real_dtype(),copy=False).reshape(-1))
+    if type(key) == type(None):
+        points = (
+                  hashlib.blake2b(fx.tobytes(),digest_size=16).digest(),
+                  hashlib.blake2b(fy.tobytes(),digest_size=16).digest()
+                 )
+    else:
+        points = ('key',key)
+    key = (
+           nufft_type,
+           int(size[0]),
+           int(size[1]),
+           n_trans,
+           sign,
+           eps,
+           nthreads,
+           get_precision(),
+           fx.shape[0],
+           points
+          )
+    if cache == True:
+        entry = nufft_plan_cache.get(key)
+        if type(entry) != type(None):
+            return entry[0]
+    settings = {}
+    if type(nthreads) != type(None):
+        settings['nthreads'] = nthreads
+    plan = finufft.Plan(
+                        nufft_type,
+                        (int(size[0]),int(size[1])),
+                        n_trans=n_trans,
+                        eps=eps,
+                        isign=sign,
+                        dtype=np.dtype(complex_dtype()).name,
+                        **settings
+                       )
+    plan.setpts(fx,fy)
+    if cache == True:
+        nufft_plan_cache.set(key,(plan,fx,fy))
+    return plan
+
+def nufft2(field,fx,fy,size=None,sign=1,eps=10**(-12),nthreads=None,cache=True,key=None):
+    """
+    A definition to take 2D Non-Uniform Fast Fourier Transform (NUFFT). Plans are reused across calls with the same points, see odak.tools.get_nufft_plan for more.
 
     Parameters
     ----------
     field       : ndarray
-                  Input field.
+                  Input field (MxN), a stack of fields (...xMxN) is transformed in a single call.
     fx          : ndarray
                   Frequencies along x axis.
     fy          : ndarray
@@ -19,7 +126,13 @@ def nufft2(field,fx,fy,size=None,sign=1,eps=10**(-12)):
     sign        : float
                   Sign of the exponential used in NUFFT kernel.
     eps         : float
-                  Accuracy of NUFFT.
+                  Accuracy of NUFFT, it is limited to 1e-6 in single precision (see odak.tools.set_precision).
+    nthreads    : int
+                  Number of threads used by finufft, all cores are used if None.
+    cache       : bool
+                  Set it to False to bypass the plan cache.
+    key         : hashable
+                  Key identifying the points fx and fy, skips hashing them on every call. See odak.tools.get_nufft_plan for more.
 
     Returns
     ----------
@@ -27,28 +140,34 @@ def nufft2(field,fx,fy,size=None,sign=1,eps=10**(-12)):
                   Inverse NUFFT of the input field.
     """
     if np.__name__ == 'cupy':
-        fx    = np.asnumpy(fx).astype(np.float64)
-        fy    = np.asnumpy(fy).astype(np.float64)
-        image = np.asnumpy(np.copy(field)).astype(np.complex128)
+        fx    = np.asnumpy(fx)
+        fy    = np.asnumpy(fy)
+        image = np.asnumpy(field).astype(complex_dtype(),copy=False)
     else:
-        image = np.copy(field).astype(np.complex128)
-    result = finufft.nufft2d2(fx.flatten(),fy.flatten(),image,eps=eps,isign=sign)
+        image = field.astype(complex_dtype(),copy=False)
+    if real_dtype() == np.float32:
+        eps = max(eps,10**(-6))
+    image  = np.ascontiguousarray(image.reshape((-1,)+image.shape[-2:]))
+    plan   = get_nufft_plan(2,fx,fy,image.shape[-2:],n_trans=image.shape[0],sign=sign,eps=eps,nthreads=nthreads,cache=cache,key=key)
+    if image.shape[0] == 1:
+        image = image[0]
+    result = plan.execute(image)
     if type(size) == type(None):
         result = result.reshape(field.shape)
     else:
-        result = result.reshape(size)
+        result = result.reshape(tuple(field.shape[:-2])+(size[0],size[1]))
     if np.__name__ == 'cupy':
         result = np.asarray(result)
     return result
 
-def nuifft2(field,fx,fy,size=None,sign=1,eps=10**(-12)):
+def nuifft2(field,fx,fy,size=None,sign=1,eps=10**(-12),nthreads=None,cache=True,key=None):
     """
-    A definition to take 2D Adjoint Non-Uniform Fast Fourier Transform (NUFFT).
+    A definition to take 2D Adjoint Non-Uniform Fast Fourier Transform (NUFFT). Plans are reused across calls with the same points, see odak.tools.get_nufft_plan for more.
 
     Parameters
     ----------
     field       : ndarray
-                  Input field.
+                  Input field (MxN), a stack of fields (...xMxN) is transformed in a single call.
     fx          : ndarray
                   Frequencies along x axis.
     fy          : ndarray
@@ -58,7 +177,13 @@ def nuifft2(field,fx,fy,size=None,sign=1,eps=10**(-12)):
     sign        : float
                   Sign of the exponential used in NUFFT kernel.
     eps         : float
-                  Accuracy of NUFFT.
+                  Accuracy of NUFFT, it is limited to 1e-6 in single precision (see odak.tools.set_precision).
+    nthreads    : int
+                  Number of threads used by finufft, all cores are used if None.
+    cache       : bool
+                  Set it to False to bypass the plan cache.
+    key         : hashable
+                  Key identifying the points fx and fy, skips hashing them on every call. See odak.tools.get_nufft_plan for more.
 
     Returns
     ----------
@@ -66,29 +191,21 @@ def nuifft2(field,fx,fy,size=None,sign=1,eps=10**(-12)):
                   NUFFT of the input field.
     """
     if np.__name__ == 'cupy':
-        fx    = np.asnumpy(fx).astype(np.float64)
-        fy    = np.asnumpy(fy).astype(np.float64)
-        image = np.asnumpy(np.copy(field)).astype(np.complex128)
+        fx    = np.asnumpy(fx)
+        fy    = np.asnumpy(fy)
+        image = np.asnumpy(field).astype(complex_dtype(),copy=False)
     else:
-        image = np.copy(field).astype(np.complex128)
+        image = field.astype(complex_dtype(),copy=False)
+    if real_dtype() == np.float32:
+        eps = max(eps,10**(-6))
     if type(size) == type(None):
-        result = finufft.nufft2d1(
-                                  fx.flatten(),
-                                  fy.flatten(),
-                                  image.flatten(),
-                                  image.shape,
-                                  eps=eps,
-                                  isign=sign
-                                 )
-    else:
-        result = finufft.nufft2d1(
-                                  fx.flatten(),
-                                  fy.flatten(),
-                                  image.flatten(),
-                                  (size[0],size[1]),
-                                  eps=eps,
-                                  isign=sign
-                                 )
+        size = image.shape[-2:]
+    samples = np.ascontiguousarray(image.reshape((-1,image.shape[-2]*image.shape[-1])))
+    plan    = get_nufft_plan(1,fx,fy,size,n_trans=samples.shape[0],sign=sign,eps=eps,nthreads=nthreads,cache=cache,key=key)
+    if samples.shape[0] == 1:
+        samples = samples[0]
+    result  = plan.execute(samples)
+    result  = result.reshape(tuple(field.shape[:-2])+(size[0],size[1]))
     if np.__name__ == 'cupy':
         result = np.asarray(result)
     return result
@@ -126,6 +243,109 @@ def generate_bandlimits(size=[512,512],levels=9):
     masks = np.asarray(masks)
     return masks
 
+def fast_fft_size(n):
+    """
+    Definition to find the smallest size larger than or equal to a given size that factors into 2, 3, 5 and 7, which are the sizes FFT libraries handle fastest.
+
+    Parameters
+    ----------
+    n           : int
+                  Minimum size.
+
+    Returns
+    ----------
+    size        : int
+                  FFT friendly size.
+    """
+    size = max(int(n),1)
+    while True:
+        remainder = size
+        for prime in [2,3,5,7]:
+            while remainder % prime == 0:
+                remainder = remainder // prime
+        if remainder == 1:
+            return size
+        size += 1
+
+def czt(field,m,step,start=0.,axis=-1):
+    """
+    Definition to take a chirp-z transform along an axis using Bluestein's algorithm. It evaluates the discrete Fourier transform at m equally spaced normalized frequencies, X[k] = sum_n x[n] exp(-2 pi j n (start + k step)), at the cost of two FFTs of size larger than the input and output sizes combined. FFTs are taken with the backend selected in odak.wave.set_fft_backend and in the precision selected in odak.tools.set_precision. For more see Rabiner, Lawrence, Ronald W. Schafer, and Charles Rader. "The chirp z-transform algorithm." IEEE transactions on audio and electroacoustics 17.2 (1969): 86-92.
+
+    Parameters
+    ----------
+    field       : ndarray
+                  Input array.
+    m           : int
+                  Number of output samples.
+    step        : float
+                  Spacing of the output frequencies in cycles per sample (1/N for a DFT of size N).
+    start       : float
+                  First output frequency in cycles per sample.
+    axis        : int
+                  Axis to be transformed.
+
+    Returns
+    ----------
+    result      : ndarray
+                  Transformed array, with m samples along the given axis.
+    """
+    # Imported here, as odak.wave depends on odak.tools.
+    from odak.wave.backend import fft,ifft
+    field  = np.moveaxis(np.asarray(field),axis,-1)
+    n      = field.shape[-1]
+    size   = fast_fft_size(n+m-1)
+    n_ids  = np.arange(n,dtype=np.float64)
+    m_ids  = np.arange(m,dtype=np.float64)
+    d_ids  = np.concatenate((np.arange(m,dtype=np.float64),np.zeros(size-n-m+1),np.arange(-n+1,0,dtype=np.float64)))
+    # Phases are reduced modulo 2 pi before the exponentials to keep large indices accurate.
+    pre    = np.exp(-1j*np.pi*np.mod(2*start*n_ids+step*n_ids**2,2))
+    post   = np.exp(-1j*np.pi*np.mod(step*m_ids**2,2))
+    chirp  = np.exp(1j*np.pi*np.mod(step*d_ids**2,2))
+    chirp[m:size-n+1] = 0
+    pre    = pre.astype(complex_dtype())
+    post   = post.astype(complex_dtype())
+    chirp  = chirp.astype(complex_dtype())
+    padded = np.zeros(field.shape[:-1]+(size,),dtype=complex_dtype())
+    padded[...,:n] = field*pre
+    result = ifft(fft(padded,axis=-1)*fft(chirp),axis=-1)[...,:m]*post
+    result = np.moveaxis(result.astype(complex_dtype(),copy=False),-1,axis)
+    return result
+
+def scaled_fourier_transform(field,dx,x0,df,f0,m,axis=-1,sign=-1):
+    """
+    Definition to evaluate a Fourier transform with arbitrary input and output sampling along an axis, F[k] = sum_n x[n] exp(sign 2 pi j (x0 + n dx) (f0 + k df)), using odak.tools.czt. The output pitch, offset and number of samples are independent from the input.
+
+    Parameters
+    ----------
+    field       : ndarray
+                  Input array.
+    dx          : float
+                  Sample spacing of the input.
+    x0          : float
+                  Coordinate of the first input sample.
+    df          : float
+                  Sample spacing of the output.
+    f0          : float
+                  Coordinate of the first output sample.
+    m           : int
+                  Number of output samples.
+    axis        : int
+                  Axis to be transformed.
+    sign        : int
+                  Sign of the exponent, -1 for a forward and 1 for an inverse transform.
+
+    Returns
+    ----------
+    result      : ndarray
+                  Transformed array, with m samples along the given axis.
+    """
+    result = czt(field,m,-sign*dx*df,start=-sign*dx*f0,axis=axis)
+    f      = f0+np.arange(m)*df
+    shape  = [1]*len(result.shape)
+    shape[axis] = m
+    result = result*np.exp(sign*2j*np.pi*x0*f).astype(complex_dtype()).reshape(shape)
+    return result
+
 def zero_pad(field,size=None,method='center'):
     """
     Definition to zero pad a MxN array to 2Mx2N array.
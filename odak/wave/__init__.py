@@ -5,10 +5,11 @@ Provides necessary definitions for merging geometric optics with wave theory and
 
 """
 # To get sub-modules.
+from .backend import *
 from .vector import *
 from .classical import *
 from .lens import *
-from odak.tools import save_image
+from odak.tools import save_image,real_dtype
 
 def rayleigh_resolution(diameter,focal=None,wavelength=0.0005):
     """
@@ -216,6 +217,6 @@ def produce_phase_only_slm_pattern(hologram,slm_range,filename=None):
                    cmin=0,
                    cmax=255
                   )
-    hologram_phase                            = hologram_phase.astype(np.float)
+    hologram_phase                            = hologram_phase.astype(real_dtype())
     hologram_phase                           *= slm_range/255.
     return np.cos(hologram_phase)+1j*np.sin(hologram_phase)
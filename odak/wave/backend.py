@@ -0,0 +1,214 @@
+from odak import np
+from contextlib import contextmanager
+import os
+try:
+    import scipy.fft as scipy_fft
+except:
+    scipy_fft = None
+try:
+    import pyfftw
+    import pyfftw.interfaces.numpy_fft as pyfftw_fft
+    pyfftw.interfaces.cache.enable()
+    pyfftw.interfaces.cache.set_keepalive_time(60.)
+except:
+    pyfftw_fft = None
+
+fft_settings = {
+                'backend' : 'numpy',
+                'workers' : 1,
+               }
+
+def set_fft_backend(backend='numpy',workers=1):
+    """
+    Definition to select the FFT backend used by the beam propagation definitions in odak.wave. When odak runs on a GPU (cupy), cupy's FFT is used regardless of this setting.
+
+    Parameters
+    ----------
+    backend     : str
+                  Backend to be used: numpy, scipy (multithreaded, see workers) or pyfftw (multithreaded with cached FFTW plans).
+    workers     : int
+                  Number of threads used by scipy and pyfftw backends. Set it to -1 to use all CPU cores.
+    """
+    if backend == 'scipy' and type(scipy_fft) == type(None):
+        raise Exception("scipy.fft isn't available, install scipy to use this backend.")
+    elif backend == 'pyfftw' and type(pyfftw_fft) == type(None):
+        raise Exception("pyfftw isn't available, install pyfftw to use this backend.")
+    elif backend not in ['numpy','scipy','pyfftw']:
+        raise Exception("Unknown FFT backend selected.")
+    if workers == -1 or type(workers) == type(None):
+        workers = os.cpu_count()
+    fft_settings['backend'] = backend
+    fft_settings['workers'] = workers
+
+def get_fft_backend():
+    """
+    Definition to get the current FFT backend settings.
+
+    Returns
+    ----------
+    settings    : dict
+                  Backend name and number of workers.
+    """
+    settings = dict(fft_settings)
+    return settings
+
+@contextmanager
+def fft_backend(backend='numpy',workers=1):
+    """
+    Context manager to use an FFT backend temporarily, see odak.wave.set_fft_backend for more.
+
+    Parameters
+    ----------
+    backend     : str
+                  Backend to be used: numpy, scipy or pyfftw.
+    workers     : int
+                  Number of threads used by scipy and pyfftw backends.
+    """
+    previous = get_fft_backend()
+    set_fft_backend(backend,workers)
+    try:
+        yield
+    finally:
+        set_fft_backend(previous['backend'],previous['workers'])
+
+def fft2(field,axes=(-2,-1)):
+    """
+    Definition to take 2D Fast Fourier Transform (FFT) using the selected backend. Single precision inputs are transformed by scipy.fft under the numpy backend, as numpy always returns double precision.
+
+    Parameters
+    ----------
+    field       : ndarray
+                  Input field (MxN) or fields (...xMxN).
+    axes        : tuple
+                  Axes to be transformed.
+
+    Returns
+    ----------
+    result      : ndarray
+                  Fourier transform of the input field.
+    """
+    if np.__name__ == 'cupy':
+        result = np.fft.fft2(field,axes=axes)
+    elif fft_settings['backend'] == 'numpy' and (field.dtype not in [np.float32,np.complex64] or type(scipy_fft) == type(None)):
+        result = np.fft.fft2(field,axes=axes)
+    elif fft_settings['backend'] in ['numpy','scipy']:
+        result = scipy_fft.fft2(field,axes=axes,workers=fft_settings['workers'])
+    elif fft_settings['backend'] == 'pyfftw':
+        result = pyfftw_fft.fft2(field,axes=axes,threads=fft_settings['workers'])
+    return result
+
+def ifft2(field,axes=(-2,-1)):
+    """
+    Definition to take 2D Inverse Fast Fourier Transform (IFFT) using the selected backend. Single precision inputs are transformed by scipy.fft under the numpy backend, as numpy always returns double precision.
+
+    Parameters
+    ----------
+    field       : ndarray
+                  Input field (MxN) or fields (...xMxN).
+    axes        : tuple
+                  Axes to be transformed.
+
+    Returns
+    ----------
+    result      : ndarray
+                  Inverse Fourier transform of the input field.
+    """
+    if np.__name__ == 'cupy':
+        result = np.fft.ifft2(field,axes=axes)
+    elif fft_settings['backend'] == 'numpy' and (field.dtype not in [np.float32,np.complex64] or type(scipy_fft) == type(None)):
+        result = np.fft.ifft2(field,axes=axes)
+    elif fft_settings['backend'] in ['numpy','scipy']:
+        result = scipy_fft.ifft2(field,axes=axes,workers=fft_settings['workers'])
+    elif fft_settings['backend'] == 'pyfftw':
+        result = pyfftw_fft.ifft2(field,axes=axes,threads=fft_settings['workers'])
+    return result
+
+def fft(field,axis=-1):
+    """
+    Definition to take 1D Fast Fourier Transform (FFT) along an axis using the selected backend, see odak.wave.fft2 for more.
+
+    Parameters
+    ----------
+    field       : ndarray
+                  Input array.
+    axis        : int
+                  Axis to be transformed.
+
+    Returns
+    ----------
+    result      : ndarray
+                  Fourier transform of the input array.
+    """
+    if np.__name__ == 'cupy':
+        result = np.fft.fft(field,axis=axis)
+    elif fft_settings['backend'] == 'numpy' and (field.dtype not in [np.float32,np.complex64] or type(scipy_fft) == type(None)):
+        result = np.fft.fft(field,axis=axis)
+    elif fft_settings['backend'] in ['numpy','scipy']:
+        result = scipy_fft.fft(field,axis=axis,workers=fft_settings['workers'])
+    elif fft_settings['backend'] == 'pyfftw':
+        result = pyfftw_fft.fft(field,axis=axis,threads=fft_settings['workers'])
+    return result
+
+def ifft(field,axis=-1):
+    """
+    Definition to take 1D Inverse Fast Fourier Transform (IFFT) along an axis using the selected backend, see odak.wave.ifft2 for more.
+
+    Parameters
+    ----------
+    field       : ndarray
+                  Input array.
+    axis        : int
+                  Axis to be transformed.
+
+    Returns
+    ----------
+    result      : ndarray
+                  Inverse Fourier transform of the input array.
+    """
+    if np.__name__ == 'cupy':
+        result = np.fft.ifft(field,axis=axis)
+    elif fft_settings['backend'] == 'numpy' and (field.dtype not in [np.float32,np.complex64] or type(scipy_fft) == type(None)):
+        result = np.fft.ifft(field,axis=axis)
+    elif fft_settings['backend'] in ['numpy','scipy']:
+        result = scipy_fft.ifft(field,axis=axis,workers=fft_settings['workers'])
+    elif fft_settings['backend'] == 'pyfftw':
+        result = pyfftw_fft.ifft(field,axis=axis,threads=fft_settings['workers'])
+    return result
+
+def fftshift(field,axes=(-2,-1)):
+    """
+    Definition to shift the zero frequency component to the center of a field.
+
+    Parameters
+    ----------
+    field       : ndarray
+                  Input field (MxN) or fields (...xMxN).
+    axes        : tuple
+                  Axes to be shifted.
+
+    Returns
+    ----------
+    result      : ndarray
+                  Shifted field.
+    """
+    result = np.fft.fftshift(field,axes=axes)
+    return result
+
+def ifftshift(field,axes=(-2,-1)):
+    """
+    Definition to undo odak.wave.fftshift.
+
+    Parameters
+    ----------
+    field       : ndarray
+                  Input field (MxN) or fields (...xMxN).
+    axes        : tuple
+                  Axes to be shifted.
+
+    Returns
+    ----------
+    result      : ndarray
+                  Shifted field.
+    """
+    result = np.fft.ifftshift(field,axes=axes)
+    return result
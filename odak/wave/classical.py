@@ -1,17 +1,20 @@
 from odak import np
-from odak.tools import nufft2,nuifft2
+from numpy.lib.format import open_memmap
+from numpy import savez as np_save,load as np_load,isnan as np_isnan
+from odak.tools import nufft2,nuifft2,kernel_cache,cache_key,fast_fft_size,scaled_fourier_transform,real_dtype,complex_dtype,get_precision,is_torch,to_numpy,to_torch
 from .lens import quadratic_phase_function
+from .backend import fft2,ifft2,fftshift,ifftshift
 from .__init__ import wavenumber,produce_phase_only_slm_pattern, calculate_amplitude,set_amplitude
 from tqdm import tqdm
 
-def propagate_beam(field,k,distance,dx,wavelength,propagation_type='IR Fresnel'):
+def propagate_beam(field,k,distance,dx,wavelength,propagation_type='IR Fresnel',padding=None,return_report=False):
     """
-    Definitions for Fresnel Impulse Respone (IR), Angular Spectrum (AS), Bandlimited Angular Spectrum (BAS), Fresnel Transfer Function (TF), Fraunhofer diffraction in accordence with "Computational Fourier Optics" by David Vuelz. For more on Bandlimited Fresnel impulse response also known as Bandlimited Angular Spectrum method see "Band-limited Angular Spectrum Method for Numerical Simulation of Free-Space Propagation in Far and Near Fields".
+    Definitions for Fresnel Impulse Respone (IR), Angular Spectrum (AS), Bandlimited Angular Spectrum (BAS), Fresnel Transfer Function (TF), Fraunhofer diffraction in accordence with "Computational Fourier Optics" by David Vuelz. For more on Bandlimited Fresnel impulse response also known as Bandlimited Angular Spectrum method see "Band-limited Angular Spectrum Method for Numerical Simulation of Free-Space Propagation in Far and Near Fields". For propagating many fields with the same geometry, see odak.wave.propagator.
 
     Parameters
     ----------
     field            : np.complex
-                       Complex field (MxN).
+                       Complex field (MxN) or a stack of complex fields (...xMxN), stacks are propagated with a single batched FFT. A torch tensor is propagated without copying its memory and the result is returned as a torch tensor, see odak.tools.to_numpy for more.
     k                : odak.wave.wavenumber
                        Wave number of a wave, see odak.wave.wavenumber for more.
     distance         : float
@@ -21,14 +24,33 @@ def propagate_beam(field,k,distance,dx,wavelength,propagation_type='IR Fresnel')
     wavelength       : float
                        Wavelength of the electric field.
     propagation_type : str
-                       Type of the propagation (IR Fresnel, Angular Spectrum, Bandlimited Angular Spectrum, TR Fresnel, Fraunhofer).
+                       Type of the propagation (IR Fresnel, Angular Spectrum, Bandlimited Angular Spectrum, TR Fresnel, Fraunhofer). Set it to `auto` to use the cheapest type that is valid for the geometry, see odak.wave.select_propagation_type for more. With `auto`, padding only applies if a convolution based type is selected.
+    padding          : str
+                       Zero padding to turn the circular convolution into a linear one, see odak.wave.propagate_beam_padded for more. It can be None, `2x` or `fast`.
+    return_report    : bool
+                       If set True, the report of the propagation type selection is also returned.
 
     Returns
     =======
     result           : np.complex
-                       Final complex field (MxN).
+                       Final complex field (MxN) or fields (...xMxN).
+    report           : dict
+                       Report of the selection with `auto`, see odak.wave.select_propagation_type for more. It is None for other propagation types and it is only returned if return_report is True.
     """
-    if propagation_type == 'Rayleigh-Sommerfeld':
+    if is_torch(field) == True:
+        result,report = propagate_beam(to_numpy(field),k,distance,dx,wavelength,propagation_type,padding,return_report=True)
+        result        = to_torch(result,device=field.device)
+        if return_report == True:
+            return result,report
+        return result
+    report = None
+    if propagation_type == 'auto':
+        propagation_type,report = select_propagation_type(field.shape[-2:],k,distance,dx,wavelength)
+        if propagation_type not in kernel_propagation_types:
+            padding = None
+    if type(padding) != type(None):
+        result = propagate_beam_padded(field,k,distance,dx,wavelength,propagation_type,padding)
+    elif propagation_type == 'Rayleigh-Sommerfeld':
         result = rayleigh_sommerfeld(field,k,distance,dx,wavelength)
     elif propagation_type == 'Angular Spectrum':
         result = angular_spectrum(field,k,distance,dx,wavelength)
@@ -48,8 +70,740 @@ def propagate_beam(field,k,distance,dx,wavelength,propagation_type='IR Fresnel')
         result = fraunhofer_inverse(field,k,distance,dx,wavelength)
     else:
         raise Exception("Unknown propagation type selected.")
+    if return_report == True:
+        return result,report
+    return result
+
+def select_propagation_type(shape,k,distance,dx,wavelength,accuracy=10**(-3)):
+    """
+    Definition to select the cheapest propagation type that is valid for a given geometry, this is what `auto` propagation type uses in odak.wave.propagate_beam. The decision is based on the critical distance, zc = N dx^2/lambda, below which the transfer function (TR Fresnel) is sampled properly and above which the impulse responses (IR Fresnel, Rayleigh-Sommerfeld) are, and on the phase error of the Fresnel approximation, k rho^4/(8 z^3) at the half diagonal of the field. Fraunhofer isn't considered as it changes the pixel pitch of the output, see odak.wave.fraunhofer_equal_size_adjust.
+
+    Parameters
+    ----------
+    shape            : list
+                       Shape of the field (MxN).
+    k                : odak.wave.wavenumber
+                       Wave number of a wave, see odak.wave.wavenumber for more.
+    distance         : float
+                       Propagation distance.
+    dx               : float
+                       Size of one single pixel in the field grid (in meters).
+    wavelength       : float
+                       Wavelength of the electric field.
+    accuracy         : float
+                       Largest phase error (in radians) allowed for the Fresnel approximation.
+
+    Returns
+    =======
+    propagation_type : str
+                       Selected propagation type.
+    report           : dict
+                       Fresnel number, critical distance, phase error of the Fresnel approximation and every candidate with its validity, reason and estimated cost in floating point operations (cached kernels assumed).
+    """
+    nv,nu       = int(shape[-2]),int(shape[-1])
+    n           = nv*nu
+    z           = np.abs(distance)
+    rho2        = ((nu*dx)**2+(nv*dx)**2)/4.
+    zc          = max(nv,nu)*dx**2/wavelength
+    fresnel     = rho2/(wavelength*z)
+    phase_error = k*rho2**2/(8*z**3)
+    paraxial    = phase_error <= accuracy
+    rs_limit    = 2*zc*max(1-(wavelength/2/dx)**2,0.)**0.5
+    fft_cost    = lambda m: 5.*m*np.log2(m)
+    nufft_cost  = lambda m: fft_cost(4*m)+8*13**2*m
+    candidates  = [
+                   {
+                    'propagation_type' : 'TR Fresnel',
+                    'valid'            : z <= zc,
+                    'reason'           : 'Transfer function is sampled properly below the critical distance.',
+                    'cost'             : 2*fft_cost(n)+6*n
+                   },
+                   {
+                    'propagation_type' : 'IR Fresnel',
+                    'valid'            : z >= zc and paraxial,
+                    'reason'           : 'Impulse response is sampled properly above the critical distance, if the Fresnel approximation holds.',
+                    'cost'             : 2*fft_cost(n)+6*n
+                   },
+                   {
+                    'propagation_type' : 'Bandlimited Angular Spectrum',
+                    'valid'            : paraxial,
+                    'reason'           : 'Band limit avoids aliasing at any distance, if the Fresnel approximation holds.',
+                    'cost'             : 2*fft_cost(n)+6*n
+                   },
+                   {
+                    'propagation_type' : 'Rayleigh-Sommerfeld',
+                    'valid'            : z >= rs_limit,
+                    'reason'           : 'Non-paraxial impulse response on a zero padded grid is sampled properly above twice the critical distance.',
+                    'cost'             : 2*fft_cost(4*n)+6*4*n
+                   },
+                   {
+                    'propagation_type' : 'Bandextended Angular Spectrum',
+                    'valid'            : True,
+                    'reason'           : 'Non-paraxial and valid in a wide range of distances, using NUFFTs.',
+                    'cost'             : 2*nufft_cost(n)+6*n
+                   },
+                   {
+                    'propagation_type' : 'Adaptive Sampling Angular Spectrum',
+                    'valid'            : True,
+                    'reason'           : 'Non-paraxial and valid in a wide range of distances, using NUFFTs on a twice larger grid.',
+                    'cost'             : nufft_cost(4*n)+nufft_cost(n)+6*4*n
+                   }
+                  ]
+    propagation_type = None
+    cost             = None
+    for candidate in candidates:
+        candidate['valid'] = bool(candidate['valid'])
+        if candidate['valid'] == True and (type(cost) == type(None) or candidate['cost'] < cost):
+            propagation_type = candidate['propagation_type']
+            cost             = candidate['cost']
+    report = {
+              'propagation_type'    : propagation_type,
+              'cost'                : cost,
+              'fresnel_number'      : float(fresnel),
+              'critical_distance'   : float(zc),
+              'fresnel_phase_error' : float(phase_error),
+              'candidates'          : candidates
+             }
+    return propagation_type,report
+
+propagation_kernel_cache = kernel_cache(min_uses=2)
+workspace_cache          = kernel_cache(budget=2**28)
+kernel_propagation_types = [
+                            'IR Fresnel',
+                            'Angular Spectrum',
+                            'Bandlimited Angular Spectrum',
+                            'TR Fresnel',
+                            'Fraunhofer'
+                           ]
+
+def set_kernel_cache_budget(budget):
+    """
+    Definition to set the memory budget of the propagation kernel cache, 512 MB by default. Least recently used kernels are evicted once the budget is exceeded.
+
+    Parameters
+    ----------
+    budget           : int
+                       Memory budget in bytes, set it to zero to disable caching.
+    """
+    propagation_kernel_cache.set_budget(budget)
+
+def get_kernel_cache_info():
+    """
+    Definition to inspect the propagation kernel cache.
+
+    Returns
+    =======
+    info             : dict
+                       Number of entries, memory in use, memory budget, number of hits and misses.
+    """
+    return propagation_kernel_cache.info()
+
+def clear_kernel_cache():
+    """
+    Definition to remove every kernel from the propagation kernel cache.
+    """
+    propagation_kernel_cache.clear()
+
+def get_propagation_kernel(nv,nu,k,distance,dx,wavelength,propagation_type='IR Fresnel',cache=True):
+    """
+    Definition to get the frequency domain kernel of a convolution based beam propagation. Kernels are kept in a least recently used cache, see odak.wave.set_kernel_cache_budget for more. A kernel takes 16 bytes per pixel in double precision (16 MB for 1024x1024), so a kernel is only stored the second time its geometry is requested: repeated propagations with the same geometry reuse it, while sweeps that use every geometry once (i.e. over distances) don't fill the cache.
+
+    Parameters
+    ----------
+    nv               : int
+                       Number of pixels along the first axis of the field.
+    nu               : int
+                       Number of pixels along the second axis of the field.
+    k                : odak.wave.wavenumber
+                       Wave number of a wave, see odak.wave.wavenumber for more.
+    distance         : float
+                       Propagation distance.
+    dx               : float
+                       Size of one single pixel in the field grid (in meters).
+    wavelength       : float
+                       Wavelength of the electric field.
+    propagation_type : str
+                       Type of the propagation (IR Fresnel, Angular Spectrum, Bandlimited Angular Spectrum, TR Fresnel, Fraunhofer).
+    cache            : bool
+                       Set it to False to bypass the kernel cache.
+
+    Returns
+    =======
+    H                : np.complex
+                       Kernel (MxN), treat it as read only as it may be shared through the cache.
+    """
+    key = cache_key(propagation_type,nv,nu,k,distance,dx,wavelength,get_precision())
+    if cache == True:
+        H = propagation_kernel_cache.get(key)
+        if type(H) != type(None):
+            return H
+    H = build_propagation_kernel(nv,nu,k,distance,dx,wavelength,propagation_type)
+    if cache == True:
+        propagation_kernel_cache.set(key,H)
+    return H
+
+def build_propagation_kernel(nv,nu,k,distance,dx,wavelength,propagation_type='IR Fresnel'):
+    """
+    Definition to build the frequency domain kernel of a convolution based beam propagation from scratch. The kernel is arranged such that it can be used with odak.wave.apply_propagation_kernel. For Fraunhofer, the kernel is the chirp multiplied with the Fourier transform of the field.
+
+    Parameters
+    ----------
+    nv               : int
+                       Number of pixels along the first axis of the field.
+    nu               : int
+                       Number of pixels along the second axis of the field.
+    k                : odak.wave.wavenumber
+                       Wave number of a wave, see odak.wave.wavenumber for more. An array of wave numbers (Cx1x1) builds a stack of kernels.
+    distance         : float
+                       Propagation distance.
+    dx               : float
+                       Size of one single pixel in the field grid (in meters).
+    wavelength       : float
+                       Wavelength of the electric field. An array of wavelengths (Cx1x1) builds a stack of kernels.
+    propagation_type : str
+                       Type of the propagation (IR Fresnel, Angular Spectrum, Bandlimited Angular Spectrum, TR Fresnel, Fraunhofer).
+
+    Returns
+    =======
+    H                : np.complex
+                       Kernel (MxN) or kernels (CxMxN).
+    """
+    real     = real_dtype()
+    k_r      = np.asarray(k,dtype=real)
+    constant = np.exp(1j*np.asarray(k)*distance)
+    if propagation_type == 'Fraunhofer':
+        l2    = np.asarray(wavelength,dtype=real)*distance/dx
+        fx    = np.linspace(-1./2.,1./2.,nu,dtype=real).reshape((1,-1))
+        fy    = np.linspace(-1./2.,1./2.,nv,dtype=real).reshape((-1,1))
+        c     = (constant/(1j*np.asarray(wavelength)*distance)*dx**2).astype(complex_dtype())
+        H     = c*np.exp(1j*(k_r/(2*distance))*(fy*l2)**2)*np.exp(1j*(k_r/(2*distance))*(fx*l2)**2)
+        return H
+    if propagation_type == 'TR Fresnel':
+        fx    = np.linspace(-1./2./dx,1./2./dx,nu,dtype=real).reshape((1,-1))
+        fy    = np.linspace(-1./2./dx,1./2./dx,nv,dtype=real).reshape((-1,1))
+        a     = (fx*np.asarray(wavelength,dtype=real))**2+(fy*np.asarray(wavelength,dtype=real))**2
+        H     = constant.astype(complex_dtype())*np.exp(-1j*(k_r*distance)*a/(1+(1-a)**0.5))
+        H     = ifftshift(H)
+        return H
+    if propagation_type == 'Bandlimited Angular Spectrum':
+        # The mask below keeps the phase of samples with vanishing amplitude,
+        # so this kernel is always evaluated in double precision.
+        real = np.float64
+    x      = np.linspace(-nu/2*dx,nu/2*dx,nu,dtype=real).reshape((1,-1))
+    y      = np.linspace(-nv/2*dx,nv/2*dx,nv,dtype=real).reshape((-1,1))
+    if propagation_type in ['IR Fresnel','Angular Spectrum']:
+        # The chirp is separable, so its Fourier transform is the outer product of two 1D transforms.
+        c  = (constant/(1j*np.asarray(wavelength)*distance)).astype(complex_dtype())
+        hx = np.exp(1j*(k_r/2/distance)*x**2)
+        hy = np.exp(1j*(k_r/2/distance)*y**2)
+        H  = c*fft2(fftshift(hy,axes=(-2,)),axes=(-2,))*fft2(fftshift(hx,axes=(-1,)),axes=(-1,))*dx**2
+        H  = H.astype(complex_dtype(),copy=False)
+        return H
+    elif propagation_type == 'Bandlimited Angular Spectrum':
+        h = 1./(1j*wavelength*distance)*np.exp(1j*k*(distance+(x**2+y**2)/2/distance))
+    else:
+        raise Exception("Propagation type doesn't have a convolution kernel.")
+    H     = fft2(fftshift(h))*dx**2
+    flimx = np.ceil(1/(((2*distance*(1./(nu)))**2+1)**0.5*wavelength))
+    flimy = np.ceil(1/(((2*distance*(1./(nv)))**2+1)**0.5*wavelength))
+    mask  = (np.abs(x)<flimx) & (np.abs(y)<flimy)
+    H     = set_amplitude(H,mask)
+    H     = H.astype(complex_dtype(),copy=False)
+    return H
+
+def apply_propagation_kernel(field,H):
+    """
+    Definition to propagate a field using a frequency domain kernel, see odak.wave.get_propagation_kernel for more.
+
+    Parameters
+    ----------
+    field            : np.complex
+                       Complex field (MxN).
+    H                : np.complex
+                       Kernel (MxN).
+
+    Returns
+    =======
+    result           : np.complex
+                       Final complex field (MxN).
+    """
+    U1     = fft2(fftshift(field.astype(H.dtype,copy=False)))
+    U2     = H*U1
+    result = ifftshift(ifft2(U2))
+    return result
+
+def propagate_beam_padded(field,k,distance,dx,wavelength,propagation_type='IR Fresnel',padding='2x'):
+    """
+    Definition to propagate a field with a linear convolution instead of a circular one. The field is copied into the center of a zero padded workspace that is reused across calls with the same size, propagated at the padded size and the center of the result is returned as a view, without further copies.
+
+    Parameters
+    ----------
+    field            : np.complex
+                       Complex field (MxN) or fields (...xMxN).
+    k                : odak.wave.wavenumber
+                       Wave number of a wave, see odak.wave.wavenumber for more.
+    distance         : float
+                       Propagation distance.
+    dx               : float
+                       Size of one single pixel in the field grid (in meters).
+    wavelength       : float
+                       Wavelength of the electric field.
+    propagation_type : str
+                       Type of the propagation (IR Fresnel, Angular Spectrum, Bandlimited Angular Spectrum, TR Fresnel).
+    padding          : str
+                       Either `2x` to pad to 2Mx2N, or `fast` to pad to the smallest FFT friendly size that avoids wrap around (at least 2M-1x2N-1).
+
+    Returns
+    =======
+    result           : np.complex
+                       Final complex field (MxN) or fields (...xMxN).
+    """
+    if propagation_type not in ['IR Fresnel','Angular Spectrum','Bandlimited Angular Spectrum','TR Fresnel']:
+        raise Exception("Padding is only available for convolution based propagation types.")
+    nv,nu = field.shape[-2:]
+    if padding == '2x':
+        pv,pu = 2*nv,2*nu
+    elif padding == 'fast':
+        pv,pu = fast_fft_size(2*nv-1),fast_fft_size(2*nu-1)
+    else:
+        raise Exception("Unknown padding selected.")
+    cv        = (pv-nv)//2
+    cu        = (pu-nu)//2
+    workspace = get_workspace(field.shape[:-2]+(pv,pu),complex_dtype(),region=(nv,nu))
+    workspace[...,cv:cv+nv,cu:cu+nu] = field
+    H         = get_propagation_kernel(pv,pu,k,distance,dx,wavelength,propagation_type)
+    result    = apply_propagation_kernel(workspace,H)[...,cv:cv+nv,cu:cu+nu]
+    return result
+
+def get_workspace(shape,dtype,region=None):
+    """
+    Definition to get a zero padded workspace of a given shape. Workspaces are reused across calls with the same shape, data type and region, only the given region should be written by the caller so that the rest stays zero. Fields of different sizes padded to the same shape (i.e. 39x39 and 40x40 both padded to 80x80) get different workspaces, so a larger field never leaves samples in the padding of a smaller one.
+
+    Parameters
+    ----------
+    shape            : tuple
+                       Shape of the workspace.
+    dtype            : np.dtype
+                       Data type of the workspace.
+    region           : tuple
+                       Shape of the region written by the caller (MxN).
+
+    Returns
+    =======
+    workspace        : np.complex
+                       Workspace.
+    """
+    key       = (tuple(shape),np.dtype(dtype).str,region)
+    workspace = workspace_cache.get(key)
+    if type(workspace) == type(None):
+        workspace = workspace_cache.set(key,np.zeros(shape,dtype=dtype))
+    return workspace
+
+def propagate_beam_tiled(field,k,distance,dx,wavelength,propagation_type='IR Fresnel',output=None,memory_budget=2**28,guard=None):
+    """
+    Definition to propagate fields that don't fit in memory with an overlap-save scheme. The field is read in tiles from an array, a `numpy.memmap` or a `.npy` file on disk. Each tile is extended with a guard band on every side, propagated with a circular convolution and only the center of the result, which isn't affected by wrap around, is written to the output. The impulse response is cut off at the guard band, so the result doesn't depend on the tiling (i.e. memory budget). Pixels outside the field are treated as zeros, so the result is a linear convolution, see odak.wave.linear_propagation_kernel for the kernels.
+
+    Parameters
+    ----------
+    field            : np.complex
+                       Complex field (MxN) or fields (...xMxN), a `numpy.memmap` or a path to a `.npy` file.
+    k                : odak.wave.wavenumber
+                       Wave number of a wave, see odak.wave.wavenumber for more.
+    distance         : float
+                       Propagation distance.
+    dx               : float
+                       Size of one single pixel in the field grid (in meters).
+    wavelength       : float
+                       Wavelength of the electric field.
+    propagation_type : str
+                       Type of the propagation (IR Fresnel, Angular Spectrum, Bandlimited Angular Spectrum, TR Fresnel, Rayleigh-Sommerfeld).
+    output           : np.complex
+                       Array or `numpy.memmap` (...xMxN) to write the result into, or a path to a `.npy` file to be created. If not provided, the result is kept in memory.
+    memory_budget    : int
+                       Approximate upper bound for the memory used by the tiles, kernel and FFT temporaries (in bytes).
+    guard            : int
+                       Width of the guard band (in pixels). If not provided, it is set to the lateral spread of the highest spatial frequency of the grid, wavelength times distance over two dx squared, beyond which a sampled impulse response aliases. The impulse response is cut off beyond it, a guard band at least as wide as the field gives the untruncated linear convolution.
+
+    Returns
+    =======
+    output           : np.complex
+                       Final complex field (MxN) or fields (...xMxN).
+    """
+    if type(field) == str:
+        field = open_memmap(field,mode='r')
+    nv,nu = field.shape[-2:]
+    if type(guard) == type(None):
+        guard = int(np.ceil(wavelength*np.abs(distance)/(2*dx**2)))
+    dtype      = complex_dtype()
+    n_fields   = int(np.prod(field.shape[:-2]))
+    block_size = int((memory_budget/(np.dtype(dtype).itemsize*(4*n_fields+1)))**0.5)
+    if block_size <= 2*guard:
+        raise Exception("Memory budget is too small for the guard band.")
+    tv         = min(block_size,nv+2*guard)-2*guard
+    tu         = min(block_size,nu+2*guard)-2*guard
+    pv         = 2*fast_fft_size((tv+2*guard+1)//2)
+    pu         = 2*fast_fft_size((tu+2*guard+1)//2)
+    if type(output) == type(None):
+        output = np.zeros(field.shape,dtype=dtype)
+    elif type(output) == str:
+        output = open_memmap(output,mode='w+',dtype=dtype,shape=field.shape)
+    H     = linear_propagation_kernel(pv,pu,k,distance,dx,wavelength,propagation_type,guard=guard)
+    block = np.zeros(field.shape[:-2]+(pv,pu),dtype=dtype)
+    for r0 in range(0,nv,tv):
+        for c0 in range(0,nu,tu):
+            r1,c1       = min(r0+tv,nv),min(c0+tu,nu)
+            a0,a1       = max(r0-guard,0),min(r1+guard,nv)
+            b0,b1       = max(c0-guard,0),min(c1+guard,nu)
+            block[...]  = 0
+            block[...,a0-r0+guard:a1-r0+guard,b0-c0+guard:b1-c0+guard] = np.asarray(field[...,a0:a1,b0:b1])
+            result      = ifft2(fft2(block)*H)[...,guard:guard+r1-r0,guard:guard+c1-c0]
+            if np.__name__ == 'cupy' and not isinstance(output,np.ndarray):
+                result = np.asnumpy(result)
+            output[...,r0:r1,c0:c1] = result
+    if hasattr(output,'flush'):
+        output.flush()
+    return output
+
+def linear_propagation_kernel(nv,nu,k,distance,dx,wavelength,propagation_type='IR Fresnel',guard=None):
+    """
+    Definition to build the frequency domain kernel of a linear convolution based beam propagation in FFT order. Unlike odak.wave.build_propagation_kernel, impulse responses are sampled exactly at multiples of dx and transfer functions exactly at multiples of 1/(N dx), so that kernels of different sizes agree with each other and tiles can be stitched together. With a guard, the impulse response is cut off beyond guard pixels along each axis, which makes kernels of any size larger than twice the guard describe the very same convolution.
+
+    Parameters
+    ----------
+    nv               : int
+                       Number of pixels along the first axis of the padded field.
+    nu               : int
+                       Number of pixels along the second axis of the padded field.
+    k                : odak.wave.wavenumber
+                       Wave number of a wave, see odak.wave.wavenumber for more.
+    distance         : float
+                       Propagation distance.
+    dx               : float
+                       Size of one single pixel in the field grid (in meters).
+    wavelength       : float
+                       Wavelength of the electric field.
+    propagation_type : str
+                       Type of the propagation (IR Fresnel, Angular Spectrum, Bandlimited Angular Spectrum, TR Fresnel, Rayleigh-Sommerfeld).
+    guard            : int
+                       Half width of the support of the impulse response (in pixels), the impulse response isn't cut off if None.
+
+    Returns
+    =======
+    H                : np.complex
+                       Kernel (MxN), to be used as ifft2(fft2(field)*H).
+    """
+    if type(guard) != type(None):
+        if 2*guard+1 > nv or 2*guard+1 > nu:
+            raise Exception("Kernel is too small for the guard band.")
+        # The impulse response is taken from a grid that only depends on the guard,
+        # so that transfer function based types give the same response for every size.
+        m       = 2*fast_fft_size(2*guard+1)
+        h_ref   = ifft2(linear_propagation_kernel(m,m,k,distance,dx,wavelength,propagation_type))
+        indices = np.concatenate((np.arange(0,guard+1),np.arange(-guard,0)))
+        h       = np.zeros((nv,nu),dtype=h_ref.dtype)
+        h[(indices%nv).reshape((-1,1)),(indices%nu).reshape((1,-1))] = h_ref[(indices%m).reshape((-1,1)),(indices%m).reshape((1,-1))]
+        H       = fft2(h).astype(complex_dtype(),copy=False)
+        return H
+    if propagation_type in ['IR Fresnel','Rayleigh-Sommerfeld']:
+        x = (np.fft.fftfreq(nu)*nu*dx).astype(real_dtype()).reshape((1,-1))
+        y = (np.fft.fftfreq(nv)*nv*dx).astype(real_dtype()).reshape((-1,1))
+        if propagation_type == 'IR Fresnel':
+            c = (np.exp(1j*k*distance)/(1j*wavelength*distance)).astype(complex_dtype())
+            h = c*np.exp(1j*(np.asarray(k,dtype=real_dtype())/2/distance)*y**2)*np.exp(1j*(np.asarray(k,dtype=real_dtype())/2/distance)*x**2)
+        else:
+            h = rayleigh_sommerfeld_impulse_response(x,y,k,distance)
+        H = (fft2(h)*dx**2).astype(complex_dtype(),copy=False)
+        return H
+    fx = np.fft.fftfreq(nu,d=dx).reshape((1,-1))
+    fy = np.fft.fftfreq(nv,d=dx).reshape((-1,1))
+    a  = (wavelength*fx)**2+(wavelength*fy)**2
+    if propagation_type in ['TR Fresnel','Angular Spectrum','Bandlimited Angular Spectrum']:
+        H = np.exp(1j*k*distance)*np.exp(-1j*k*distance*a/(1+np.sqrt(np.abs(1-a))))*(a<1)
+        if propagation_type == 'Bandlimited Angular Spectrum':
+            flimx = 1/(((2*distance/(nu*dx))**2+1)**0.5*wavelength)
+            flimy = 1/(((2*distance/(nv*dx))**2+1)**0.5*wavelength)
+            H     = H*(np.abs(fx)<flimx)*(np.abs(fy)<flimy)
+    else:
+        raise Exception("Unknown propagation type selected.")
+    H = H.astype(complex_dtype())
+    return H
+
+class propagator():
+    """
+    A class to propagate fields with a fixed geometry, the kernel is computed once and reused at every call.
+    """
+    def __init__(self,shape,dx,wavelength,distance,propagation_type='IR Fresnel'):
+        """
+        Class to represent a beam propagation operator between two planes.
+
+        Parameters
+        ----------
+        shape            : list
+                           Shape of the fields to be propagated (MxN).
+        dx               : float
+                           Size of one single pixel in the field grid (in meters).
+        wavelength       : float
+                           Wavelength of the electric field.
+        distance         : float
+                           Propagation distance.
+        propagation_type : str
+                           Type of the propagation, see odak.wave.propagate_beam for the options. Adjoint is only available for IR Fresnel, Angular Spectrum, Bandlimited Angular Spectrum, TR Fresnel and Fraunhofer. With `auto`, the selected type and the reasoning behind it are kept in the report attribute.
+        """
+        self.shape            = shape
+        self.dx               = dx
+        self.wavelength       = wavelength
+        self.distance         = distance
+        self.k                = wavenumber(wavelength)
+        self.kernel           = None
+        self.report           = None
+        if propagation_type == 'auto':
+            propagation_type,self.report = select_propagation_type(shape,self.k,distance,dx,wavelength)
+        self.propagation_type = propagation_type
+        if propagation_type in kernel_propagation_types:
+            self.kernel = get_propagation_kernel(
+                                                 shape[0],
+                                                 shape[1],
+                                                 self.k,
+                                                 distance,
+                                                 dx,
+                                                 wavelength,
+                                                 propagation_type
+                                                )
+
+    def forward(self,field):
+        """
+        Definition to propagate a field.
+
+        Parameters
+        ----------
+        field            : np.complex
+                           Complex field (MxN), a torch tensor gives a torch tensor.
+
+        Returns
+        ----------
+        result           : np.complex
+                           Propagated complex field (MxN).
+        """
+        if is_torch(field) == True:
+            return to_torch(self.forward(to_numpy(field)),device=field.device)
+        if self.propagation_type == 'Fraunhofer':
+            result = self.kernel*ifftshift(fft2(fftshift(field.astype(self.kernel.dtype,copy=False))))
+        elif type(self.kernel) != type(None):
+            result = apply_propagation_kernel(field,self.kernel)
+        else:
+            result = propagate_beam(field,self.k,self.distance,self.dx,self.wavelength,self.propagation_type)
+        return result
+
+    def adjoint(self,field):
+        """
+        Definition to apply the adjoint (conjugate transpose) of the propagation to a field.
+
+        Parameters
+        ----------
+        field            : np.complex
+                           Complex field (MxN), a torch tensor gives a torch tensor.
+
+        Returns
+        ----------
+        result           : np.complex
+                           Complex field (MxN) after the adjoint propagation.
+        """
+        if is_torch(field) == True:
+            return to_torch(self.adjoint(to_numpy(field)),device=field.device)
+        if type(self.kernel) == type(None):
+            raise Exception("Adjoint isn't available for {} propagation.".format(self.propagation_type))
+        kernel = np.conj(self.kernel)
+        if self.propagation_type == 'Fraunhofer':
+            result = ifftshift(ifft2(fftshift(kernel*field.astype(kernel.dtype,copy=False))))*field.shape[-1]*field.shape[-2]
+        else:
+            result = apply_propagation_kernel(field,kernel)
+        return result
+
+def propagate_focal_stack(field,k,distances,dx,wavelength,propagation_type='IR Fresnel',chunk_size=8):
+    """
+    Definition to propagate a field to many distances. The Fourier transform of the input field is taken only once and the kernels of the distances are applied in chunks, see odak.wave.focal_stack_generator for more.
+
+    Parameters
+    ----------
+    field            : np.complex
+                       Complex field (MxN) or a stack of complex fields (...xMxN). A torch tensor gives a torch tensor, see odak.tools.to_numpy for more.
+    k                : odak.wave.wavenumber
+                       Wave number of a wave, see odak.wave.wavenumber for more.
+    distances        : list
+                       Propagation distances.
+    dx               : float
+                       Size of one single pixel in the field grid (in meters).
+    wavelength       : float
+                       Wavelength of the electric field.
+    propagation_type : str
+                       Type of the propagation, see odak.wave.propagate_beam for the options.
+    chunk_size       : int
+                       Number of distances propagated together, it bounds the memory used by the kernels.
+
+    Returns
+    =======
+    volume           : np.complex
+                       Complex fields at each distance (Dx...xMxN).
+    """
+    if is_torch(field) == True:
+        volume = propagate_focal_stack(to_numpy(field),k,distances,dx,wavelength,propagation_type,chunk_size)
+        volume = to_torch(volume,device=field.device)
+        return volume
+    volume = None
+    for i,result in enumerate(focal_stack_generator(field,k,distances,dx,wavelength,propagation_type,chunk_size)):
+        if type(volume) == type(None):
+            volume = np.zeros((len(distances),)+result.shape,dtype=result.dtype)
+        volume[i] = result
+    return volume
+
+def focal_stack_generator(field,k,distances,dx,wavelength,propagation_type='IR Fresnel',chunk_size=8):
+    """
+    Definition to propagate a field to many distances, yielding the propagated fields one by one. The Fourier transform of the input field is taken only once. Kernels are built for a chunk of distances at a time and applied with a single batched inverse FFT per chunk. Propagation types without a frequency domain kernel fall back to odak.wave.propagate_beam for each distance.
+
+    Parameters
+    ----------
+    field            : np.complex
+                       Complex field (MxN) or a stack of complex fields (...xMxN). A torch tensor gives torch tensors, see odak.tools.to_numpy for more.
+    k                : odak.wave.wavenumber
+                       Wave number of a wave, see odak.wave.wavenumber for more.
+    distances        : list
+                       Propagation distances.
+    dx               : float
+                       Size of one single pixel in the field grid (in meters).
+    wavelength       : float
+                       Wavelength of the electric field.
+    propagation_type : str
+                       Type of the propagation, see odak.wave.propagate_beam for the options.
+    chunk_size       : int
+                       Number of distances propagated together, it bounds the memory used by the kernels.
+
+    Yields
+    =======
+    result           : np.complex
+                       Complex field (MxN) or fields (...xMxN) at the next distance.
+    """
+    if is_torch(field) == True:
+        for result in focal_stack_generator(to_numpy(field),k,distances,dx,wavelength,propagation_type,chunk_size):
+            yield to_torch(result,device=field.device)
+        return
+    if propagation_type not in kernel_propagation_types:
+        for distance in distances:
+            yield propagate_beam(field,k,distance,dx,wavelength,propagation_type)
+        return
+    nv,nu = field.shape[-2:]
+    U1    = fft2(fftshift(field.astype(complex_dtype(),copy=False)))
+    if propagation_type == 'Fraunhofer':
+        U1 = ifftshift(U1)
+    for start in range(0,len(distances),chunk_size):
+        chunk = distances[start:start+chunk_size]
+        H     = np.zeros((len(chunk),)+(1,)*(len(field.shape)-2)+(nv,nu),dtype=complex_dtype())
+        for i,distance in enumerate(chunk):
+            H[i] = get_propagation_kernel(nv,nu,k,distance,dx,wavelength,propagation_type,cache=False)
+        if propagation_type == 'Fraunhofer':
+            results = H*U1
+        else:
+            results = ifftshift(ifft2(H*U1))
+        for result in results:
+            yield result
+
+def propagate_beam_spectral(field,distance,dx,wavelengths,propagation_type='IR Fresnel'):
+    """
+    Definition to propagate fields of many wavelengths (i.e. RGB) in a single call. Kernels of all wavelengths are built in one vectorized pass and all channels are propagated with a single batched FFT.
+
+    Parameters
+    ----------
+    field            : np.complex
+                       Complex fields (...xCxMxN), one channel per wavelength. A single field (MxN) is propagated at every wavelength. A torch tensor gives a torch tensor, see odak.tools.to_numpy for more.
+    distance         : float
+                       Propagation distance.
+    dx               : float
+                       Size of one single pixel in the field grid (in meters).
+    wavelengths      : list
+                       Wavelengths of the channels (C).
+    propagation_type : str
+                       Type of the propagation, see odak.wave.propagate_beam for the options. Note that the pixel pitch of a Fraunhofer result depends on the wavelength.
+
+    Returns
+    =======
+    result           : np.complex
+                       Final complex fields (...xCxMxN).
+    """
+    if is_torch(field) == True:
+        result = propagate_beam_spectral(to_numpy(field),distance,dx,wavelengths,propagation_type)
+        result = to_torch(result,device=field.device)
+        return result
+    nv,nu       = field.shape[-2:]
+    wavelengths = np.asarray(wavelengths,dtype=np.float64).reshape((-1,1,1))
+    k           = wavenumber(wavelengths)
+    if propagation_type not in kernel_propagation_types:
+        fields = np.broadcast_to(field,field.shape[:-3]+(wavelengths.shape[0],nv,nu))
+        result = np.zeros(fields.shape,dtype=complex_dtype())
+        for i in range(wavelengths.shape[0]):
+            result[...,i,:,:] = propagate_beam(
+                                               fields[...,i,:,:],
+                                               float(k[i,0,0]),
+                                               distance,
+                                               dx,
+                                               float(wavelengths[i,0,0]),
+                                               propagation_type
+                                              )
+        return result
+    key = cache_key('spectral',propagation_type,nv,nu,distance,dx,wavelengths,get_precision())
+    H   = propagation_kernel_cache.get(key)
+    if type(H) == type(None):
+        H = propagation_kernel_cache.set(key,build_propagation_kernel(nv,nu,k,distance,dx,wavelengths,propagation_type))
+    if propagation_type == 'Fraunhofer':
+        result = H*ifftshift(fft2(fftshift(field.astype(H.dtype,copy=False))))
+    else:
+        result = apply_propagation_kernel(field,H)
     return result
 
+def broadband_intensity(field,distance,dx,wavelengths,weights=None,propagation_type='IR Fresnel',chunk_size=8):
+    """
+    Definition to calculate the intensity of a broadband (incoherent) source after propagation, by integrating the weighted intensities of spectral samples.
+
+    Parameters
+    ----------
+    field            : np.complex
+                       Complex field (MxN) shared by all wavelengths, or complex fields (...xCxMxN) one per wavelength. A torch tensor gives a torch tensor, see odak.tools.to_numpy for more.
+    distance         : float
+                       Propagation distance.
+    dx               : float
+                       Size of one single pixel in the field grid (in meters).
+    wavelengths      : list
+                       Wavelengths of the spectral samples (C).
+    weights          : list
+                       Weights of the spectral samples (C), i.e. spectral power distribution times the sample spacing. Equal weights are used if not provided.
+    propagation_type : str
+                       Type of the propagation, see odak.wave.propagate_beam for the options.
+    chunk_size       : int
+                       Number of wavelengths propagated together, it bounds the memory used.
+
+    Returns
+    =======
+    intensity        : np.float
+                       Integrated intensity (...xMxN).
+    """
+    if is_torch(field) == True:
+        intensity = broadband_intensity(to_numpy(field),distance,dx,wavelengths,weights,propagation_type,chunk_size)
+        intensity = to_torch(intensity,device=field.device)
+        return intensity
+    wavelengths = np.asarray(wavelengths,dtype=np.float64).flatten()
+    if type(weights) == type(None):
+        weights = np.ones(wavelengths.shape[0])/wavelengths.shape[0]
+    weights     = np.asarray(weights,dtype=np.float64).flatten()
+    per_channel = len(field.shape) > 2 and field.shape[-3] == wavelengths.shape[0]
+    intensity   = 0.
+    for start in range(0,wavelengths.shape[0],chunk_size):
+        end = start+chunk_size
+        if per_channel == True:
+            chunk = field[...,start:end,:,:]
+        else:
+            chunk = field
+        result     = propagate_beam_spectral(chunk,distance,dx,wavelengths[start:end],propagation_type)
+        intensity += np.sum(weights[start:end].reshape((-1,1,1))*np.abs(result)**2,axis=-3)
+    return intensity
+
 def adaptive_sampling_angular_spectrum(field,k,distance,dx,wavelength):
     """
     A definition to calculate adaptive sampling angular spectrum based beam propagation. For more Zhang, Wenhui, Hao Zhang, and Guofan Jin. "Adaptive-sampling angular spectrum method with full utilization of space-bandwidth product." Optics Letters 45.16 (2020): 4416-4419.
@@ -74,14 +828,8 @@ def adaptive_sampling_angular_spectrum(field,k,distance,dx,wavelength):
     """
     iflag = -1
     eps   = 10**(-12)
-    nv,nu = field.shape
-    l     = nu*dx
-    x     = np.linspace(-l/2,l/2,nu)
-    y     = np.linspace(-l/2,l/2,nv)
-    X,Y   = np.meshgrid(x,y)
+    nv,nu = field.shape[-2:]
     fx    = np.linspace(-1./2./dx,1./2./dx,nu)
-    fy    = np.linspace(-1./2./dx,1./2./dx,nv)
-    FX,FY = np.meshgrid(fx,fy)
     forig = 1./2./dx
     fc2   = 1./2*(nu/wavelength/np.abs(distance))**0.5
     ss    = np.abs(fc2)/forig
@@ -99,10 +847,11 @@ def adaptive_sampling_angular_spectrum(field,k,distance,dx,wavelength):
     Hn        = np.exp(1j*k*distance*(1-(FXN*wavelength)**2-(FYN*wavelength)**2)**0.5)
     FX        = FXN/np.amax(FXN)*np.pi
     FY        = FYN/np.amax(FYN)*np.pi
-    t_2       = nufft2(field,FX*ss,FY*ss,size=[nnv2,nnu2],sign=iflag,eps=eps)
+    key       = cache_key('Adaptive Sampling Angular Spectrum',nv,nu,dx,wavelength,distance)
+    t_2       = nufft2(field,FX*ss,FY*ss,size=[nnv2,nnu2],sign=iflag,eps=eps,key=key)
     FX        = FX/np.amax(FX)*np.pi
     FY        = FY/np.amax(FY)*np.pi
-    result    = nuifft2(Hn*t_2,FX*ss,FY*ss,size=[nv,nu],sign=-iflag,eps=eps)
+    result    = nuifft2(Hn*t_2,FX*ss,FY*ss,size=[nv,nu],sign=-iflag,eps=eps,key=key)
     return result
 
 def fraunhofer_equal_size_adjust(field,distance,dx,wavelength):
@@ -125,15 +874,15 @@ def fraunhofer_equal_size_adjust(field,distance,dx,wavelength):
     new_field        : np.complex
                        Final complex field (MxN).
     """
-    nv,nu     = field.shape
+    nv,nu     = field.shape[-2:]
     l1        = nu*dx
     l2        = wavelength*distance/dx
     m         = l1/l2
     px        = int(m*nu)
     py        = int(m*nv)
-    nx        = int(field.shape[0]/2-px/2)
-    ny        = int(field.shape[1]/2-py/2)
-    new_field = np.copy(field[nx:nx+px,ny:ny+py])
+    nx        = int(nv/2-px/2)
+    ny        = int(nu/2-py/2)
+    new_field = np.copy(field[...,nx:nx+px,ny:ny+py])
     return new_field
 
 def fraunhofer(field,k,distance,dx,wavelength):
@@ -158,16 +907,9 @@ def fraunhofer(field,k,distance,dx,wavelength):
     result           : np.complex
                        Final complex field (MxN).
     """
-    nv,nu  = field.shape
-    l      = nu*dx
-    l2     = wavelength*distance/dx
-    dx2    = wavelength*distance/l
-    fx     = np.linspace(-l2/2.,l2/2.,nu)
-    fy     = np.linspace(-l2/2.,l2/2.,nv)
-    FX,FY  = np.meshgrid(fx,fy)
-    FZ     = FX**2+FY**2
-    c      = np.exp(1j*k*distance)/(1j*wavelength*distance)*np.exp(1j*k/(2*distance)*FZ)
-    result = c*np.fft.ifftshift(np.fft.fft2(np.fft.fftshift(field)))*dx**2
+    nv,nu  = field.shape[-2:]
+    c      = get_propagation_kernel(nv,nu,k,distance,dx,wavelength,'Fraunhofer')
+    result = c*ifftshift(fft2(fftshift(field.astype(c.dtype,copy=False))))
     return result
 
 def fraunhofer_inverse(field,k,distance,dx,wavelength):
@@ -193,26 +935,19 @@ def fraunhofer_inverse(field,k,distance,dx,wavelength):
                        Final complex field (MxN).
     """
     distance = np.abs(distance)
-    nv,nu    = field.shape
-    l        = nu*dx
-    l2       = wavelength*distance/dx
-    dx2      = wavelength*distance/l
-    fx       = np.linspace(-l2/2.,l2/2.,nu)
-    fy       = np.linspace(-l2/2.,l2/2.,nv)
-    FX,FY    = np.meshgrid(fx,fy)
-    FZ       = FX**2+FY**2
-    c        = np.exp(1j*k*distance)/(1j*wavelength*distance)*np.exp(1j*k/(2*distance)*FZ)
-    result   = np.fft.fftshift(np.fft.ifft2(np.fft.ifftshift(field/dx**2/c )))
+    nv,nu    = field.shape[-2:]
+    c        = get_propagation_kernel(nv,nu,k,distance,dx,wavelength,'Fraunhofer')
+    result   = fftshift(ifft2(ifftshift(field/c)))
     return result
 
-def band_limited_angular_spectrum(field,k,distance,dx,wavelength):
+def scaled_fresnel(field,k,distance,dx,wavelength,output_dx,output_shape=None,output_offset=[0.,0.]):
     """
-    A definition to calculate bandlimited angular spectrum based beam propagation. For more Matsushima, Kyoji, and Tomoyoshi Shimobaba. "Band-limited angular spectrum method for numerical simulation of free-space propagation in far and near fields." Optics express 17.22 (2009): 19662-19673.
+    Definition to calculate single step Fresnel propagation with an arbitrary output pixel pitch, window size and window offset. Unlike odak.wave.fraunhofer, the output pitch isn't tied to wavelength times distance over the field size, and only the requested window is calculated using chirp-z transforms (see odak.tools.czt). Field coordinates are centered at pixel (M/2,N/2) as in odak.wave.fraunhofer.
 
     Parameters
     ----------
     field            : np.complex
-                       Complex field (MxN).
+                       Complex field (MxN) or fields (...xMxN).
     k                : odak.wave.wavenumber
                        Wave number of a wave, see odak.wave.wavenumber for more.
     distance         : float
@@ -221,32 +956,93 @@ def band_limited_angular_spectrum(field,k,distance,dx,wavelength):
                        Size of one single pixel in the field grid (in meters).
     wavelength       : float
                        Wavelength of the electric field.
+    output_dx        : float
+                       Size of one single pixel in the output grid (in meters).
+    output_shape     : list
+                       Number of pixels of the output window along the first and the second axes. If not provided, the shape of the field is used.
+    output_offset    : list
+                       Lateral offset of the center of the output window along the first and the second axes (in meters).
 
     Returns
     =======
     result           : np.complex
-                       Final complex field (MxN).
+                       Final complex field (...xKxL).
     """
-    nv,nu  = field.shape
-    x      = np.linspace(-nu/2*dx,nu/2*dx,nu)
-    y      = np.linspace(-nv/2*dx,nv/2*dx,nv)
-    X,Y    = np.meshgrid(x,y)
-    Z      = X**2+Y**2
-    h      = 1./(1j*wavelength*distance)*np.exp(1j*k*(distance+Z/2/distance))
-    h      = np.fft.fft2(np.fft.fftshift(h))*dx**2
-    flimx  = np.ceil(1/(((2*distance*(1./(nu)))**2+1)**0.5*wavelength))
-    flimy  = np.ceil(1/(((2*distance*(1./(nv)))**2+1)**0.5*wavelength))
-    mask   = np.zeros((nu,nv),dtype=np.complex64)
-    mask   = (np.abs(X)<flimx) & (np.abs(Y)<flimy)
-    mask   = set_amplitude(h,mask)
-    U1     = np.fft.fft2(np.fft.fftshift(field))
-    U2     = mask*U1
-    result = np.fft.ifftshift(np.fft.ifft2(U2))
+    nv,nu = field.shape[-2:]
+    if type(output_shape) == type(None):
+        output_shape = [nv,nu]
+    mv,mu = output_shape
+    x     = (np.arange(nu)-nu//2)*dx
+    y     = (np.arange(nv)-nv//2)*dx
+    x2    = output_offset[1]+(np.arange(mu)-mu//2)*output_dx
+    y2    = output_offset[0]+(np.arange(mv)-mv//2)*output_dx
+    lz    = wavelength*distance
+    U1    = field*np.exp(1j*k/2/distance*y**2).reshape((-1,1))*np.exp(1j*k/2/distance*x**2).reshape((1,-1))
+    U2    = scaled_fourier_transform(U1,dx,x[0],output_dx/lz,x2[0]/lz,mu,axis=-1,sign=-1)
+    U2    = scaled_fourier_transform(U2,dx,y[0],output_dx/lz,y2[0]/lz,mv,axis=-2,sign=-1)
+    c     = np.exp(1j*k*distance)/(1j*lz)*dx**2
+    h2    = np.exp(1j*k/2/distance*y2**2).reshape((-1,1))*np.exp(1j*k/2/distance*x2**2).reshape((1,-1))
+    result = (c*h2*U2).astype(complex_dtype())
     return result
 
-def angular_spectrum(field,k,distance,dx,wavelength):
+def scaled_angular_spectrum(field,k,distance,dx,wavelength,output_dx,output_shape=None,output_offset=[0.,0.]):
     """
-    A definition to calculate angular spectrum based beam propagation.
+    Definition to calculate angular spectrum based beam propagation with an arbitrary output pixel pitch, window size and window offset, also known as shifted and scaled angular spectrum. The angular spectrum of the field is sampled finely enough that the periodic replicas of the propagated field don't reach the output window, and is evaluated at the output samples with chirp-z transforms (see odak.tools.czt). Pixels outside the field are treated as zeros. Field coordinates are centered at pixel (M/2,N/2).
+
+    Parameters
+    ----------
+    field            : np.complex
+                       Complex field (MxN) or fields (...xMxN).
+    k                : odak.wave.wavenumber
+                       Wave number of a wave, see odak.wave.wavenumber for more.
+    distance         : float
+                       Propagation distance.
+    dx               : float
+                       Size of one single pixel in the field grid (in meters).
+    wavelength       : float
+                       Wavelength of the electric field.
+    output_dx        : float
+                       Size of one single pixel in the output grid (in meters).
+    output_shape     : list
+                       Number of pixels of the output window along the first and the second axes. If not provided, the shape of the field is used.
+    output_offset    : list
+                       Lateral offset of the center of the output window along the first and the second axes (in meters).
+
+    Returns
+    =======
+    result           : np.complex
+                       Final complex field (...xKxL).
+    """
+    nv,nu = field.shape[-2:]
+    if type(output_shape) == type(None):
+        output_shape = [nv,nu]
+    mv,mu = output_shape
+    x     = (np.arange(nu)-nu//2)*dx
+    y     = (np.arange(nv)-nv//2)*dx
+    x2    = output_offset[1]+(np.arange(mu)-mu//2)*output_dx
+    y2    = output_offset[0]+(np.arange(mv)-mv//2)*output_dx
+    # Spread of the highest spatial frequency of the field over the distance.
+    spread = np.abs(distance)*np.tan(np.arcsin(min(wavelength/2/dx,1.)))
+    period_x = nu*dx+mu*output_dx+2*np.abs(output_offset[1])+2*spread
+    period_y = nv*dx+mv*output_dx+2*np.abs(output_offset[0])+2*spread
+    pu    = int(np.ceil(period_x/dx))
+    pv    = int(np.ceil(period_y/dx))
+    dfx   = 1./(pu*dx)
+    dfy   = 1./(pv*dx)
+    fx    = -1./2./dx+np.arange(pu)*dfx
+    fy    = -1./2./dx+np.arange(pv)*dfy
+    A     = scaled_fourier_transform(field,dx,x[0],dfx,fx[0],pu,axis=-1,sign=-1)
+    A     = scaled_fourier_transform(A,dx,y[0],dfy,fy[0],pv,axis=-2,sign=-1)
+    a     = (wavelength*fx.reshape((1,-1)))**2+(wavelength*fy.reshape((-1,1)))**2
+    H     = np.exp(1j*k*distance)*np.exp(-1j*k*distance*a/(1+np.sqrt(np.abs(1-a))))*(a<1)
+    U2    = scaled_fourier_transform(A*H,dfx,fx[0],output_dx,x2[0],mu,axis=-1,sign=1)
+    U2    = scaled_fourier_transform(U2,dfy,fy[0],output_dx,y2[0],mv,axis=-2,sign=1)
+    result = (U2*dx**2*dfx*dfy).astype(complex_dtype())
+    return result
+
+def band_limited_angular_spectrum(field,k,distance,dx,wavelength):
+    """
+    A definition to calculate bandlimited angular spectrum based beam propagation. For more Matsushima, Kyoji, and Tomoyoshi Shimobaba. "Band-limited angular spectrum method for numerical simulation of free-space propagation in far and near fields." Optics express 17.22 (2009): 19662-19673.
 
     Parameters
     ----------
@@ -266,16 +1062,9 @@ def angular_spectrum(field,k,distance,dx,wavelength):
     result           : np.complex
                        Final complex field (MxN).
     """
-    nv,nu  = field.shape
-    x      = np.linspace(-nu/2*dx,nu/2*dx,nu)
-    y      = np.linspace(-nv/2*dx,nv/2*dx,nv)
-    X,Y    = np.meshgrid(x,y)
-    Z      = X**2+Y**2
-    h      = 1./(1j*wavelength*distance)*np.exp(1j*k*(distance+Z/2/distance))
-    h      = np.fft.fft2(np.fft.fftshift(h))*dx**2
-    U1     = np.fft.fft2(np.fft.fftshift(field))
-    U2     = h*U1
-    result = np.fft.ifftshift(np.fft.ifft2(U2))
+    nv,nu  = field.shape[-2:]
+    H      = get_propagation_kernel(nv,nu,k,distance,dx,wavelength,'Bandlimited Angular Spectrum')
+    result = apply_propagation_kernel(field,H)
     return result
 
 def angular_spectrum(field,k,distance,dx,wavelength):
@@ -300,16 +1089,9 @@ def angular_spectrum(field,k,distance,dx,wavelength):
     result           : np.complex
                        Final complex field (MxN).
     """
-    nv,nu  = field.shape
-    x      = np.linspace(-nu/2*dx,nu/2*dx,nu)
-    y      = np.linspace(-nv/2*dx,nv/2*dx,nv)
-    X,Y    = np.meshgrid(x,y)
-    Z      = X**2+Y**2
-    h      = 1./(1j*wavelength*distance)*np.exp(1j*k*(distance+Z/2/distance))
-    h      = np.fft.fft2(np.fft.fftshift(h))*dx**2
-    U1     = np.fft.fft2(np.fft.fftshift(field))
-    U2     = h*U1
-    result = np.fft.ifftshift(np.fft.ifft2(U2))
+    nv,nu  = field.shape[-2:]
+    H      = get_propagation_kernel(nv,nu,k,distance,dx,wavelength,'Angular Spectrum')
+    result = apply_propagation_kernel(field,H)
     return result
 
 def impulse_response_fresnel(field,k,distance,dx,wavelength):
@@ -335,16 +1117,9 @@ def impulse_response_fresnel(field,k,distance,dx,wavelength):
                        Final complex field (MxN).
 
     """
-    nv,nu  = field.shape
-    x      = np.linspace(-nu/2*dx,nu/2*dx,nu)
-    y      = np.linspace(-nv/2*dx,nv/2*dx,nv)
-    X,Y    = np.meshgrid(x,y)
-    Z      = X**2+Y**2
-    h      = np.exp(1j*k*distance)/(1j*wavelength*distance)*np.exp(1j*k/2/distance*Z)
-    h      = np.fft.fft2(np.fft.fftshift(h))*dx**2
-    U1     = np.fft.fft2(np.fft.fftshift(field))
-    U2     = h*U1
-    result = np.fft.ifftshift(np.fft.ifft2(U2))
+    nv,nu  = field.shape[-2:]
+    H      = get_propagation_kernel(nv,nu,k,distance,dx,wavelength,'IR Fresnel')
+    result = apply_propagation_kernel(field,H)
     return result
 
 def transfer_function_fresnel(field,k,distance,dx,wavelength):
@@ -370,14 +1145,9 @@ def transfer_function_fresnel(field,k,distance,dx,wavelength):
                        Final complex field (MxN).
 
     """
-    nv,nu  = field.shape
-    fx     = np.linspace(-1./2./dx,1./2./dx,nu)
-    fy     = np.linspace(-1./2./dx,1./2./dx,nv)
-    FX,FY  = np.meshgrid(fx,fy)
-    H      = np.exp(1j*k*distance*(1-(FX*wavelength)**2-(FY*wavelength)**2)**0.5)
-    U1     = np.fft.fftshift(np.fft.fft2(np.fft.fftshift(field)))
-    U2     = H*U1
-    result = np.fft.ifftshift(np.fft.ifft2(np.fft.ifftshift(U2)))
+    nv,nu  = field.shape[-2:]
+    H      = get_propagation_kernel(nv,nu,k,distance,dx,wavelength,'TR Fresnel')
+    result = apply_propagation_kernel(field,H)
     return result
 
 def band_extended_angular_spectrum(field,k,distance,dx,wavelength):
@@ -404,15 +1174,13 @@ def band_extended_angular_spectrum(field,k,distance,dx,wavelength):
     """
     iflag = -1
     eps   = 10**(-12)
-    nv,nu = field.shape
+    nv,nu = field.shape[-2:]
     l     = nu*dx
     x     = np.linspace(-l/2,l/2,nu)
     y     = np.linspace(-l/2,l/2,nv)
     X,Y   = np.meshgrid(x,y)
-    Z     = X**2+Y**2
     fx    = np.linspace(-1./2./dx,1./2./dx,nu)
     fy    = np.linspace(-1./2./dx,1./2./dx,nv)
-    FX,FY = np.meshgrid(fx,fy)
     K     = nu/2/np.amax(fx)
     fcn   = 1./2*(nu/wavelength/np.abs(distance))**0.5
     ss    = np.abs(fcn)/np.amax(np.abs(fx))
@@ -427,18 +1195,19 @@ def band_extended_angular_spectrum(field,k,distance,dx,wavelength):
     Hn        = np.exp(1j*k*distance*(1-(FXN*wavelength)**2-(FYN*wavelength)**2)**0.5)
     X         = X/np.amax(X)*np.pi
     Y         = Y/np.amax(Y)*np.pi
-    t_asmNUFT = nufft2(field,X*ss,Y*ss,sign=iflag,eps=eps)
-    result    = nuifft2(Hn*t_asmNUFT,X*ss,Y*ss,sign=-iflag,eps=eps)
+    key       = cache_key('Bandextended Angular Spectrum',nv,nu,dx,wavelength,distance)
+    t_asmNUFT = nufft2(field,X*ss,Y*ss,sign=iflag,eps=eps,key=key)
+    result    = nuifft2(Hn*t_asmNUFT,X*ss,Y*ss,sign=-iflag,eps=eps,key=key)
     return result
 
-def rayleigh_sommerfeld(field,k,distance,dx,wavelength):
+def rayleigh_sommerfeld(field,k,distance,dx,wavelength,method='fft'):
     """
-    Definition to compute beam propagation using Rayleigh-Sommerfeld's diffraction formula (Huygens-Fresnel Principle). For more see Section 3.5.2 in Goodman, Joseph W. Introduction to Fourier optics. Roberts and Company Publishers, 2005.
+    Definition to compute beam propagation using Rayleigh-Sommerfeld's diffraction formula of the first kind (Huygens-Fresnel Principle). For more see Section 3.5.2 in Goodman, Joseph W. Introduction to Fourier optics. Roberts and Company Publishers, 2005. The impulse response is built once and applied as a linear convolution using zero padded FFTs.
 
     Parameters
     ----------
     field            : np.complex
-                       Complex field (MxN).
+                       Complex field (MxN) or fields (...xMxN).
     k                : odak.wave.wavenumber
                        Wave number of a wave, see odak.wave.wavenumber for more.
     distance         : float
@@ -447,36 +1216,106 @@ def rayleigh_sommerfeld(field,k,distance,dx,wavelength):
                        Size of one single pixel in the field grid (in meters).
     wavelength       : float
                        Wavelength of the electric field.
+    method           : str
+                       Either `fft` or `direct`. Direct summation over every non-zero pixel is O(N^4) and only meant to be used as a reference.
 
     Returns
     =======
     result           : np.complex
-                       Final complex field (MxN).
+                       Final complex field (MxN) or fields (...xMxN).
     """
-    nv,nu     = field.shape
-    x         = np.linspace(-nv*dx/2,nv*dx/2,nv)
-    y         = np.linspace(-nu*dx/2,nu*dx/2,nu)
-    X,Y       = np.meshgrid(x,y)
-    Z         = X**2+Y**2
-    result    = np.zeros(field.shape,dtype=np.complex64)
-    direction = int(distance/np.abs(distance))
-    for i in range(nu):
-        for j in range(nv):
+    nv,nu = field.shape[-2:]
+    if method == 'fft':
+        key = cache_key('Rayleigh-Sommerfeld',nv,nu,k,distance,dx,get_precision())
+        H   = propagation_kernel_cache.get(key)
+        if type(H) == type(None):
+            H = propagation_kernel_cache.set(key,rayleigh_sommerfeld_kernel(nv,nu,k,distance,dx))
+        padded              = np.zeros(field.shape[:-2]+(2*nv,2*nu),dtype=complex_dtype())
+        padded[...,:nv,:nu] = field
+        result              = ifft2(fft2(padded)*H)[...,:nv,:nu]
+        return result
+    elif method != 'direct':
+        raise Exception("Unknown method selected.")
+    if len(field.shape) > 2:
+        fields = field.reshape((-1,)+field.shape[-2:])
+        result = np.zeros(fields.shape,dtype=complex_dtype())
+        for m in range(fields.shape[0]):
+            result[m] = rayleigh_sommerfeld(fields[m],k,distance,dx,wavelength,method)
+        result = result.reshape(field.shape)
+        return result
+    x         = (np.arange(nu)*dx).astype(real_dtype()).reshape((1,-1))
+    y         = (np.arange(nv)*dx).astype(real_dtype()).reshape((-1,1))
+    result    = np.zeros(field.shape,dtype=complex_dtype())
+    for i in range(nv):
+        for j in range(nu):
             if field[i,j] != 0:
-                r01      = np.sqrt(distance**2+(X-X[i,j])**2+(Y-Y[i,j])**2)*direction
-                cosnr01  = np.cos(distance/r01)
-                result  += field[i,j]*np.exp(1j*k*r01)/r01*cosnr01
-    result *= 1./(1j*wavelength)
+                result += field[i,j]*rayleigh_sommerfeld_impulse_response(x-x[0,j],y-y[i,0],k,distance)
+    result *= dx**2
     return result
 
-def gerchberg_saxton(field,n_iterations,distance,dx,wavelength,slm_range=6.28,propagation_type='IR Fresnel'):
+def rayleigh_sommerfeld_kernel(nv,nu,k,distance,dx):
+    """
+    Definition to build the frequency domain kernel for a linear convolution with Rayleigh-Sommerfeld's impulse response. The impulse response is sampled on a 2Mx2N grid in FFT order, so that an MxN field zero padded to 2Mx2N doesn't wrap around.
+
+    Parameters
+    ----------
+    nv               : int
+                       Number of pixels along the first axis of the field.
+    nu               : int
+                       Number of pixels along the second axis of the field.
+    k                : odak.wave.wavenumber
+                       Wave number of a wave, see odak.wave.wavenumber for more.
+    distance         : float
+                       Propagation distance.
+    dx               : float
+                       Size of one single pixel in the field grid (in meters).
+
+    Returns
+    =======
+    H                : np.complex
+                       Kernel (2Mx2N).
+    """
+    x = (np.fft.fftfreq(2*nu)*2*nu*dx).astype(real_dtype())
+    y = (np.fft.fftfreq(2*nv)*2*nv*dx).astype(real_dtype())
+    h = rayleigh_sommerfeld_impulse_response(x.reshape((1,-1)),y.reshape((-1,1)),k,distance)
+    H = (fft2(h)*dx**2).astype(complex_dtype(),copy=False)
+    return H
+
+def rayleigh_sommerfeld_impulse_response(X,Y,k,distance):
     """
-    Definition to compute a hologram using an iterative method called Gerchberg-Saxton phase retrieval algorithm. For more on the method, see: Gerchberg, Ralph W. "A practical algorithm for the determination of phase from image and diffraction plane pictures." Optik 35 (1972): 237-246.
+    Definition to calculate the impulse response of Rayleigh-Sommerfeld's diffraction formula of the first kind, h = z/(2 pi) (1/r - jk) exp(jkr)/r^2. Negative distances give the conjugate response for backward propagation. The phase kr is evaluated as k|z| plus k rho^2/(r+|z|), so that the large constant part doesn't lose precision when X and Y are in single precision.
+
+    Parameters
+    ----------
+    X                : ndarray
+                       Lateral offsets along X.
+    Y                : ndarray
+                       Lateral offsets along Y.
+    k                : odak.wave.wavenumber
+                       Wave number of a wave, see odak.wave.wavenumber for more.
+    distance         : float
+                       Propagation distance.
+
+    Returns
+    =======
+    h                : np.complex
+                       Impulse response.
+    """
+    direction = np.sign(distance)
+    rho2      = X**2+Y**2
+    r         = np.sqrt(distance**2+rho2)
+    phase     = k*rho2/(r+np.abs(distance))
+    h         = distance/(2*np.pi)*np.exp(1j*direction*k*np.abs(distance))*(direction/r-1j*k)*np.exp(1j*direction*phase)/r**2
+    return h
+
+def gerchberg_saxton(field,n_iterations,distance,dx,wavelength,slm_range=6.28,propagation_type='IR Fresnel',tolerance=None,return_errors=False):
+    """
+    Definition to compute a hologram using an iterative method called Gerchberg-Saxton phase retrieval algorithm. For more on the method, see: Gerchberg, Ralph W. "A practical algorithm for the determination of phase from image and diffraction plane pictures." Optik 35 (1972): 237-246. Kernels of both directions are built once, the amplitude constraint is applied in place on preallocated buffers, the reconstruction error is recorded at every iteration (see odak.wave.reconstruction_error) and the last forward propagation is returned as the reconstruction.
 
     Parameters
     ----------
     field            : np.complex
-                       Complex field (MxN).
+                       Complex field (MxN). A torch tensor gives torch tensors, see odak.tools.to_numpy for more.
     distance         : float
                        Propagation distance.
     dx               : float
@@ -487,6 +1326,10 @@ def gerchberg_saxton(field,n_iterations,distance,dx,wavelength,slm_range=6.28,pr
                        Typically this is equal to two pi. See odak.wave.adjust_phase_only_slm_range() for more.
     propagation_type : str
                        Type of the propagation (IR Fresnel, TR Fresnel, Fraunhofer).
+    tolerance        : float
+                       If provided, iterations stop once the reconstruction error improves less than this value between two iterations.
+    return_errors    : bool
+                       If set True, reconstruction errors of every iteration are also returned.
 
     Result
     ---------
@@ -494,18 +1337,199 @@ def gerchberg_saxton(field,n_iterations,distance,dx,wavelength,slm_range=6.28,pr
                        Calculated complex hologram.
     reconstruction   : np.complex
                        Calculated reconstruction using calculated hologram. 
+    errors           : list
+                       Reconstruction error of every iteration, only returned if return_errors is True.
     """
-    k              = wavenumber(wavelength)
-    reconstruction = np.copy(field)
+    if is_torch(field) == True:
+        hologram,reconstruction,errors = gerchberg_saxton(to_numpy(field),n_iterations,distance,dx,wavelength,slm_range,propagation_type,tolerance,return_errors=True)
+        hologram       = to_torch(hologram,device=field.device)
+        reconstruction = to_torch(reconstruction,device=field.device)
+        if return_errors == True:
+            return hologram,reconstruction,errors
+        return hologram,reconstruction
+    forward        = propagator(field.shape[-2:],dx,wavelength,distance,propagation_type)
+    backward       = propagator(field.shape[-2:],dx,wavelength,-distance,propagation_type)
+    target         = calculate_amplitude(field)
+    phase          = np.empty(field.shape,dtype=target.dtype)
+    reconstruction = np.empty(field.shape,dtype=np.result_type(field.dtype,complex_dtype()))
+    np.copyto(reconstruction,field)
+    errors         = []
     for i in tqdm(range(n_iterations)):
-        hologram       = propagate_beam(reconstruction,k,-distance,dx,wavelength,propagation_type)
+        hologram       = backward.forward(reconstruction)
         hologram       = produce_phase_only_slm_pattern(hologram,slm_range)
-        reconstruction = propagate_beam(hologram,k,distance,dx,wavelength,propagation_type)
-        reconstruction = set_amplitude(hologram,field)
-    reconstruction = propagate_beam(hologram,k,distance,dx,wavelength,propagation_type)
+        propagated     = forward.forward(hologram)
+        errors.append(reconstruction_error(propagated,target))
+        np.arctan2(propagated.imag,propagated.real,out=phase)
+        np.multiply(phase,1j,out=reconstruction)
+        np.exp(reconstruction,out=reconstruction)
+        np.multiply(reconstruction,target,out=reconstruction)
+        if type(tolerance) != type(None) and i > 0 and errors[-2]-errors[-1] < tolerance:
+            break
+    reconstruction = propagated
+    if return_errors == True:
+        return hologram,reconstruction,errors
     return hologram,reconstruction
 
-def point_wise(field,distances,k,dx,wavelength,lens_method='ideal',propagation_method='Bandlimited Angular Spectrum',n_iteration=3):
+def gerchberg_saxton_batch(fields,n_iterations,distance,dx,wavelength,slm_range=6.28,propagation_type='IR Fresnel',tolerance=None,return_errors=False):
+    """
+    Definition to compute holograms of many targets at once using Gerchberg-Saxton phase retrieval algorithm, see odak.wave.gerchberg_saxton for more. All targets are propagated together with batched FFTs, using the same kernels. Targets that converge (see tolerance) are frozen while the rest keep iterating, so every target gets the same result as a separate odak.wave.gerchberg_saxton call.
+
+    Parameters
+    ----------
+    fields           : np.complex
+                       Complex fields (BxMxN). A torch tensor gives torch tensors, see odak.tools.to_numpy for more.
+    n_iterations     : int
+                       Maximum number of iterations.
+    distance         : float
+                       Propagation distance.
+    dx               : float
+                       Size of one single pixel in the field grid (in meters).
+    wavelength       : float
+                       Wavelength of the electric field.
+    slm_range        : float
+                       Typically this is equal to two pi. See odak.wave.adjust_phase_only_slm_range() for more.
+    propagation_type : str
+                       Type of the propagation (IR Fresnel, TR Fresnel, Fraunhofer).
+    tolerance        : float
+                       If provided, a target is frozen once its reconstruction error improves less than this value between two iterations.
+    return_errors    : bool
+                       If set True, reconstruction errors of every target and iteration are also returned.
+
+    Result
+    ---------
+    holograms        : np.complex
+                       Calculated complex holograms (BxMxN).
+    reconstructions  : np.complex
+                       Calculated reconstructions using calculated holograms (BxMxN).
+    errors           : list
+                       Reconstruction errors of every iteration, one list per target, only returned if return_errors is True.
+    """
+    if is_torch(fields) == True:
+        holograms,reconstructions,errors = gerchberg_saxton_batch(to_numpy(fields),n_iterations,distance,dx,wavelength,slm_range,propagation_type,tolerance,return_errors=True)
+        holograms       = to_torch(holograms,device=fields.device)
+        reconstructions = to_torch(reconstructions,device=fields.device)
+        if return_errors == True:
+            return holograms,reconstructions,errors
+        return holograms,reconstructions
+    forward         = propagator(fields.shape[-2:],dx,wavelength,distance,propagation_type)
+    backward        = propagator(fields.shape[-2:],dx,wavelength,-distance,propagation_type)
+    target          = calculate_amplitude(fields)
+    holograms       = np.zeros(fields.shape,dtype=complex_dtype())
+    reconstructions = np.zeros(fields.shape,dtype=complex_dtype())
+    reconstruction  = fields.astype(complex_dtype())
+    active          = np.arange(fields.shape[0])
+    errors          = [[] for m in range(fields.shape[0])]
+    for i in tqdm(range(n_iterations)):
+        hologram                = backward.forward(reconstruction[active])
+        hologram                = produce_phase_only_slm_pattern(hologram,slm_range)
+        propagated              = forward.forward(hologram)
+        holograms[active]       = hologram
+        reconstructions[active] = propagated
+        keep                    = []
+        for m,member in enumerate(active):
+            errors[int(member)].append(reconstruction_error(propagated[m],target[member]))
+            converged = type(tolerance) != type(None) and i > 0 and errors[int(member)][-2]-errors[int(member)][-1] < tolerance
+            keep.append(not converged)
+        reconstruction[active]  = set_amplitude(propagated,target[active])
+        active                  = active[np.asarray(keep,dtype=bool)]
+        if active.shape[0] == 0:
+            break
+    if return_errors == True:
+        return holograms,reconstructions,errors
+    return holograms,reconstructions
+
+def gerchberg_saxton_stream(frames,n_iterations,distance,dx,wavelength,slm_range=6.28,propagation_type='IR Fresnel',tolerance=None,warm_start=True,return_errors=False):
+    """
+    Generator to compute holograms of consecutive frames (i.e. a video) using Gerchberg-Saxton phase retrieval algorithm, see odak.wave.gerchberg_saxton for more. Kernels of both directions are built once and kept for the whole stream. With warm start, each frame starts from the phase of the previous frame's reconstruction instead of a flat phase, so temporally coherent content converges in far fewer iterations when a tolerance is given. Only the previous reconstruction is kept between frames, so memory use doesn't grow with the length of the stream.
+
+    Parameters
+    ----------
+    frames           : iterable
+                       Complex fields (MxN), one per frame. Any iterable works, including generators of unknown length. Torch tensors give torch tensors, see odak.tools.to_numpy for more.
+    n_iterations     : int
+                       Maximum number of iterations per frame.
+    distance         : float
+                       Propagation distance.
+    dx               : float
+                       Size of one single pixel in the field grid (in meters).
+    wavelength       : float
+                       Wavelength of the electric field.
+    slm_range        : float
+                       Typically this is equal to two pi. See odak.wave.adjust_phase_only_slm_range() for more.
+    propagation_type : str
+                       Type of the propagation (IR Fresnel, TR Fresnel, Fraunhofer).
+    tolerance        : float
+                       If provided, iterations of a frame stop once the reconstruction error improves less than this value between two iterations.
+    warm_start       : bool
+                       If set True, each frame is initialized with the phase of the previous frame's reconstruction.
+    return_errors    : bool
+                       If set True, reconstruction errors of every iteration of a frame are also yielded.
+
+    Yields
+    ---------
+    hologram         : np.complex
+                       Calculated complex hologram of a frame.
+    reconstruction   : np.complex
+                       Calculated reconstruction using calculated hologram.
+    errors           : list
+                       Reconstruction error of every iteration of a frame, only yielded if return_errors is True.
+    """
+    forward        = None
+    previous       = None
+    for field in tqdm(frames):
+        device = None
+        if is_torch(field) == True:
+            device = field.device
+            field  = to_numpy(field)
+        if type(forward) == type(None) or tuple(forward.shape) != tuple(field.shape[-2:]):
+            forward  = propagator(field.shape[-2:],dx,wavelength,distance,propagation_type)
+            backward = propagator(field.shape[-2:],dx,wavelength,-distance,propagation_type)
+            previous = None
+        target         = calculate_amplitude(field)
+        reconstruction = field
+        if warm_start == True and type(previous) != type(None):
+            reconstruction = set_amplitude(previous,target)
+        errors         = []
+        for i in range(n_iterations):
+            hologram       = backward.forward(reconstruction)
+            hologram       = produce_phase_only_slm_pattern(hologram,slm_range)
+            propagated     = forward.forward(hologram)
+            errors.append(reconstruction_error(propagated,target))
+            reconstruction = set_amplitude(propagated,target)
+            if type(tolerance) != type(None) and i > 0 and errors[-2]-errors[-1] < tolerance:
+                break
+        previous       = propagated
+        if type(device) != type(None):
+            hologram   = to_torch(hologram,device=device)
+            propagated = to_torch(propagated,device=device)
+        if return_errors == True:
+            yield hologram,propagated,errors
+        else:
+            yield hologram,propagated
+
+def reconstruction_error(reconstruction,target):
+    """
+    Definition to calculate the error between the amplitude of a reconstruction and a target amplitude, after scaling the reconstruction to the target with least squares, so that the error doesn't depend on the overall brightness.
+
+    Parameters
+    ----------
+    reconstruction   : np.complex
+                       Complex field (...xMxN).
+    target           : np.float
+                       Target amplitude (...xMxN).
+
+    Returns
+    ----------
+    error            : float
+                       Relative root mean square error, the norm of the difference divided by the norm of the target.
+    """
+    amplitude = calculate_amplitude(reconstruction)
+    target    = calculate_amplitude(target)
+    scale     = np.sum(amplitude*target)/max(float(np.sum(amplitude**2)),1e-30)
+    error     = float(np.linalg.norm(scale*amplitude-target)/max(float(np.linalg.norm(target)),1e-30))
+    return error
+
+def point_wise(field,distances,k,dx,wavelength,lens_method='ideal',propagation_method='Bandlimited Angular Spectrum',n_iteration=3,lut=None):
     """
     Point-wise hologram calculation method. For more Maimone, Andrew, Andreas Georgiou, and Joel S. Kollin. "Holographic near-eye displays for virtual and augmented reality." ACM Transactions on Graphics (TOG) 36.4 (2017): 1-16.
 
@@ -527,6 +1551,8 @@ def point_wise(field,distances,k,dx,wavelength,lens_method='ideal',propagation_m
                        Beam propagation method to be used if the lens_model is not equal to `ideal`.
     n_iteration      : int
                        Number of iterations.
+    lut              : odak.wave.zone_plate_lut
+                       If provided, lens patterns are taken from the table (see odak.wave.zone_plate_lut.get_lens), so that they are calculated once per depth and shared across calls. Each point only adds its lens within a bounded window, the part of the lens that doesn't alias, so the cost scales with the number of points times the window instead of the full frame. Once the window of a depth covers the field, the hologram is the same as without a table. Only available for the `ideal` lens method.
 
     Returns
     ----------
@@ -540,30 +1566,553 @@ def point_wise(field,distances,k,dx,wavelength,lens_method='ideal',propagation_m
     non_zeros     = np.asarray((np.abs(field)>0).nonzero())
     unique_dist   = np.unique(distances)
     unique_dist   = unique_dist[unique_dist!=0]
-    target        = np.zeros((nx,ny),dtype=np.complex64)
-    target[cx,cy] = 1.
+    if type(lut) != type(None) and lens_method != 'ideal':
+        raise ValueError("Lookup tables are only available for the ideal lens method.")
     lenses        = []
     for distance in unique_dist:
-        if lens_method == 'ideal':
-            new_lens = quadratic_phase_function(nx,ny,k,focal=distance,dx=dx)
-            lenses.append(new_lens)
-        elif lens_method == 'Gerchberg-Saxton':
-            new_lens,_ = gerchberg_saxton(
-                                          target,
-                                          n_iteration,
-                                          distance,
-                                          dx,
-                                          wavelength,
-                                          np.pi*2,
-                                          propagation_method
-                                         )
-            lenses.append(new_lens)
+        if type(lut) != type(None):
+            new_lens = lut.get_lens(nx,ny,distance,wavelength)
+        else:
+            new_lens = point_spread_lens(nx,ny,distance,k,dx,wavelength,lens_method,propagation_method,n_iteration)
+        lenses.append(new_lens)
     for m in tqdm(range(non_zeros.shape[1])):
         i         = int(non_zeros[0,m])
         j         = int(non_zeros[1,m])
         lens_id   = int(np.argwhere(unique_dist==distances[i,j]))
+        if type(lut) != type(None):
+            window,rows,columns = lenses[lens_id]
+            hologram[np.ix_((i+rows)%nx,(j+columns)%ny)] += window*field[i,j]
+            continue
         lens      = lenses[lens_id]
         lens      = np.roll(lens,i-cx,axis=0)
         lens      = np.roll(lens,j-cy,axis=1)
         hologram += lens*field[i,j]
     return hologram
+
+def point_spread_lens(nx,ny,distance,k,dx,wavelength,lens_method='ideal',propagation_method='Bandlimited Angular Spectrum',n_iteration=3):
+    """
+    Definition to generate the lens pattern that focuses light to a point at the center of the field and a given distance, used by odak.wave.point_wise and odak.wave.layer_based.
+
+    Parameters
+    ----------
+    nx               : int
+                       Size of the lens along the first axis.
+    ny               : int
+                       Size of the lens along the second axis.
+    distance         : float
+                       Distance of the point.
+    k                : odak.wave.wavenumber
+                       Wave number of a wave, see odak.wave.wavenumber for more.
+    dx               : float
+                       Pixel pitch.
+    wavelength       : float
+                       Wavelength of the light.
+    lens_method      : str
+                       Method to calculate the lens pattern, either `ideal` or `Gerchberg-Saxton`.
+    propagation_method : str
+                       Beam propagation method to be used if the lens_method is `Gerchberg-Saxton`.
+    n_iteration      : int
+                       Number of iterations.
+
+    Returns
+    ----------
+    lens             : ndarray
+                       Lens pattern (nx x ny).
+    """
+    if lens_method == 'ideal':
+        lens = quadratic_phase_function(nx,ny,k,focal=distance,dx=dx)
+    elif lens_method == 'Gerchberg-Saxton':
+        target                      = np.zeros((nx,ny),dtype=np.complex64)
+        target[int(nx/2),int(ny/2)] = 1.
+        lens,_                      = gerchberg_saxton(
+                                                       target,
+                                                       n_iteration,
+                                                       distance,
+                                                       dx,
+                                                       wavelength,
+                                                       np.pi*2,
+                                                       propagation_method
+                                                      )
+    else:
+        raise Exception("Unknown lens method selected.")
+    return lens
+
+def layer_based(field,distances,k,dx,wavelength,n_layers=None,occlusion=False,lens_method='ideal',propagation_method='Bandlimited Angular Spectrum',n_iteration=3,chunk_size=8):
+    """
+    Layer-based hologram calculation method. The depth map is sliced into layers, and each layer is convolved with the lens pattern of its depth using FFTs. Layers are transformed in batches of chunk_size and their spectra are summed, so that a single inverse FFT gives the hologram. Without quantization and occlusion, the hologram is equivalent to odak.wave.point_wise, at the cost of a few FFTs per layer instead of a full size accumulation per point.
+
+    Parameters
+    ----------
+    field            : ndarray
+                       Complex input field to be converted into a hologram.
+    distances        : ndarray
+                       Depth map of the input field. Pixels with zero depth are ignored, as in odak.wave.point_wise.
+    k                : odak.wave.wavenumber
+                       Wave number of a wave, see odak.wave.wavenumber for more.
+    dx               : float
+                       Pixel pitch.
+    wavelength       : float
+                       Wavelength of the light.
+    n_layers         : int
+                       Number of depth layers. Depths are quantized into this many equally spaced layers, each represented by its center depth. If not provided, every unique depth is a layer.
+    occlusion        : bool
+                       If set True, layers are propagated from the farthest to the nearest with odak.wave.propagate_beam, and each layer blocks the light of the layers behind it before reaching the hologram plane. The amplitude scale then follows the propagation method instead of the lens patterns.
+    lens_method      : str
+                       Method to calculate the lens patterns, see odak.wave.point_spread_lens.
+    propagation_method : str
+                       Beam propagation method to be used if the lens_method is `Gerchberg-Saxton` or occlusion is enabled.
+    n_iteration      : int
+                       Number of iterations.
+    chunk_size       : int
+                       Number of layers transformed together, it bounds the memory used.
+
+    Returns
+    ----------
+    hologram         : ndarray
+                       Generated complex hologram.
+    """
+    nx,ny         = field.shape
+    valid         = (distances != 0) & (np.abs(field) > 0)
+    unique_dist   = np.unique(distances[valid])
+    if type(n_layers) == type(None) or n_layers >= unique_dist.shape[0]:
+        depths    = unique_dist
+        layer_ids = np.searchsorted(unique_dist,distances)
+    else:
+        edges     = np.linspace(np.amin(unique_dist),np.amax(unique_dist),n_layers+1)
+        depths    = (edges[1:]+edges[:-1])/2.
+        layer_ids = np.clip(np.digitize(distances,edges)-1,0,n_layers-1)
+    if occlusion == True:
+        hologram = np.zeros(field.shape,dtype=np.complex128)
+        for m in range(depths.shape[0]-1,-1,-1):
+            mask     = valid & (layer_ids == m)
+            hologram = hologram*(1-mask)+field*mask
+            if m > 0:
+                next_depth = depths[m-1]
+            else:
+                next_depth = 0.
+            hologram = propagate_beam(hologram,k,depths[m]-next_depth,dx,wavelength,propagation_method)
+        hologram = hologram.astype(np.complex64)
+        return hologram
+    spectrum = np.zeros(field.shape,dtype=np.complex128)
+    for start in range(0,depths.shape[0],chunk_size):
+        ids     = np.arange(start,min(start+chunk_size,depths.shape[0]))
+        layers  = field*(valid & (layer_ids == ids.reshape((-1,1,1))))
+        lenses  = np.zeros((ids.shape[0],nx,ny),dtype=np.complex128)
+        for i,m in enumerate(ids):
+            lenses[i] = point_spread_lens(nx,ny,depths[m],k,dx,wavelength,lens_method,propagation_method,n_iteration)
+        spectrum += np.sum(fft2(layers)*fft2(ifftshift(lenses)),axis=0)
+    hologram = ifft2(spectrum).astype(np.complex64)
+    return hologram
+
+def zone_plate(distance,k,dx,wavelength,max_support=None):
+    """
+    Definition to generate the windowed zone plate of a point source, the spherical wave exp(jkr)/r of a point at a given distance, sampled on a small square patch. The window is the cone of the highest spatial frequency of the grid (sin(theta) = wavelength/2dx), beyond which the wave would alias. Negative distances give the converging (conjugate) wave.
+
+    Parameters
+    ----------
+    distance         : float
+                       Distance of the point source to the plane.
+    k                : odak.wave.wavenumber
+                       Wave number of a wave, see odak.wave.wavenumber for more.
+    dx               : float
+                       Pixel pitch.
+    wavelength       : float
+                       Wavelength of the light.
+    max_support      : int
+                       Upper bound for the half width of the patch (in pixels).
+
+    Returns
+    ----------
+    patch            : ndarray
+                       Zone plate (2W+1 x 2W+1), centered at the point source.
+    """
+    angle   = np.arcsin(min(wavelength/2./dx,1.))
+    support = int(np.ceil(np.abs(distance)*np.tan(angle)/dx))
+    if type(max_support) != type(None):
+        support = min(support,max_support)
+    offsets = np.arange(-support,support+1)*dx
+    rho2    = offsets.reshape((-1,1))**2+offsets.reshape((1,-1))**2
+    r       = np.sqrt(rho2+distance**2)
+    patch   = np.exp(1j*np.sign(distance)*k*r)/r
+    patch  *= rho2 <= (support*dx)**2
+    return patch
+
+def wavefront_recording_plane_field(points,k,dx,wavelength,shape,wrp_distance,amplitudes=None,n_depths=None,lut=None):
+    """
+    Definition to calculate the field of point sources on a wavefront recording plane (WRP). The zone plate of every point (see odak.wave.zone_plate) is only added within its small support, so the cost scales with the number of points times the support rather than the full frame. Zone plates are precomputed per depth and points of the same depth are added together.
+
+    Parameters
+    ----------
+    points           : ndarray
+                       Point cloud (Px3) in meters, e.g. from odak.tools.read_PLY_point_cloud. Z is the distance to the hologram plane, X and Y are snapped to the closest pixel of a grid centered at pixel (M/2,N/2).
+    k                : odak.wave.wavenumber
+                       Wave number of a wave, see odak.wave.wavenumber for more.
+    dx               : float
+                       Pixel pitch.
+    wavelength       : float
+                       Wavelength of the light.
+    shape            : list
+                       Shape of the plane (MxN).
+    wrp_distance     : float
+                       Distance of the wavefront recording plane to the hologram plane.
+    amplitudes       : ndarray
+                       Complex amplitudes of the points (P). Unit amplitudes are used if not provided.
+    n_depths         : int
+                       Number of depths in the zone plate table. Depths are quantized into this many equally spaced values. If not provided, every unique depth gets its own zone plate.
+    lut              : odak.wave.zone_plate_lut
+                       Zone plate lookup table to be used, pass the same table across frames to reuse zone plates. A temporary table is used if not provided.
+
+    Returns
+    ----------
+    field            : ndarray
+                       Complex field on the wavefront recording plane (MxN).
+    """
+    nv,nu      = shape
+    points     = np.asarray(points)
+    if type(amplitudes) == type(None):
+        amplitudes = np.ones(points.shape[0],dtype=np.complex128)
+    amplitudes = np.asarray(amplitudes)
+    rows       = np.round(points[:,1]/dx).astype(int)+nv//2
+    columns    = np.round(points[:,0]/dx).astype(int)+nu//2
+    depths     = points[:,2]-wrp_distance
+    if type(n_depths) == type(None):
+        table_depths,depth_ids = np.unique(depths,return_inverse=True)
+    else:
+        edges        = np.linspace(np.amin(depths),np.amax(depths),n_depths+1)
+        table_depths = (edges[1:]+edges[:-1])/2.
+        depth_ids    = np.clip(np.digitize(depths,edges)-1,0,n_depths-1)
+    if type(lut) == type(None):
+        lut = zone_plate_lut(dx,max_support=max(nv,nu))
+    field = np.zeros((nv,nu),dtype=np.complex128)
+    for m in range(table_depths.shape[0]):
+        ids = np.nonzero(depth_ids == m)[0]
+        if ids.shape[0] == 0:
+            continue
+        lut.add(field,rows[ids],columns[ids],table_depths[m],wavelength,amplitudes[ids])
+    return field
+
+def wavefront_recording_plane(points,k,dx,wavelength,shape,amplitudes=None,wrp_distance=None,n_depths=None,propagation_type='TR Fresnel',padding=None,lut=None):
+    """
+    Wavefront recording plane (WRP) method to calculate holograms of point clouds. Point sources are added to a virtual plane close to the point cloud with odak.wave.wavefront_recording_plane_field, and the plane is carried to the hologram plane with a single odak.wave.propagate_beam call. For more see Shimobaba, Tomoyoshi, Nobuyuki Masuda, and Tomoyoshi Ito. "Simple and fast calculation algorithm for computer-generated hologram with wavefront recording plane." Optics letters 34.20 (2009): 3133-3135.
+
+    Parameters
+    ----------
+    points           : ndarray
+                       Point cloud (Px3) in meters, Z is the distance to the hologram plane. See odak.wave.wavefront_recording_plane_field for more.
+    k                : odak.wave.wavenumber
+                       Wave number of a wave, see odak.wave.wavenumber for more.
+    dx               : float
+                       Pixel pitch.
+    wavelength       : float
+                       Wavelength of the light.
+    shape            : list
+                       Shape of the hologram (MxN).
+    amplitudes       : ndarray
+                       Complex amplitudes of the points (P). Unit amplitudes are used if not provided.
+    wrp_distance     : float
+                       Distance of the wavefront recording plane to the hologram plane. If not provided, the plane is placed in front of the nearest point such that its zone plate spans four pixels.
+    n_depths         : int
+                       Number of depths in the zone plate table, see odak.wave.wavefront_recording_plane_field.
+    lut              : odak.wave.zone_plate_lut
+                       Zone plate lookup table to be used, see odak.wave.wavefront_recording_plane_field.
+    propagation_type : str
+                       Type of the propagation from the wavefront recording plane to the hologram plane, see odak.wave.propagate_beam. TR Fresnel, which uses the exact transfer function of free space, preserves the spherical waves best.
+    padding          : str
+                       Padding used in the propagation, see odak.wave.propagate_beam. Use it to avoid wrap around of points close to the borders.
+
+    Returns
+    ----------
+    hologram         : ndarray
+                       Complex hologram (MxN).
+    """
+    points = np.asarray(points)
+    if type(wrp_distance) == type(None):
+        angle        = np.arcsin(min(wavelength/2./dx,1.))
+        wrp_distance = np.amin(points[:,2])-4*dx/np.tan(angle)
+    if wrp_distance <= 0:
+        raise Exception("Points are too close to the hologram plane for a wavefront recording plane.")
+    field    = wavefront_recording_plane_field(points,k,dx,wavelength,shape,wrp_distance,amplitudes,n_depths,lut)
+    hologram = propagate_beam(field,k,wrp_distance,dx,wavelength,propagation_type,padding)
+    return hologram
+
+class zone_plate_lut():
+    """
+    A class to keep windowed zone plates (see odak.wave.zone_plate) per quantized depth and wavelength, so that point sources can be added to a field as bounded windows. It also keeps the windowed lens patterns used by odak.wave.point_wise (see odak.wave.point_spread_lens). Tables are kept under a memory budget with least recently used eviction, and can be saved to and loaded from disk to share them across frames and processes.
+    """
+    def __init__(self,dx,depth_step=None,separable=False,budget=2**28,max_support=None):
+        """
+        Class to represent a zone plate lookup table.
+
+        Parameters
+        ----------
+        dx               : float
+                           Pixel pitch.
+        depth_step       : float
+                           Depths are rounded to multiples of this step before the lookup. If not provided, depths are used as they are.
+        separable        : bool
+                           If set True, zone plates are stored as one horizontal and one vertical profile in the Fresnel approximation, exp(jkd)/d exp(jkx^2/2d) exp(jky^2/2d), on a square window. Memory per depth drops from (2W+1)^2 to 2(2W+1) samples, the profiles are applied to the points directly in odak.wave.zone_plate_lut.add.
+        budget           : int
+                           Memory budget of the table in bytes.
+        max_support      : int
+                           Upper bound for the half width of the zone plates (in pixels).
+        """
+        self.dx          = dx
+        self.depth_step  = depth_step
+        self.separable   = separable
+        self.max_support = max_support
+        self.cache       = kernel_cache(budget=budget)
+
+    def quantize(self,distance):
+        """
+        Definition to quantize a depth to the step of the table.
+
+        Parameters
+        ----------
+        distance         : float
+                           Depth.
+
+        Returns
+        ----------
+        distance         : float
+                           Quantized depth.
+        """
+        if type(self.depth_step) == type(None):
+            return float(distance)
+        return float(np.round(distance/self.depth_step)*self.depth_step)
+
+    def support(self,distance,wavelength):
+        """
+        Definition to calculate the half width of the window of a depth, the cone of the highest spatial frequency of the grid (sin(theta) = wavelength/2dx) beyond which the wave would alias.
+
+        Parameters
+        ----------
+        distance         : float
+                           Depth.
+        wavelength       : float
+                           Wavelength of the light.
+
+        Returns
+        ----------
+        support          : int
+                           Half width of the window (in pixels).
+        """
+        angle   = np.arcsin(min(wavelength/2./self.dx,1.))
+        support = int(min(np.ceil(np.abs(distance)*np.tan(angle)/self.dx),2**31))
+        if type(self.max_support) != type(None):
+            support = min(support,self.max_support)
+        return support
+
+    def build(self,distance,wavelength):
+        """
+        Definition to calculate the table entry of a depth and a wavelength.
+
+        Parameters
+        ----------
+        distance         : float
+                           Depth.
+        wavelength       : float
+                           Wavelength of the light.
+
+        Returns
+        ----------
+        entry            : ndarray or tuple
+                           Zone plate, or a tuple of its horizontal and vertical profiles if the table is separable.
+        """
+        k = wavenumber(wavelength)
+        if self.separable == False:
+            return zone_plate(distance,k,self.dx,wavelength,self.max_support)
+        support = self.support(distance,wavelength)
+        offsets = np.arange(-support,support+1)*self.dx
+        profile = np.exp(1j*k/2/distance*offsets**2)
+        entry   = (np.exp(1j*k*distance)/np.abs(distance)*profile,profile)
+        return entry
+
+    def lookup(self,distance,wavelength):
+        """
+        Definition to get the table entry of a depth and a wavelength, it is calculated and stored if it isn't in the table.
+
+        Parameters
+        ----------
+        distance         : float
+                           Depth.
+        wavelength       : float
+                           Wavelength of the light.
+
+        Returns
+        ----------
+        entry            : ndarray or tuple
+                           Zone plate, or a tuple of its horizontal and vertical profiles if the table is separable.
+        """
+        key   = (self.quantize(distance),float(wavelength),0,0)
+        entry = self.cache.get(key)
+        if type(entry) == type(None):
+            entry = self.cache.set(key,self.build(key[0],wavelength))
+        return entry
+
+    def get(self,distance,wavelength):
+        """
+        Definition to get the zone plate of a depth and a wavelength, it is calculated and stored if it isn't in the table. For separable tables, the zone plate is formed from its profiles at every call, see odak.wave.zone_plate_lut.add to avoid it.
+
+        Parameters
+        ----------
+        distance         : float
+                           Depth.
+        wavelength       : float
+                           Wavelength of the light.
+
+        Returns
+        ----------
+        patch            : ndarray
+                           Zone plate (2W+1 x 2W+1).
+        """
+        entry = self.lookup(distance,wavelength)
+        if self.separable == True:
+            return entry[1].reshape((-1,1))*entry[0].reshape((1,-1))
+        return entry
+
+    def get_lens(self,nx,ny,distance,wavelength):
+        """
+        Definition to get the ideal lens pattern of a depth and a wavelength as used by odak.wave.point_wise (see odak.wave.point_spread_lens), it is calculated and stored if it isn't in the table. Only the square window of the lens that doesn't alias (see odak.wave.zone_plate_lut.support) is kept, clipped to the size of the lens.
+
+        Parameters
+        ----------
+        nx               : int
+                           Size of the lens along the first axis.
+        ny               : int
+                           Size of the lens along the second axis.
+        distance         : float
+                           Depth.
+        wavelength       : float
+                           Wavelength of the light.
+
+        Returns
+        ----------
+        window           : ndarray
+                           Window of the lens pattern.
+        rows             : ndarray
+                           Row offsets of the window from the point.
+        columns          : ndarray
+                           Column offsets of the window from the point.
+        """
+        key     = (self.quantize(distance),float(wavelength),int(nx),int(ny))
+        cx      = int(nx/2)
+        cy      = int(ny/2)
+        support = self.support(key[0],wavelength)
+        rows    = np.arange(-min(support,cx),min(support,nx-1-cx)+1)
+        columns = np.arange(-min(support,cy),min(support,ny-1-cy)+1)
+        window  = self.cache.get(key)
+        if type(window) == type(None):
+            lens   = point_spread_lens(nx,ny,key[0],wavenumber(wavelength),self.dx,wavelength,'ideal')
+            window = self.cache.set(key,np.ascontiguousarray(lens[cx+rows[0]:cx+rows[-1]+1,cy+columns[0]:cy+columns[-1]+1]))
+        return window,rows,columns
+
+    def add(self,field,rows,columns,distance,wavelength,amplitudes=None):
+        """
+        Definition to add the zone plates of point sources at the same depth to a field, within their windows only.
+
+        Parameters
+        ----------
+        field            : ndarray
+                           Complex field (MxN) to add to, updated in place.
+        rows             : ndarray
+                           Row of each point (P).
+        columns          : ndarray
+                           Column of each point (P).
+        distance         : float
+                           Depth of the points.
+        wavelength       : float
+                           Wavelength of the light.
+        amplitudes       : ndarray
+                           Complex amplitudes of the points (P). Unit amplitudes are used if not provided.
+
+        Returns
+        ----------
+        field            : ndarray
+                           Same field, useful for chaining.
+        """
+        rows    = np.asarray(rows).reshape(-1)
+        columns = np.asarray(columns).reshape(-1)
+        if type(amplitudes) == type(None):
+            amplitudes = np.ones(rows.shape[0],dtype=np.complex128)
+        amplitudes = np.asarray(amplitudes).reshape(-1)
+        nv,nu      = field.shape[-2:]
+        entry      = self.lookup(distance,wavelength)
+        if self.separable == True:
+            width  = entry[0].shape[0]
+        else:
+            width  = entry.shape[0]
+        offsets    = np.arange(width)-width//2
+        chunk_size = max(1,2**22//width**2)
+        for start in range(0,rows.shape[0],chunk_size):
+            chunk      = slice(start,start+chunk_size)
+            patch_rows = (rows[chunk].reshape((-1,1,1))+offsets.reshape((1,-1,1)))*np.ones((1,1,offsets.shape[0]),dtype=int)
+            patch_cols = (columns[chunk].reshape((-1,1,1))+offsets.reshape((1,1,-1)))*np.ones((1,offsets.shape[0],1),dtype=int)
+            if self.separable == True:
+                values = (amplitudes[chunk].reshape((-1,1,1))*entry[1].reshape((1,-1,1)))*entry[0].reshape((1,1,-1))
+            else:
+                values = amplitudes[chunk].reshape((-1,1,1))*entry
+            valid      = (patch_rows >= 0) & (patch_rows < nv) & (patch_cols >= 0) & (patch_cols < nu)
+            np.add.at(field,(patch_rows[valid],patch_cols[valid]),values[valid])
+        return field
+
+    def info(self):
+        """
+        Definition to inspect the state of the table, see odak.tools.kernel_cache.info.
+
+        Returns
+        ----------
+        info             : dict
+                           Number of entries, memory in use, memory budget, number of hits and misses.
+        """
+        return self.cache.info()
+
+    def save(self,filename):
+        """
+        Definition to save the table to disk.
+
+        Parameters
+        ----------
+        filename         : str
+                           Filename of the table (.npz).
+        """
+        arrays   = {}
+        settings = [self.dx,np.nan,float(self.separable),np.nan]
+        if type(self.depth_step) != type(None):
+            settings[1] = self.depth_step
+        if type(self.max_support) != type(None):
+            settings[3] = self.max_support
+        keys     = []
+        for i,(key,(entry,_)) in enumerate(self.cache.entries.items()):
+            keys.append(key)
+            if isinstance(entry,tuple):
+                arrays['entry_{}_0'.format(i)] = entry[0]
+                arrays['entry_{}_1'.format(i)] = entry[1]
+            else:
+                arrays['entry_{}'.format(i)]   = entry
+        arrays['keys']     = np.asarray(keys,dtype=np.float64).reshape((-1,4))
+        arrays['settings'] = np.asarray(settings,dtype=np.float64)
+        if np.__name__ == 'cupy':
+            arrays = {name: np.asnumpy(value) for name,value in arrays.items()}
+        np_save(filename,**arrays)
+
+    def load(self,filename):
+        """
+        Definition to load a table from disk, settings of the table are replaced with the saved ones and the saved entries are added.
+
+        Parameters
+        ----------
+        filename         : str
+                           Filename of the table (.npz).
+        """
+        data             = np_load(filename)
+        settings         = data['settings']
+        self.dx          = float(settings[0])
+        self.depth_step  = None if np_isnan(settings[1]) else float(settings[1])
+        self.separable   = bool(settings[2])
+        self.max_support = None if np_isnan(settings[3]) else int(settings[3])
+        for i,key in enumerate(data['keys']):
+            if 'entry_{}_0'.format(i) in data.files:
+                entry = (np.asarray(data['entry_{}_0'.format(i)]),np.asarray(data['entry_{}_1'.format(i)]))
+            else:
+                entry = np.asarray(data['entry_{}'.format(i)])
+            self.cache.set((float(key[0]),float(key[1]),int(key[2]),int(key[3])),entry)
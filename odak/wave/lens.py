@@ -23,10 +23,9 @@ def quadratic_phase_function(nx,ny,k,focal=0.4,dx=0.001):
                  Generated quadratic phase function.
     """
     size = [ny,nx]
-    x    = np.linspace(-size[0]*dx/2,size[0]*dx/2,size[0])
-    y    = np.linspace(-size[1]*dx/2,size[1]*dx/2,size[1])
-    X,Y  = np.meshgrid(x,y)
-    Z    = X**2+Y**2
+    x    = np.linspace(-size[0]*dx/2,size[0]*dx/2,size[0]).reshape((1,-1))
+    y    = np.linspace(-size[1]*dx/2,size[1]*dx/2,size[1]).reshape((-1,1))
+    Z    = x**2+y**2
     qwf  = np.exp(1j*k*0.5*np.sin(Z/focal))
     return qwf
 
@@ -56,13 +55,13 @@ def prism_phase_function(nx,ny,k,angle,dx=0.001,axis='x'):
     """
     angle = np.radians(angle)
     size  = [ny,nx]
-    x     = np.linspace(-size[0]*dx/2,size[0]*dx/2,size[0])
-    y     = np.linspace(-size[1]*dx/2,size[1]*dx/2,size[1])
-    X,Y   = np.meshgrid(x,y)
+    x     = np.linspace(-size[0]*dx/2,size[0]*dx/2,size[0]).reshape((1,-1))
+    y     = np.linspace(-size[1]*dx/2,size[1]*dx/2,size[1]).reshape((-1,1))
     if axis == 'y':
-        prism = np.exp(-1j*k*np.sin(angle)*Y)
+        prism = np.exp(-1j*k*np.sin(angle)*y)
     elif axis == 'x':
-        prism = np.exp(-1j*k*np.sin(angle)*X)
+        prism = np.exp(-1j*k*np.sin(angle)*x)
+    prism = np.broadcast_to(prism,(size[1],size[0])).copy()
     return prism
 
 def freeform(nx,ny,k,distances,dx=0.001):
@@ -88,10 +87,9 @@ def freeform(nx,ny,k,distances,dx=0.001):
                  Generated pattern.
     """
     size  = [ny,nx]
-    x     = np.linspace(-size[0]*dx/2,size[0]*dx/2,size[0])
-    y     = np.linspace(-size[1]*dx/2,size[1]*dx/2,size[1])
-    X,Y   = np.meshgrid(x,y)
-    Z     = X**2+Y**2
+    x     = np.linspace(-size[0]*dx/2,size[0]*dx/2,size[0]).reshape((1,-1))
+    y     = np.linspace(-size[1]*dx/2,size[1]*dx/2,size[1]).reshape((-1,1))
+    Z     = x**2+y**2
     field = np.exp(1j*k*0.5*np.sin(Z/distances))
     return field
 
@@ -120,18 +118,16 @@ def plane_tilt(nx,ny,k,focals,dx=0.001,axis='x'):
                  Field to tilt a plane.
     """
     size       = [ny,nx]
-    x          = np.linspace(-size[0]*dx/2,size[0]*dx/2,size[0])
-    y          = np.linspace(-size[1]*dx/2,size[1]*dx/2,size[1])
-    X,Y        = np.meshgrid(x,y)
-    Z          = X**2+Y**2
+    x          = np.linspace(-size[0]*dx/2,size[0]*dx/2,size[0]).reshape((1,-1))
+    y          = np.linspace(-size[1]*dx/2,size[1]*dx/2,size[1]).reshape((-1,1))
+    Z          = x**2+y**2
     if np.all((focals==0)):
         raise Exception("Focals must be non zero.")
-    focal_x    = np.geomspace(focals[0],focals[1],size[0])
-    focal_y    = np.geomspace(focals[2],focals[3],size[1])
-    FX,FY      = np.meshgrid(focal_x,focal_y)
+    focal_x    = np.geomspace(focals[0],focals[1],size[0]).reshape((1,-1))
+    focal_y    = np.geomspace(focals[2],focals[3],size[1]).reshape((-1,1))
     field      = np.ones((nx,ny),dtype=np.complex64)
     if axis == 'x' or axis == 'xy':
-        field *= np.exp(1j*k*0.5*np.sin(Z/FX))
+        field *= np.exp(1j*k*0.5*np.sin(Z/focal_x))
     if axis == 'y' or axis == 'xy':
-        field *= np.exp(1j*k*0.5*np.sin(Z/FY))
+        field *= np.exp(1j*k*0.5*np.sin(Z/focal_y))
     return field
@@ -0,0 +1,38 @@
+import sys
+from odak import np
+import torch
+from odak.wave import wavenumber,propagate_beam
+from odak.learn.wave import propagate_beam as propagate_beam_torch
+
+def test():
+    wavelength          = 0.5*pow(10,-6)
+    pixeltom            = 6*pow(10,-6)
+    distance            = 0.01
+    k                   = wavenumber(wavelength)
+    fields              = np.random.rand(2,3,32,32)*np.exp(1j*2*np.pi*np.random.rand(2,3,32,32))
+    propagation_types   = [
+                           'IR Fresnel',
+                           'Angular Spectrum',
+                           'Bandlimited Angular Spectrum',
+                           'TR Fresnel',
+                           'Fraunhofer',
+                           'Bandextended Angular Spectrum',
+                          ]
+    for propagation_type in propagation_types:
+        results         = propagate_beam(fields,k,distance,pixeltom,wavelength,propagation_type)
+        assert results.shape == fields.shape
+        for i in range(fields.shape[0]):
+            for j in range(fields.shape[1]):
+                result = propagate_beam(fields[i,j],k,distance,pixeltom,wavelength,propagation_type)
+                assert np.allclose(results[i,j],result)
+    if np.__name__ == 'cupy':
+        fields = np.asnumpy(fields)
+    fields              = torch.from_numpy(fields)
+    for propagation_type in ['IR Fresnel','Bandlimited Angular Spectrum','TR Fresnel','Fraunhofer']:
+        results         = propagate_beam_torch(fields,k,distance,pixeltom,wavelength,propagation_type)
+        assert results.shape == fields.shape
+        result          = propagate_beam_torch(fields[1,2],k,distance,pixeltom,wavelength,propagation_type)
+        assert torch.allclose(results[1,2],result)
+
+if __name__ == '__main__':
+    sys.exit(test())
@@ -0,0 +1,29 @@
+import sys
+from odak import np
+from odak.wave import wavenumber,propagate_beam,fft_backend,get_fft_backend,set_fft_backend
+
+def test():
+    wavelength          = 0.5*pow(10,-6)
+    pixeltom            = 6*pow(10,-6)
+    distance            = 0.2
+    k                   = wavenumber(wavelength)
+    field               = np.random.rand(2,64,64)*np.exp(1j*2*np.pi*np.random.rand(2,64,64))
+    ground_truth        = propagate_beam(field,k,distance,pixeltom,wavelength,'Bandlimited Angular Spectrum')
+    backends            = ['scipy']
+    try:
+        import pyfftw
+        backends.append('pyfftw')
+    except:
+        pass
+    for backend in backends:
+        with fft_backend(backend,workers=2):
+            assert get_fft_backend()['backend'] == backend
+            result      = propagate_beam(field,k,distance,pixeltom,wavelength,'Bandlimited Angular Spectrum')
+        assert np.allclose(result,ground_truth)
+        assert get_fft_backend()['backend'] == 'numpy'
+    set_fft_backend('scipy',workers=-1)
+    assert get_fft_backend()['workers'] > 0
+    set_fft_backend('numpy')
+
+if __name__ == '__main__':
+    sys.exit(test())
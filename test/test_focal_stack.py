@@ -0,0 +1,22 @@
+import sys
+from odak import np
+from odak.wave import wavenumber,propagate_beam,propagate_focal_stack,focal_stack_generator
+
+def test():
+    wavelength          = 0.5*pow(10,-6)
+    pixeltom            = 6*pow(10,-6)
+    k                   = wavenumber(wavelength)
+    distances           = np.linspace(0.01,0.05,5)
+    field               = np.random.rand(48,48)*np.exp(1j*2*np.pi*np.random.rand(48,48))
+    for propagation_type in ['Bandlimited Angular Spectrum','TR Fresnel','Fraunhofer','Rayleigh-Sommerfeld']:
+        if propagation_type == 'Rayleigh-Sommerfeld':
+            field = field[20:28,20:28]
+        volume          = propagate_focal_stack(field,k,distances,pixeltom,wavelength,propagation_type,chunk_size=2)
+        assert volume.shape == (distances.shape[0],)+field.shape
+        for i,result in enumerate(focal_stack_generator(field,k,distances,pixeltom,wavelength,propagation_type)):
+            ground_truth = propagate_beam(field,k,distances[i],pixeltom,wavelength,propagation_type)
+            assert np.allclose(result,ground_truth)
+            assert np.allclose(volume[i],ground_truth)
+
+if __name__ == '__main__':
+    sys.exit(test())
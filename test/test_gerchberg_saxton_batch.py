@@ -0,0 +1,33 @@
+import sys
+from odak import np
+import torch
+from odak.wave import gerchberg_saxton,gerchberg_saxton_batch
+from odak.learn.wave import gerchberg_saxton as gerchberg_saxton_torch
+from odak.learn.wave import gerchberg_saxton_batch as gerchberg_saxton_batch_torch
+
+def test():
+    wavelength               = 0.000000532
+    dx                       = 0.0000064
+    distance                 = 0.01
+    fields                   = np.zeros((3,64,64),dtype=np.complex64)
+    fields[0,16:48,16:48]    = 1.
+    fields[1,8:56,24:40]     = 1.
+    fields[2,0::8,:]         = 1.
+    holograms,reconstructions,errors = gerchberg_saxton_batch(fields,20,distance,dx,wavelength,np.pi*2,'IR Fresnel',tolerance=1e-4,return_errors=True)
+    assert holograms.shape == fields.shape
+    for m in range(fields.shape[0]):
+        hologram,reconstruction,single_errors = gerchberg_saxton(fields[m],20,distance,dx,wavelength,np.pi*2,'IR Fresnel',tolerance=1e-4,return_errors=True)
+        assert np.allclose(errors[m],single_errors)
+        assert np.allclose(holograms[m],hologram)
+        assert np.allclose(reconstructions[m],reconstruction)
+    if np.__name__ == 'cupy':
+        fields = np.asnumpy(fields)
+    fields                   = torch.from_numpy(fields)
+    holograms,reconstructions,errors = gerchberg_saxton_batch_torch(fields,20,distance,dx,wavelength,np.pi*2,'IR Fresnel',tolerance=1e-4,return_errors=True)
+    for m in range(fields.shape[0]):
+        hologram,reconstruction,single_errors = gerchberg_saxton_torch(fields[m],20,distance,dx,wavelength,np.pi*2,'IR Fresnel',tolerance=1e-4,return_errors=True)
+        assert np.allclose(errors[m],single_errors)
+        assert torch.allclose(holograms[m],hologram.to(holograms.dtype))
+
+if __name__ == '__main__':
+    sys.exit(test())
@@ -0,0 +1,26 @@
+import sys
+from odak import np
+import torch
+from odak.wave import gerchberg_saxton,reconstruction_error
+from odak.learn.wave import gerchberg_saxton as gerchberg_saxton_torch
+
+def test():
+    wavelength               = 0.000000532
+    dx                       = 0.0000064
+    distance                 = 0.01
+    field                    = np.zeros((64,64),dtype=np.complex64)
+    field[16:48,16:48]       = 1.
+    field[24:40,24:40]       = 0.5
+    hologram,reconstruction,errors = gerchberg_saxton(field,100,distance,dx,wavelength,np.pi*2,'IR Fresnel',tolerance=1e-4,return_errors=True)
+    assert len(errors) < 100
+    assert errors[-1] < errors[0]
+    assert np.isclose(reconstruction_error(reconstruction,field),errors[-1])
+    if np.__name__ == 'cupy':
+        field = np.asnumpy(field)
+    field                    = torch.from_numpy(field)
+    hologram,reconstruction,errors = gerchberg_saxton_torch(field,100,distance,dx,wavelength,np.pi*2,'IR Fresnel',tolerance=1e-4,return_errors=True)
+    assert len(errors) < 100
+    assert errors[-1] < errors[0]
+
+if __name__ == '__main__':
+    sys.exit(test())
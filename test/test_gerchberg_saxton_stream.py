@@ -0,0 +1,41 @@
+import sys
+from odak import np
+import torch
+from odak.wave import gerchberg_saxton_stream
+from odak.learn.wave import gerchberg_saxton_stream as gerchberg_saxton_stream_torch
+
+def frames(n_frames,torch_tensor=False):
+    for t in range(n_frames):
+        field                      = np.zeros((128,128),dtype=np.complex64)
+        field[40+t:80+t,30:90]     = 1.
+        field[20:30,20+2*t:40+2*t] = 1.
+        if torch_tensor == True:
+            if np.__name__ == 'cupy':
+                field = np.asnumpy(field)
+            field = torch.from_numpy(field)
+        yield field
+
+def test():
+    wavelength               = 0.000000532
+    dx                       = 0.000008
+    distance                 = 0.01
+    n_frames                 = 8
+    for torch_tensor,stream in [(False,gerchberg_saxton_stream),(True,gerchberg_saxton_stream_torch)]:
+        iterations           = []
+        final_errors         = []
+        for warm_start in [False,True]:
+            results          = stream(frames(n_frames,torch_tensor),100,distance,dx,wavelength,np.pi*2,'IR Fresnel',tolerance=1e-4,warm_start=warm_start,return_errors=True)
+            counts           = []
+            errors           = []
+            for hologram,reconstruction,frame_errors in results:
+                assert hologram.shape == (128,128)
+                counts.append(len(frame_errors))
+                errors.append(frame_errors[-1])
+            assert len(counts) == n_frames
+            iterations.append(sum(counts))
+            final_errors.append(np.mean(np.asarray(errors)))
+        assert iterations[1] < iterations[0]
+        assert final_errors[1] < final_errors[0]+0.01
+
+if __name__ == '__main__':
+    sys.exit(test())
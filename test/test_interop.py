@@ -0,0 +1,76 @@
+import sys
+from odak import np
+import torch
+import odak.wave
+import odak.learn.wave
+from odak.tools import to_numpy,to_torch,is_torch
+
+def test():
+    wavelength          = 0.000000532
+    dx                  = 0.000008
+    distance            = 0.01
+    k                   = odak.wave.wavenumber(wavelength)
+    field               = np.zeros((64,64),dtype=np.complex128)
+    field[24:40,24:40]  = 1.
+    tensor              = to_torch(field)
+    assert is_torch(tensor) == True
+    assert is_torch(field) == False
+    array               = to_numpy(tensor)
+    if np.__name__ != 'cupy':
+        assert tensor.data_ptr() == field.ctypes.data
+        assert array.ctypes.data == field.ctypes.data
+    assert np.allclose(to_numpy(torch.conj(tensor)),np.conj(field))
+    result_numpy        = odak.wave.propagate_beam(field,k,distance,dx,wavelength,'IR Fresnel')
+    result              = odak.wave.propagate_beam(tensor,k,distance,dx,wavelength,'IR Fresnel')
+    assert is_torch(result) == True
+    assert np.allclose(to_numpy(result),result_numpy)
+    result_torch        = odak.learn.wave.propagate_beam(tensor,k,distance,dx,wavelength,'IR Fresnel')
+    result              = odak.learn.wave.propagate_beam(field,k,distance,dx,wavelength,'IR Fresnel')
+    assert is_torch(result) == False
+    assert np.allclose(result,to_numpy(result_torch))
+    beam                = odak.wave.propagator(field.shape,dx,wavelength,distance)
+    assert is_torch(beam.forward(tensor)) == True
+    assert is_torch(beam.adjoint(tensor)) == True
+    beam                = odak.learn.wave.propagator(field.shape,dx,wavelength,distance)
+    assert is_torch(beam.forward(field)) == False
+    assert is_torch(beam.adjoint(field)) == False
+    wavelengths         = [0.000000450,0.000000532]
+    distances           = [0.01,0.02,0.03]
+    fields              = np.stack([field,field])
+    tensors             = to_torch(fields)
+    for function,arguments in [
+                               (odak.wave.propagate_beam_spectral,(distance,dx,wavelengths)),
+                               (odak.wave.broadband_intensity,(distance,dx,wavelengths)),
+                               (odak.wave.propagate_focal_stack,(k,distances,dx,wavelength))
+                              ]:
+        result          = function(tensors,*arguments)
+        assert is_torch(result) == True
+        assert np.allclose(to_numpy(result),function(fields,*arguments))
+    results             = list(odak.wave.focal_stack_generator(tensor,k,distances,dx,wavelength))
+    assert is_torch(results[0]) == True
+    assert np.allclose(to_numpy(results[-1]),odak.wave.propagate_beam(field,k,distances[-1],dx,wavelength))
+    for function,arguments in [
+                               (odak.learn.wave.propagate_beam_spectral,(distance,dx,wavelengths)),
+                               (odak.learn.wave.broadband_intensity,(distance,dx,wavelengths))
+                              ]:
+        result          = function(fields,*arguments)
+        assert is_torch(result) == False
+        assert np.allclose(result,to_numpy(function(tensors,*arguments)))
+    for module,data,other in [(odak.wave,tensor,field),(odak.learn.wave,field,tensor)]:
+        hologram,reconstruction = module.gerchberg_saxton(data,3,distance,dx,wavelength)
+        assert is_torch(hologram) == is_torch(data) and is_torch(reconstruction) == is_torch(data)
+        assert np.allclose(to_numpy(reconstruction),to_numpy(module.gerchberg_saxton(other,3,distance,dx,wavelength)[1]))
+        holograms,reconstructions = module.gerchberg_saxton_batch(data[None],3,distance,dx,wavelength)
+        assert is_torch(holograms) == is_torch(data)
+        assert np.allclose(to_numpy(reconstructions[0]),to_numpy(reconstruction))
+        for hologram,reconstruction in module.gerchberg_saxton_stream([data,data],3,distance,dx,wavelength):
+            assert is_torch(hologram) == is_torch(data) and is_torch(reconstruction) == is_torch(data)
+    targets             = np.ones((1,1,16,16))
+    hologram,reconstruction = odak.learn.wave.gradient_descent(targets,[distance],dx,[wavelength],n_iterations=2)
+    assert is_torch(hologram) == False and is_torch(reconstruction) == False
+    wavelength          = torch.tensor(wavelength,requires_grad=True)
+    odak.learn.wave.wavenumber(wavelength).backward()
+    assert type(wavelength.grad) != type(None)
+
+if __name__ == '__main__':
+    sys.exit(test())
@@ -0,0 +1,41 @@
+import sys
+from odak import np
+from odak.wave import wavenumber,propagate_beam,clear_kernel_cache,get_kernel_cache_info,set_kernel_cache_budget
+
+def test():
+    wavelength          = 0.5*pow(10,-6)
+    pixeltom            = 6*pow(10,-6)
+    distance            = 0.2
+    propagation_type    = 'Bandlimited Angular Spectrum'
+    k                   = wavenumber(wavelength)
+    sample_field        = np.zeros((100,100),dtype=np.complex64)
+    sample_field[
+                 40:60,
+                 40:60
+                ]       = 1
+    clear_kernel_cache()
+    for sweep_distance in [0.1,0.15,0.25]:
+        propagate_beam(sample_field,k,sweep_distance,pixeltom,wavelength,propagation_type)
+    assert get_kernel_cache_info()['entries'] == 0
+    result_0            = propagate_beam(sample_field,k,distance,pixeltom,wavelength,propagation_type)
+    result_1            = propagate_beam(sample_field,k,distance,pixeltom,wavelength,propagation_type)
+    result_2            = propagate_beam(sample_field,k,distance,pixeltom,wavelength,propagation_type)
+    info                = get_kernel_cache_info()
+    assert info['entries'] == 1
+    assert info['hits'] == 1
+    assert info['misses'] == 5
+    assert np.allclose(result_0,result_1)
+    assert np.allclose(result_0,result_2)
+    for propagation_type in ['IR Fresnel','TR Fresnel','Bandlimited Angular Spectrum','Rayleigh-Sommerfeld']:
+        ground_truth    = propagate_beam(sample_field,k,distance,pixeltom,wavelength,propagation_type)
+        for i in range(2):
+            result      = propagate_beam(sample_field,np.array(k),np.array(distance),pixeltom,np.array(wavelength),propagation_type)
+            assert np.allclose(result,ground_truth)
+    set_kernel_cache_budget(0)
+    assert get_kernel_cache_info()['entries'] == 0
+    set_kernel_cache_budget(2**29)
+    clear_kernel_cache()
+    assert get_kernel_cache_info()['size'] == 0
+
+if __name__ == '__main__':
+    sys.exit(test())
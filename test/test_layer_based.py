@@ -0,0 +1,25 @@
+import sys
+from odak import np
+from odak.wave import wavenumber,point_wise,layer_based,propagate_beam
+
+def test():
+    wavelength             = 0.5*pow(10,-6)
+    pixeltom               = 8*pow(10,-6)
+    k                      = wavenumber(wavelength)
+    shape                  = [33,31]
+    field                  = np.random.rand(*shape)*np.exp(1j*2*np.pi*np.random.rand(*shape))
+    distances              = np.random.choice([0.,0.01,0.02,0.03],size=shape)
+    field[distances == 0]  = 0
+    ground_truth           = point_wise(field,distances,k,pixeltom,wavelength)
+    hologram               = layer_based(field,distances,k,pixeltom,wavelength,chunk_size=2)
+    assert hologram.shape == ground_truth.shape
+    assert np.linalg.norm(hologram-ground_truth) < 1e-5*np.linalg.norm(ground_truth)
+    hologram               = layer_based(field,distances,k,pixeltom,wavelength,n_layers=2)
+    assert hologram.shape == ground_truth.shape
+    distances[...]         = 0.02
+    hologram               = layer_based(field,distances,k,pixeltom,wavelength,occlusion=True)
+    ground_truth           = propagate_beam(field,k,0.02,pixeltom,wavelength,'Bandlimited Angular Spectrum')
+    assert np.allclose(hologram,ground_truth,atol=1e-5)
+
+if __name__ == '__main__':
+    sys.exit(test())
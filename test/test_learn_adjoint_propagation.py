@@ -0,0 +1,34 @@
+import sys
+import torch
+from odak.wave import wavenumber
+from odak.learn.wave import build_propagation_kernel,kernel_propagation,propagator,propagate_chain
+
+def test():
+    torch.manual_seed(0)
+    wavelength          = 0.000000532
+    dx                  = 0.000008
+    k                   = wavenumber(wavelength)
+    H                   = build_propagation_kernel(8,8,k,0.001,dx,wavelength,'IR Fresnel').to(torch.complex128)
+    field               = torch.rand((2,8,8),dtype=torch.complex128,requires_grad=True)
+    assert torch.autograd.gradcheck(kernel_propagation.apply,(field,H))
+    kernels             = torch.stack([H,torch.conj(H)])
+    field               = torch.rand((8,8),dtype=torch.float64,requires_grad=True)
+    assert torch.autograd.gradcheck(kernel_propagation.apply,(field,kernels))
+    beam                = propagator((32,32),dx,wavelength,0.01,'IR Fresnel')
+    masks               = [torch.rand((32,32),dtype=torch.float64,requires_grad=True) for i in range(4)]
+    steps               = []
+    for mask in masks:
+        steps.append(lambda field,mask=mask: field*torch.exp(1j*mask))
+        steps.append(beam.forward)
+    field               = torch.ones((32,32),dtype=torch.complex128)
+    gradients           = []
+    for segments in [None,2]:
+        for mask in masks:
+            mask.grad = None
+        result          = propagate_chain(field,steps,segments)
+        torch.sum(torch.abs(result)**2*torch.linspace(0,1,32)).backward()
+        gradients.append(torch.stack([mask.grad for mask in masks]))
+    assert torch.allclose(gradients[0],gradients[1])
+
+if __name__ == '__main__':
+    sys.exit(test())
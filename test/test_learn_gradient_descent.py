@@ -0,0 +1,43 @@
+import sys
+import torch
+from odak.learn.wave import gradient_descent
+
+def test():
+    torch.manual_seed(0)
+    wavelengths              = [0.000000450,0.000000532]
+    distances                = [0.01,0.012]
+    dx                       = 0.000008
+    targets                  = torch.zeros((2,2,64,64))
+    targets[:,0,16:32,16:32] = 1.
+    targets[:,1,32:48,32:48] = 1.
+    targets                  = targets.unsqueeze(0)
+    threads                  = torch.get_num_threads()
+    hologram,reconstruction,errors = gradient_descent(
+                                                      targets,
+                                                      distances,
+                                                      dx,
+                                                      wavelengths,
+                                                      n_iterations=30,
+                                                      learning_rate=0.1,
+                                                      scheduler=lambda optimizer: torch.optim.lr_scheduler.StepLR(optimizer,10,0.5),
+                                                      n_threads=1,
+                                                      return_errors=True
+                                                     )
+    assert hologram.shape == (1,2,64,64)
+    assert reconstruction.shape == (1,2,2,64,64)
+    assert torch.allclose(torch.abs(hologram),torch.ones_like(torch.abs(hologram)))
+    assert errors[-1] < errors[0]
+    assert torch.get_num_threads() == threads
+    hologram,reconstruction,errors = gradient_descent(targets,distances,dx,wavelengths,n_iterations=5,learning_rate=1.,optimizer='LBFGS',return_errors=True)
+    assert errors[-1] < errors[0]
+    hologram,reconstruction,errors = gradient_descent(targets,distances,dx,wavelengths,n_iterations=100,tolerance=1.,patience=3,return_errors=True)
+    assert len(errors) == 4
+    for wrong_targets in [targets[0,0],targets[:,0:1]]:
+        try:
+            gradient_descent(wrong_targets,distances,dx,wavelengths,n_iterations=1)
+            assert False
+        except ValueError:
+            pass
+
+if __name__ == '__main__':
+    sys.exit(test())
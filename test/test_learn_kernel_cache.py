@@ -0,0 +1,43 @@
+import sys
+import torch
+from odak.wave import wavenumber
+from odak.learn.wave import propagate_beam,build_propagation_kernel,get_propagation_kernel,clear_kernel_cache,get_kernel_cache_info
+
+def test():
+    wavelength          = 0.5*pow(10,-6)
+    pixeltom            = 6*pow(10,-6)
+    distance            = 0.2
+    k                   = wavenumber(wavelength)
+    sample_field        = torch.zeros((2,100,100),dtype=torch.complex64)
+    sample_field[
+                 :,
+                 40:60,
+                 40:60
+                ]       = 1
+    clear_kernel_cache()
+    for propagation_type in ['IR Fresnel','Bandlimited Angular Spectrum','TR Fresnel','Fraunhofer']:
+        result_0        = propagate_beam(sample_field,k,distance,pixeltom,wavelength,propagation_type)
+        result_1        = propagate_beam(sample_field[0],k,distance,pixeltom,wavelength,propagation_type)
+        assert torch.allclose(result_0[0],result_1)
+        assert result_0.dtype == torch.complex64
+        H               = get_propagation_kernel(100,100,k,distance,pixeltom,wavelength,propagation_type,device=sample_field.device,dtype=sample_field.dtype)
+        assert H.dtype == torch.complex64
+        assert torch.allclose(H,build_propagation_kernel(100,100,k,distance,pixeltom,wavelength,propagation_type,dtype=sample_field.dtype))
+    info                = get_kernel_cache_info()
+    assert info['entries'] == 4
+    assert info['misses'] == 4
+    assert info['hits'] == 8
+    result_2            = propagate_beam(sample_field.to(torch.complex128),k,distance,pixeltom,wavelength,'Fraunhofer')
+    assert result_2.dtype == torch.complex128
+    assert torch.allclose(result_2.to(torch.complex64),result_0,atol=1e-5*float(torch.abs(result_0).max()))
+    assert get_kernel_cache_info()['entries'] == 5
+    distance            = torch.tensor(distance,requires_grad=True)
+    result              = propagate_beam(sample_field,k,distance,pixeltom,wavelength,'IR Fresnel')
+    torch.sum(torch.abs(result)).backward()
+    assert type(distance.grad) != type(None)
+    assert get_kernel_cache_info()['entries'] == 5
+    clear_kernel_cache()
+    assert get_kernel_cache_info()['size'] == 0
+
+if __name__ == '__main__':
+    sys.exit(test())
@@ -0,0 +1,23 @@
+import sys
+import torch
+from odak.wave import wavenumber
+from odak.learn.wave import build_propagation_kernel,apply_propagation_kernel
+from odak.learn.wave.toolkit import fftshift,ifftshift,roll_torch
+
+def test():
+    wavelength          = 0.5*pow(10,-6)
+    pixeltom            = 6*pow(10,-6)
+    distance            = 0.05
+    k                   = wavenumber(wavelength)
+    for nv,nu in [(64,64),(63,65)]:
+        field           = torch.rand((2,nv,nu),dtype=torch.float64)*torch.exp(1j*torch.rand((2,nv,nu),dtype=torch.float64))
+        shifted         = roll_torch(roll_torch(field,nv//2,-2),nu//2,-1)
+        assert torch.equal(fftshift(field),shifted)
+        assert torch.equal(ifftshift(fftshift(field)),field)
+        H               = build_propagation_kernel(nv,nu,k,distance,pixeltom,wavelength,'IR Fresnel')
+        ground_truth    = ifftshift(torch.fft.ifft2(H*torch.fft.fft2(fftshift(field))))
+        result          = apply_propagation_kernel(field,H)
+        assert torch.allclose(result,ground_truth)
+
+if __name__ == '__main__':
+    sys.exit(test())
@@ -0,0 +1,59 @@
+import sys
+from odak import np
+import finufft
+import odak.tools.matrix
+from odak.tools import nufft2,nuifft2,get_nufft_plan_cache_info,clear_nufft_plan_cache
+from odak.wave import wavenumber,propagate_beam
+
+def test():
+    if np.__name__ == 'cupy':
+        return True
+    field           = np.random.random((64,48))+1j*np.random.random((64,48))
+    x               = np.linspace(-np.pi,np.pi,48)*0.9
+    y               = np.linspace(-np.pi,np.pi,64)*0.9
+    X,Y             = np.meshgrid(x,y)
+    clear_nufft_plan_cache()
+    ground_truth    = finufft.nufft2d2(X.flatten(),Y.flatten(),field,eps=10**(-12),isign=-1).reshape(field.shape)
+    result          = nufft2(field,X,Y,sign=-1)
+    assert np.allclose(result,ground_truth)
+    result          = nufft2(field,X,Y,sign=-1)
+    info            = get_nufft_plan_cache_info()
+    assert info['entries'] == 1
+    assert info['hits'] == 1
+    ground_truth    = finufft.nufft2d1(X.flatten(),Y.flatten(),field.flatten(),(32,32),eps=10**(-12),isign=1)
+    result          = nuifft2(field,X,Y,size=[32,32],sign=1,nthreads=1)
+    assert np.allclose(result,ground_truth)
+    fields          = np.stack([field,2*field,np.conj(field)])
+    results         = nufft2(fields,X,Y,sign=-1)
+    assert np.allclose(results[2],nufft2(np.conj(field),X,Y,sign=-1))
+    results         = nuifft2(fields,X,Y,size=[32,32],sign=1,nthreads=1)
+    assert np.allclose(results[1],2*nuifft2(field,X,Y,size=[32,32],sign=1,nthreads=1))
+    clear_nufft_plan_cache()
+    assert get_nufft_plan_cache_info()['entries'] == 0
+    ground_truth    = nufft2(field,X,Y,sign=-1,cache=False)
+    result          = nufft2(field,X,Y,sign=-1,key='grid')
+    assert np.allclose(result,ground_truth)
+    result          = nufft2(field,X,Y,sign=-1,key='grid')
+    info            = get_nufft_plan_cache_info()
+    assert info['entries'] == 1
+    assert info['hits'] == 1
+    result          = nufft2(field,X,Y,sign=-1)
+    assert get_nufft_plan_cache_info()['entries'] == 2
+    clear_nufft_plan_cache()
+    wavelength      = 0.000000532
+    hashlib         = odak.tools.matrix.hashlib
+    odak.tools.matrix.hashlib = None
+    try:
+        for propagation_type in ['Bandextended Angular Spectrum','Adaptive Sampling Angular Spectrum']:
+            ground_truth = propagate_beam(field,wavenumber(wavelength),0.01,0.000008,wavelength,propagation_type)
+            result       = propagate_beam(field,wavenumber(wavelength),0.01,0.000008,wavelength,propagation_type)
+            assert np.allclose(result,ground_truth)
+    finally:
+        odak.tools.matrix.hashlib = hashlib
+    info            = get_nufft_plan_cache_info()
+    assert info['entries'] == 4
+    assert info['hits'] == 4
+    clear_nufft_plan_cache()
+
+if __name__ == '__main__':
+    sys.exit(test())
@@ -0,0 +1,33 @@
+import sys
+from odak import np
+from odak.tools import zero_pad,crop_center,fast_fft_size
+from odak.wave import wavenumber,propagate_beam
+from odak.wave.classical import workspace_cache
+
+def test():
+    wavelength          = 0.5*pow(10,-6)
+    pixeltom            = 6*pow(10,-6)
+    distance            = 0.01
+    k                   = wavenumber(wavelength)
+    field               = np.random.rand(40,40)*np.exp(1j*2*np.pi*np.random.rand(40,40))
+    assert fast_fft_size(79) == 80
+    assert fast_fft_size(97) == 98
+    for propagation_type in ['IR Fresnel','Bandlimited Angular Spectrum','TR Fresnel']:
+        ground_truth    = crop_center(propagate_beam(zero_pad(field),k,distance,pixeltom,wavelength,propagation_type))
+        for i in range(2):
+            result      = propagate_beam(field,k,distance,pixeltom,wavelength,propagation_type,padding='2x')
+            assert np.allclose(result,ground_truth)
+        result          = propagate_beam(np.stack([field,field]),k,distance,pixeltom,wavelength,propagation_type,padding='fast')
+        assert result.shape == (2,40,40)
+        assert np.allclose(result[0],result[1])
+        fields          = [field,field[:39,:39]]
+        ground_truths   = []
+        for field_m in fields:
+            workspace_cache.clear()
+            ground_truths.append(propagate_beam(field_m,k,distance,pixeltom,wavelength,propagation_type,padding='fast'))
+        for field_m,ground_truth in zip(fields,ground_truths):
+            result      = propagate_beam(field_m,k,distance,pixeltom,wavelength,propagation_type,padding='fast')
+            assert np.allclose(result,ground_truth)
+
+if __name__ == '__main__':
+    sys.exit(test())
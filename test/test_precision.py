@@ -0,0 +1,38 @@
+import sys
+from odak import np
+import torch
+from odak.tools import set_precision,get_precision,working_precision
+from odak.wave import wavenumber,propagate_beam
+from odak.learn.wave import propagate_beam as propagate_beam_torch
+
+def test():
+    previous            = get_precision()
+    try:
+        wavelength          = 0.5*pow(10,-6)
+        pixeltom            = 6*pow(10,-6)
+        distance            = 0.2
+        k                   = wavenumber(wavelength)
+        shape               = [64,64]
+        field               = np.zeros(shape,dtype=np.complex128)
+        field[24:40,24:40]  = 1
+        for propagation_type in ['IR Fresnel','Angular Spectrum','Bandlimited Angular Spectrum','TR Fresnel','Fraunhofer','Rayleigh-Sommerfeld']:
+            ground_truth    = propagate_beam(field,k,distance,pixeltom,wavelength,propagation_type)
+            with working_precision('single'):
+                assert get_precision() == 'single'
+                result      = propagate_beam(field.astype(np.complex64),k,distance,pixeltom,wavelength,propagation_type)
+            assert get_precision() == 'double'
+            assert result.dtype == np.complex64
+            error           = np.linalg.norm(result-ground_truth)/np.linalg.norm(ground_truth)
+            assert error < 1e-4
+        field_torch         = torch.from_numpy(field) if np.__name__ == 'numpy' else torch.from_numpy(np.asnumpy(field))
+        ground_truth        = propagate_beam_torch(field_torch,k,distance,pixeltom,wavelength,'TR Fresnel')
+        set_precision('single')
+        result              = propagate_beam_torch(field_torch.to(torch.complex64),k,distance,pixeltom,wavelength,'TR Fresnel')
+        set_precision('double')
+        assert result.dtype == torch.complex64
+        assert torch.linalg.norm(result-ground_truth)/torch.linalg.norm(ground_truth) < 1e-4
+    finally:
+        set_precision(previous)
+
+if __name__ == '__main__':
+    sys.exit(test())
@@ -0,0 +1,38 @@
+import sys
+from odak import np
+from odak.wave import wavenumber,propagate_beam,propagator,select_propagation_type
+
+def test():
+    wavelength          = 0.000000532
+    k                   = wavenumber(wavelength)
+    dx                  = 0.000008
+    shape               = [512,512]
+    propagation_type,report = select_propagation_type(shape,k,0.001,dx,wavelength)
+    assert propagation_type == 'TR Fresnel'
+    assert np.isclose(report['critical_distance'],512*dx**2/wavelength)
+    propagation_type,report = select_propagation_type(shape,k,1.,dx,wavelength)
+    assert propagation_type == 'IR Fresnel'
+    propagation_type,report = select_propagation_type(shape,k,0.1,dx,wavelength)
+    assert propagation_type not in ['TR Fresnel','IR Fresnel','Bandlimited Angular Spectrum']
+    for candidate in report['candidates']:
+        if candidate['valid'] == True:
+            assert candidate['cost'] >= report['cost']
+    field               = np.zeros((64,64),dtype=np.complex64)
+    field[24:40,24:40]  = 1.
+    for distance in [0.0001,0.001,0.1]:
+        propagation_type,report = select_propagation_type(field.shape,k,distance,dx,wavelength)
+        result_auto,report_auto = propagate_beam(field,k,distance,dx,wavelength,'auto',return_report=True)
+        result          = propagate_beam(field,k,distance,dx,wavelength,propagation_type)
+        assert np.allclose(result_auto,result)
+        assert report_auto['propagation_type'] == propagation_type
+        assert report_auto['cost'] == report['cost']
+        _,report_fixed  = propagate_beam(field,k,distance,dx,wavelength,propagation_type,return_report=True)
+        assert type(report_fixed) == type(None)
+        beam            = propagator(field.shape,dx,wavelength,distance,'auto')
+        assert beam.propagation_type == propagation_type
+        assert beam.report['propagation_type'] == propagation_type
+        result_padded   = propagate_beam(field,k,distance,dx,wavelength,'auto',padding='2x')
+        assert result_padded.shape == field.shape
+
+if __name__ == '__main__':
+    sys.exit(test())
@@ -0,0 +1,37 @@
+import sys
+from odak import np
+import torch
+from odak.wave import wavenumber,propagate_beam,propagator
+from odak.learn.wave import propagate_beam as propagate_beam_torch
+from odak.learn.wave import propagator as propagator_torch
+
+def test():
+    wavelength          = 0.5*pow(10,-6)
+    pixeltom            = 6*pow(10,-6)
+    distance            = 0.2
+    k                   = wavenumber(wavelength)
+    shape               = [64,64]
+    field               = np.random.rand(*shape)*np.exp(1j*2*np.pi*np.random.rand(*shape))
+    other_field         = np.random.rand(*shape)*np.exp(1j*2*np.pi*np.random.rand(*shape))
+    for propagation_type in ['IR Fresnel','Bandlimited Angular Spectrum','TR Fresnel','Fraunhofer']:
+        beam_propagator = propagator(shape,pixeltom,wavelength,distance,propagation_type)
+        result          = beam_propagator.forward(field)
+        ground_truth    = propagate_beam(field,k,distance,pixeltom,wavelength,propagation_type)
+        assert np.allclose(result,ground_truth)
+        left            = np.vdot(other_field,beam_propagator.forward(field))
+        right           = np.vdot(beam_propagator.adjoint(other_field),field)
+        assert np.abs(left-right) < 1e-6*np.abs(left)
+        if np.__name__ == 'cupy':
+            field_torch = torch.from_numpy(np.asnumpy(field))
+        else:
+            field_torch = torch.from_numpy(field)
+        beam_propagator = propagator_torch(shape,pixeltom,wavelength,distance,propagation_type)
+        result          = beam_propagator.forward(field_torch)
+        ground_truth    = propagate_beam_torch(field_torch,k,distance,pixeltom,wavelength,propagation_type)
+        assert torch.allclose(result,ground_truth)
+        left            = torch.vdot(field_torch.flatten(),beam_propagator.forward(field_torch).flatten())
+        right           = torch.vdot(beam_propagator.adjoint(field_torch).flatten(),field_torch.flatten())
+        assert torch.abs(left-right) < 1e-6*torch.abs(left)
+
+if __name__ == '__main__':
+    sys.exit(test())
@@ -0,0 +1,22 @@
+import sys
+from odak import np
+from odak.wave import wavenumber,rayleigh_sommerfeld,propagate_beam
+
+def test():
+    wavelength          = 0.5*pow(10,-6)
+    pixeltom            = 6*pow(10,-6)
+    k                   = wavenumber(wavelength)
+    field               = np.zeros((24,20),dtype=np.complex64)
+    field[3,5]          = 1.
+    field[10:14,8:12]   = np.exp(1j*2*np.pi*np.random.rand(4,4))
+    field[23,0]         = 0.5j
+    for distance in [0.001,-0.002]:
+        ground_truth    = rayleigh_sommerfeld(field,k,distance,pixeltom,wavelength,method='direct')
+        result          = rayleigh_sommerfeld(field,k,distance,pixeltom,wavelength)
+        assert result.shape == field.shape
+        assert np.allclose(result,ground_truth)
+    result              = propagate_beam(np.stack([field,field]),k,0.001,pixeltom,wavelength,'Rayleigh-Sommerfeld')
+    assert np.allclose(result[1],rayleigh_sommerfeld(field,k,0.001,pixeltom,wavelength))
+
+if __name__ == '__main__':
+    sys.exit(test())
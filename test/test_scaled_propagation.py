@@ -0,0 +1,60 @@
+import sys
+from odak import np
+from odak.tools import czt,working_precision
+from odak.wave import wavenumber,scaled_fresnel,scaled_angular_spectrum,propagate_beam_tiled,fft_backend
+import odak.wave.backend as backend
+
+def test():
+    samples             = np.random.rand(3,37)+1j*np.random.rand(3,37)
+    assert np.allclose(czt(samples,37,1./37),np.fft.fft(samples))
+    wavelength          = 0.5*pow(10,-6)
+    pixeltom            = 8*pow(10,-6)
+    k                   = wavenumber(wavelength)
+    field               = np.zeros((32,40),dtype=np.complex128)
+    field[8:24,10:30]   = np.exp(1j*np.random.rand(16,20))
+    distance            = 0.05
+    output_dx           = 5*pow(10,-6)
+    output_shape        = [12,18]
+    output_offset       = [2*pow(10,-5),-4*pow(10,-5)]
+    result              = scaled_fresnel(field,k,distance,pixeltom,wavelength,output_dx,output_shape,output_offset)
+    y                   = ((np.arange(32)-16)*pixeltom).reshape((-1,1))
+    x                   = ((np.arange(40)-20)*pixeltom).reshape((1,-1))
+    ground_truth        = np.zeros(output_shape,dtype=np.complex128)
+    for i in range(output_shape[0]):
+        for j in range(output_shape[1]):
+            y2                = output_offset[0]+(i-output_shape[0]//2)*output_dx
+            x2                = output_offset[1]+(j-output_shape[1]//2)*output_dx
+            ground_truth[i,j] = np.sum(field*np.exp(1j*k/2/distance*((x2-x)**2+(y2-y)**2)))
+    ground_truth       *= np.exp(1j*k*distance)/(1j*wavelength*distance)*pixeltom**2
+    assert np.allclose(result,ground_truth)
+    distance            = 0.002
+    ground_truth        = propagate_beam_tiled(field,k,distance,pixeltom,wavelength,'Angular Spectrum',memory_budget=2**30,guard=200)
+    result              = scaled_angular_spectrum(field,k,distance,pixeltom,wavelength,pixeltom/2,[16,16],[4*pixeltom,6*pixeltom])
+    ground_truth        = ground_truth[16:24,22:30]
+    assert np.linalg.norm(result[::2,::2]-ground_truth) < 1e-2*np.linalg.norm(ground_truth)
+    result              = scaled_fresnel(field,k,distance,pixeltom,wavelength,output_dx,output_shape,output_offset)
+    with working_precision('single'):
+        result_single   = scaled_fresnel(field.astype(np.complex64),k,distance,pixeltom,wavelength,output_dx,output_shape,output_offset)
+    assert result_single.dtype == np.complex64
+    assert np.linalg.norm(result_single-result) < 1e-5*np.linalg.norm(result)
+    if type(backend.scipy_fft) != type(None) and np.__name__ != 'cupy':
+        calls           = []
+        scipy_fft       = backend.scipy_fft
+        class counter():
+            def fft(self,*args,**kwargs):
+                calls.append('fft')
+                return scipy_fft.fft(*args,**kwargs)
+            def ifft(self,*args,**kwargs):
+                calls.append('ifft')
+                return scipy_fft.ifft(*args,**kwargs)
+        backend.scipy_fft = counter()
+        try:
+            with fft_backend('scipy'):
+                result_scipy = czt(samples,37,1./37)
+        finally:
+            backend.scipy_fft = scipy_fft
+        assert len(calls) == 3
+        assert np.allclose(result_scipy,np.fft.fft(samples))
+
+if __name__ == '__main__':
+    sys.exit(test())
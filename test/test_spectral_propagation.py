@@ -0,0 +1,37 @@
+import sys
+from odak import np
+import torch
+from odak.wave import wavenumber,propagate_beam,propagate_beam_spectral,broadband_intensity
+from odak.learn.wave import propagate_beam as propagate_beam_torch
+from odak.learn.wave import propagate_beam_spectral as propagate_beam_spectral_torch
+from odak.learn.wave import broadband_intensity as broadband_intensity_torch
+
+def test():
+    wavelengths         = [0.639*pow(10,-6),0.515*pow(10,-6),0.473*pow(10,-6)]
+    pixeltom            = 6*pow(10,-6)
+    distance            = 0.01
+    fields              = np.random.rand(2,3,32,32)*np.exp(1j*2*np.pi*np.random.rand(2,3,32,32))
+    for propagation_type in ['IR Fresnel','Bandlimited Angular Spectrum','TR Fresnel','Fraunhofer','Bandextended Angular Spectrum']:
+        results         = propagate_beam_spectral(fields,distance,pixeltom,wavelengths,propagation_type)
+        for i,wavelength in enumerate(wavelengths):
+            result      = propagate_beam(fields[:,i],wavenumber(wavelength),distance,pixeltom,wavelength,propagation_type)
+            assert np.allclose(results[:,i],result)
+    intensity           = broadband_intensity(fields[0,0],distance,pixeltom,wavelengths,weights=[0.2,0.3,0.5],chunk_size=2)
+    ground_truth        = 0.
+    for weight,wavelength in zip([0.2,0.3,0.5],wavelengths):
+        result          = propagate_beam(fields[0,0],wavenumber(wavelength),distance,pixeltom,wavelength)
+        ground_truth   += weight*np.abs(result)**2
+    assert np.allclose(intensity,ground_truth)
+    if np.__name__ == 'cupy':
+        fields = np.asnumpy(fields)
+    fields              = torch.from_numpy(fields)
+    for propagation_type in ['IR Fresnel','Bandlimited Angular Spectrum','TR Fresnel','Fraunhofer']:
+        results         = propagate_beam_spectral_torch(fields,distance,pixeltom,wavelengths,propagation_type)
+        for i,wavelength in enumerate(wavelengths):
+            result      = propagate_beam_torch(fields[:,i],wavenumber(wavelength),distance,pixeltom,wavelength,propagation_type)
+            assert torch.allclose(results[:,i],result)
+    intensity           = broadband_intensity_torch(fields,distance,pixeltom,wavelengths)
+    assert intensity.shape == (2,32,32)
+
+if __name__ == '__main__':
+    sys.exit(test())
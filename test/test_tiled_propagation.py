@@ -0,0 +1,41 @@
+import sys
+import os
+import tempfile
+import numpy
+from odak import np
+from odak.wave import wavenumber,propagate_beam,propagate_beam_tiled,rayleigh_sommerfeld
+
+def test():
+    wavelength          = 0.5*pow(10,-6)
+    pixeltom            = 8*pow(10,-6)
+    distance            = 0.005
+    k                   = wavenumber(wavelength)
+    field               = np.zeros((96,80),dtype=np.complex128)
+    field[30:70,20:60]  = np.exp(1j*np.random.rand(40,40))
+    ground_truth        = rayleigh_sommerfeld(field,k,distance,pixeltom,wavelength)
+    result              = propagate_beam_tiled(field,k,distance,pixeltom,wavelength,'Rayleigh-Sommerfeld',memory_budget=2**30,guard=100)
+    assert np.allclose(result,ground_truth)
+    ground_truth        = propagate_beam(field,k,distance,pixeltom,wavelength,'Rayleigh-Sommerfeld')
+    result              = propagate_beam_tiled(field,k,distance,pixeltom,wavelength,'Rayleigh-Sommerfeld',memory_budget=2**22,guard=100)
+    assert np.allclose(result,ground_truth)
+    for propagation_type in ['IR Fresnel','Rayleigh-Sommerfeld','TR Fresnel','Bandlimited Angular Spectrum']:
+        ground_truth    = propagate_beam_tiled(field,k,distance,pixeltom,wavelength,propagation_type,memory_budget=2**30)
+        result          = propagate_beam_tiled(field,k,distance,pixeltom,wavelength,propagation_type,memory_budget=2**18)
+        assert np.allclose(result,ground_truth)
+    propagation_type    = 'Bandlimited Angular Spectrum'
+    ground_truth        = propagate_beam_tiled(field,k,distance,pixeltom,wavelength,propagation_type,memory_budget=2**30,guard=200)
+    result              = propagate_beam_tiled(field,k,distance,pixeltom,wavelength,propagation_type,memory_budget=2**20,guard=40)
+    assert np.linalg.norm(result-ground_truth) < 1e-2*np.linalg.norm(ground_truth)
+    with tempfile.TemporaryDirectory() as directory:
+        input_filename  = os.path.join(directory,'field.npy')
+        output_filename = os.path.join(directory,'result.npy')
+        if np.__name__ == 'cupy':
+            numpy.save(input_filename,np.asnumpy(field))
+        else:
+            numpy.save(input_filename,field)
+        propagate_beam_tiled(input_filename,k,distance,pixeltom,wavelength,propagation_type,output=output_filename,memory_budget=2**20,guard=40)
+        result_disk     = numpy.load(output_filename)
+        assert numpy.allclose(result_disk,np.asnumpy(result) if np.__name__ == 'cupy' else result)
+
+if __name__ == '__main__':
+    sys.exit(test())
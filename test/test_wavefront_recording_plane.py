@@ -0,0 +1,36 @@
+import sys
+from odak import np
+from odak.wave import wavenumber,zone_plate,wavefront_recording_plane,wavefront_recording_plane_field
+
+def test():
+    wavelength          = 0.5*pow(10,-6)
+    pixeltom            = 8*pow(10,-6)
+    k                   = wavenumber(wavelength)
+    shape               = [128,128]
+    n_points            = 50
+    points              = np.zeros((n_points,3))
+    points[:,0:2]       = (np.random.rand(n_points,2)-0.5)*120*pixeltom
+    points[:,2]         = np.random.choice([0.01,0.0102,0.0105],n_points)
+    amplitudes          = np.exp(1j*2*np.pi*np.random.rand(n_points))
+    wrp_distance        = 0.0095
+    field               = wavefront_recording_plane_field(points,k,pixeltom,wavelength,shape,wrp_distance,amplitudes)
+    ground_truth        = np.zeros(shape,dtype=np.complex128)
+    for m in range(n_points):
+        patch           = zone_plate(points[m,2]-wrp_distance,k,pixeltom,wavelength)
+        support         = patch.shape[0]//2
+        padded          = np.zeros((shape[0]+2*support,shape[1]+2*support),dtype=np.complex128)
+        row             = int(np.round(points[m,1]/pixeltom))+shape[0]//2
+        column          = int(np.round(points[m,0]/pixeltom))+shape[1]//2
+        padded[row:row+2*support+1,column:column+2*support+1] = amplitudes[m]*patch
+        ground_truth   += padded[support:support+shape[0],support:support+shape[1]]
+    assert np.allclose(field,ground_truth)
+    hologram            = wavefront_recording_plane(np.array([[0.,0.,0.01]]),k,pixeltom,wavelength,shape,wrp_distance=0.008,padding='2x')
+    patch               = zone_plate(0.01,k,pixeltom,wavelength)
+    support             = patch.shape[0]//2
+    ground_truth        = hologram[64-support:64+support+1,64-support:64+support+1]
+    mask                = np.abs(patch) > 0
+    similarity          = np.abs(np.vdot(ground_truth[mask],patch[mask]))/np.linalg.norm(ground_truth[mask])/np.linalg.norm(patch[mask])
+    assert similarity > 0.8
+
+if __name__ == '__main__':
+    sys.exit(test())
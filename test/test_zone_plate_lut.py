@@ -0,0 +1,83 @@
+import sys
+import os
+import tempfile
+from odak import np
+from odak.wave import wavenumber,zone_plate,zone_plate_lut,point_wise,point_spread_lens,wavefront_recording_plane_field
+
+def test():
+    wavelength          = 0.5*pow(10,-6)
+    pixeltom            = 8*pow(10,-6)
+    k                   = wavenumber(wavelength)
+    shape               = [64,64]
+    lut                 = zone_plate_lut(pixeltom,depth_step=pow(10,-4))
+    patch               = lut.get(0.00201,wavelength)
+    assert np.allclose(patch,zone_plate(0.002,k,pixeltom,wavelength))
+    lut.get(0.00199,wavelength)
+    assert lut.info()['entries'] == 1
+    assert lut.info()['hits'] == 1
+    field               = np.zeros(shape,dtype=np.complex128)
+    distances           = np.zeros(shape)
+    field[20,30]        = 1.
+    field[40,10]        = 1j
+    distances[20,30]    = 0.002
+    distances[40,10]    = 0.003
+    lens_lut            = zone_plate_lut(pixeltom)
+    hologram            = point_wise(field,distances,k,pixeltom,wavelength,lut=lens_lut)
+    ground_truth        = np.zeros(shape,dtype=np.complex128)
+    for i,j in [(20,30),(40,10)]:
+        support         = lens_lut.support(distances[i,j],wavelength)
+        mask            = np.zeros(shape)
+        mask[32-support:32+support+1,32-support:32+support+1] = 1.
+        lens            = point_spread_lens(64,64,distances[i,j],k,pixeltom,wavelength)*mask
+        ground_truth   += np.roll(np.roll(lens,i-32,axis=0),j-32,axis=1)*field[i,j]
+    assert np.allclose(hologram,ground_truth,atol=1e-6)
+    hologram            = point_wise(field,distances,k,pixeltom,wavelength,lut=lens_lut)
+    assert lens_lut.info()['entries'] == 2
+    assert lens_lut.info()['hits'] == 2
+    assert np.allclose(hologram,ground_truth,atol=1e-6)
+    far_distances       = distances*100.
+    hologram            = point_wise(field,far_distances,k,pixeltom,wavelength,lut=lens_lut)
+    ground_truth        = point_wise(field,far_distances,k,pixeltom,wavelength,lut=None)
+    assert np.allclose(hologram,ground_truth)
+    try:
+        point_wise(field,distances,k,pixeltom,wavelength,lens_method='Gerchberg-Saxton',lut=lens_lut)
+        assert False
+    except ValueError:
+        pass
+    points              = np.array([[30-32,20-32,0.002],[10-32,40-32,0.003]])*np.array([pixeltom,pixeltom,1.])
+    ground_truth        = wavefront_recording_plane_field(points,k,pixeltom,wavelength,shape,0.,np.array([1.,1j]))
+    result              = np.zeros(shape,dtype=np.complex128)
+    lut.add(result,[20],[30],0.002,wavelength,[1.])
+    lut.add(result,[40],[10],0.003,wavelength,[1j])
+    assert np.allclose(result,ground_truth,atol=1e-3)
+    separable_lut       = zone_plate_lut(pixeltom,separable=True)
+    patch               = separable_lut.get(0.05,wavelength)
+    ground_truth        = zone_plate(0.05,k,pixeltom,wavelength)
+    mask                = np.abs(ground_truth) > 0
+    similarity          = np.abs(np.vdot(patch[mask],ground_truth[mask]))/np.linalg.norm(patch[mask])/np.linalg.norm(ground_truth[mask])
+    assert similarity > 0.99
+    near_patch          = separable_lut.get(0.01,wavelength)
+    width               = near_patch.shape[0]//2
+    ground_truth        = np.zeros((128,128),dtype=np.complex128)
+    ground_truth[64-width:64+width+1,64-width:64+width+1] = 2.*near_patch
+    result              = separable_lut.add(np.zeros((128,128),dtype=np.complex128),[64],[64],0.01,wavelength,[2.])
+    assert np.allclose(result,ground_truth)
+    with tempfile.TemporaryDirectory() as directory:
+        filename        = os.path.join(directory,'lut.npz')
+        separable_lut.save(filename)
+        loaded_lut      = zone_plate_lut(pixeltom/2.)
+        loaded_lut.load(filename)
+        assert loaded_lut.separable == True
+        assert loaded_lut.dx == pixeltom
+        assert np.allclose(loaded_lut.get(0.05,wavelength),patch)
+        assert loaded_lut.info()['hits'] == 1
+        lens_lut.save(filename)
+        loaded_lut      = zone_plate_lut(pixeltom)
+        loaded_lut.load(filename)
+        assert np.allclose(loaded_lut.get_lens(64,64,0.002,wavelength)[0],lens_lut.get_lens(64,64,0.002,wavelength)[0])
+        assert loaded_lut.info()['misses'] == 0
+    lut.cache.set_budget(0)
+    assert lut.info()['entries'] == 0
+
+if __name__ == '__main__':
+    sys.exit(test())